@@ -0,0 +1,68 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0001_initial"),
+        ("patients", "0001_initial"),
+        ("appointments", "0001_initial"),
+    ]
+
+    # Build the composite indexes before dropping the single-column ones so the patient/doctor
+    # foreign keys always keep a usable index (MySQL refuses to drop it otherwise).
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["visit_date"], name="Appointment_visit_d_d2fe8d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["patient", "visit_date"], name="Appointment_patient_50bb5c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["doctor", "visit_date"], name="Appointment_doctor__18d186_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["diagnosis"], name="Appointment_diagnos_9c8737_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="doctor",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="doctors.doctor",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="appointment",
+            name="patient",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="patients.patient",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="Appointment_patient_433b03_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="Appointment_doctor__2f2b31_idx",
+        ),
+    ]
@@ -1,20 +1,36 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class Appointment(models.Model):
-    patient = models.ForeignKey('patients.Patient', on_delete=models.PROTECT)
-    doctor = models.ForeignKey('doctors.Doctor', on_delete=models.PROTECT)
+    # no single-column FK indexes: the (patient, visit_date) and (doctor, visit_date) indexes cover them
+    patient = models.ForeignKey('patients.Patient', on_delete=models.PROTECT, db_index=False)
+    doctor = models.ForeignKey('doctors.Doctor', on_delete=models.PROTECT, db_index=False)
     visit_date = models.DateTimeField()
     diagnosis = models.CharField(max_length=255, blank=True, null=True)
     category = models.CharField(max_length=50, blank=True, null=True)
     note = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'Appointments'
         ordering = ['-visit_date']  # Most recent first
-        indexes = [models.Index(fields=['patient']), models.Index(fields=['doctor'])]
+        indexes = [
+            models.Index(fields=['visit_date']),
+            models.Index(fields=['patient', 'visit_date']),
+            models.Index(fields=['doctor', 'visit_date']),
+            models.Index(fields=['diagnosis']),
+        ]
         verbose_name = 'Appointment'
         verbose_name_plural = 'Appointments'
 
+    def save(self, *args, **kwargs):
+        # metrics rollups are adjusted by save signals; keep them in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"Appt {self.id} - {self.patient} with Dr. {self.doctor}"
@@ -7,7 +7,10 @@ from doctors.models import Doctor
 class AppointmentSerializer(serializers.ModelSerializer):
     doctor = DoctorSerializer(read_only=True)
     # Allow setting doctor by id when creating/updating
-    doctor_id = serializers.PrimaryKeyRelatedField(queryset=Doctor.objects.all(), source='doctor', write_only=True, required=True)
+    doctor_id = serializers.PrimaryKeyRelatedField(
+        queryset=Doctor.objects.select_related('department', 'doctor_level', 'active_status'),
+        source='doctor', write_only=True, required=True
+    )
 
     class Meta:
         model = Appointment
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent inside the transaction after appointments are written with bulk_create/bulk_update, which
+# skip the model save signals. `appointments` are the saved rows; `previous` holds unsaved copies
+# of updated rows as they were before the update (empty for creation).
+appointments_bulk_saved = Signal()
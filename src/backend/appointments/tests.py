@@ -1,9 +1,22 @@
-from django.test import TestCase
+import json
+import re
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
 from doctors.models import Doctor, DoctorLevel, DoctorActiveStatus, Department
 from patients.models import Patient
+from appointments.models import Appointment
+from appointments.views import AppointmentViewSet
+from config.pagination import PageOrCursorPagination
+from config.reference import REFERENCE_DATA
 
 class AppointmentTestCase(TestCase):
     def setUp(self):
@@ -32,3 +45,253 @@ class AppointmentTestCase(TestCase):
         url = reverse('appointment-list')
         res = self.client.post(url, data={'patient': self.patient.id, 'doctor': self.doc.id, 'visit_date': '2023-12-20', 'note': 'Test'})
         self.assertEqual(res.status_code, 400)
+
+    def test_list_query_count_is_independent_of_doctors(self):
+        url = reverse('appointment-list')
+        Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date='2023-12-20T09:00:00Z')
+        # count + the page's ids + their doctors' updated_at + appointments joined with patient
+        # and the doctor graph; the lookup tables in the validators come from the per-worker
+        # copy, warm as after start-up
+        REFERENCE_DATA.warm()
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+
+        for i in range(5):
+            lvl = DoctorLevel.objects.create(title=f'Level {i}')
+            status_active = DoctorActiveStatus.objects.create(status_name='Active')
+            dept = Department.objects.create(department_name=f'Dept {i}')
+            doc = Doctor.objects.create(department=dept, dob='1980-01-01', first_name='Doc', last_name=str(i), gender='Male', national_id=f'DX{i}', expertise='General', doctor_level=lvl, active_status=status_active)
+            Appointment.objects.create(patient=self.patient, doctor=doc, visit_date='2023-12-21T09:00:00Z')
+        REFERENCE_DATA.warm()
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+        results = res.json()['results']
+        self.assertEqual(len(results), 6)
+        self.assertIn('Dept 4', {r['doctor']['department_name'] for r in results})
+
+
+    @mock.patch.object(PageOrCursorPagination, 'page_size', 3)
+    def test_cursor_pagination_walks_every_row_once(self):
+        url = reverse('appointment-list')
+        # two pairs share a visit_date so the id tie-breaker matters
+        for day in (1, 2, 2, 3, 4, 4, 5):
+            Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date=f'2024-01-0{day}T09:00:00Z')
+        expected = list(Appointment.objects.order_by('-visit_date', '-id').values_list('id', flat=True))
+
+        seen = []
+        next_url = f'{url}?pagination=cursor'
+        while next_url:
+            # one query per page: no COUNT(*), no OFFSET over earlier pages
+            with self.assertNumQueries(1):
+                body = self.client.get(next_url).json()
+            self.assertNotIn('count', body)
+            seen.extend(a['id'] for a in body['results'])
+            if len(seen) == 3:
+                # a booking made while paging must not shift later pages
+                Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date='2024-01-10T09:00:00Z')
+            next_url = body['next']
+        self.assertEqual(seen, expected)
+
+        # page-number mode is unchanged
+        self.assertEqual(self.client.get(url).json()['count'], 8)
+
+    def test_bulk_create_and_update_keep_rollups(self):
+        from metrics.models import DailyAppointmentStat, DailyDiagnosisStat
+        other = Patient.objects.create(first_name='Bob', last_name='Jones', dob='1980-01-01', gender='Male', biological_sex='M', first_visit_date='2023-01-01', last_visit_date='2023-01-01')
+        items = [
+            {'patient': patient.id, 'doctor_id': self.doc.id, 'visit_date': f'2024-03-0{day}T09:00:00Z', 'diagnosis': 'Flu'}
+            for day in (1, 1, 2) for patient in (self.patient, other)
+        ]
+        res = self.client.post('/api/appointments/bulk/', data=items, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['created'], 6)
+        # savepoint, patients and doctors loaded once, one insert, then one update per touched
+        # rollup row (2 days x doctor, 2 patients, diagnosis), release
+        with self.assertNumQueries(13):
+            res = self.client.post('/api/appointments/bulk/', data=items, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            sorted(DailyAppointmentStat.objects.values_list('day', 'appointment_count')),
+            [(date(2024, 3, 1), 8), (date(2024, 3, 2), 4)],
+        )
+
+        moved = Appointment.objects.filter(visit_date__date=date(2024, 3, 2)).order_by('id')
+        res = self.client.patch('/api/appointments/bulk/', data=[
+            {'id': appt.id, 'diagnosis': 'Cold'} for appt in moved
+        ], format='json')
+        self.assertEqual(res.json(), {'updated': 4})
+        self.assertEqual(
+            sorted(DailyDiagnosisStat.objects.values_list('diagnosis', 'appointment_count')),
+            [('Cold', 4), ('Flu', 8)],
+        )
+
+    def test_bulk_reports_errors_per_item_and_writes_nothing(self):
+        inactive = Doctor.objects.create(department=self.doc.department, dob='1980-01-01', first_name='Jane', last_name='Roe', gender='Female', national_id='D999', expertise='General', doctor_level=self.doc.doctor_level, active_status=DoctorActiveStatus.objects.create(status_name='Inactive'))
+        valid = {'patient': self.patient.id, 'doctor_id': self.doc.id, 'visit_date': '2024-03-01T09:00:00Z'}
+        res = self.client.post('/api/appointments/bulk/', data=[valid, {**valid, 'patient': 999999}, {**valid, 'visit_date': 'soon'}], format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([(e['index'], sorted(e['errors'])) for e in res.json()['errors']], [(1, ['patient']), (2, ['visit_date'])])
+
+        res = self.client.post('/api/appointments/bulk/', data=[valid, {**valid, 'doctor_id': inactive.id}], format='json')
+        self.assertEqual(res.json()['errors'], [{'index': 1, 'errors': {'doctor_id': ['Doctor is not available.']}}])
+        self.assertFalse(Appointment.objects.exists())
+
+        res = self.client.patch('/api/appointments/bulk/', data=[{'id': 999999, 'note': 'x'}, {'note': 'y'}], format='json')
+        self.assertEqual([e['errors'] for e in res.json()['errors']], [{'id': ['Object with id 999999 does not exist.']}, {'id': ['A valid id is required.']}])
+        self.assertEqual(self.client.post('/api/appointments/bulk/', data={'patient': 1}, format='json').status_code, 400)
+
+    @mock.patch.object(AppointmentViewSet, 'export_chunk_size', 2)
+    def test_export_streams_filtered_rows_in_key_order(self):
+        other = Patient.objects.create(first_name='Bob', last_name='Jones', dob='1980-01-01', gender='Male', biological_sex='M', first_visit_date='2023-01-01', last_visit_date='2023-01-01')
+        ids = [
+            Appointment.objects.create(patient=patient, doctor=self.doc, visit_date=f'2024-01-0{day}T09:00:00Z', diagnosis='Flu, mild').id
+            for day in (5, 1, 3, 2, 4) for patient in (self.patient, other)
+        ]
+        with self.assertNumQueries(4):
+            res = self.client.get('/api/appointments/export/?format=csv&patient=%d' % self.patient.id)
+            lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="appointments-', res['Content-Disposition'])
+        self.assertEqual(lines[0], 'id,patient_id,doctor_id,visit_date,diagnosis,category,note')
+        self.assertEqual(lines[1], f'{ids[0]},{self.patient.id},{self.doc.id},2024-01-05T16:00:00+07:00,"Flu, mild",,')
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], ids[::2])
+
+        res = self.client.get('/api/appointments/export/', HTTP_ACCEPT='application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], ids)
+        self.assertEqual(self.client.get('/api/appointments/export/?format=xml').status_code, 404)
+
+    @mock.patch.object(AppointmentViewSet, 'export_chunk_size', 2)
+    @override_settings(ROOT_URLCONF='config.async_urls')
+    def test_export_streams_chunk_by_chunk_under_asgi(self):
+        ids = [
+            Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date=f'2024-01-0{day}T09:00:00Z').id
+            for day in range(1, 6)
+        ]
+        headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+        async def fetch():
+            resp = await self.async_client.get('/api/appointments/export/?format=csv', headers=headers)
+            parts = []
+            async for part in resp.streaming_content:
+                parts.append(part)
+                if len(parts) == 2:
+                    # the next chunks are only read now, so they see a row added after the first
+                    added = await sync_to_async(Appointment.objects.create)(
+                        patient=self.patient, doctor=self.doc, visit_date='2024-01-06T09:00:00Z'
+                    )
+                    ids.append(added.id)
+            return resp, parts
+
+        resp, parts = async_to_sync(fetch)()
+        self.assertTrue(resp.is_async)
+        # the header, then one part per chunk of two rows
+        self.assertEqual(len(parts), 4)
+        rows = b''.join(parts).decode().splitlines()[1:]
+        self.assertEqual([int(row.split(',')[0]) for row in rows], ids)
+
+
+class QueryPlanMixin:
+    """EXPLAIN hot-path queries against `table` and fail if one of them scans the whole table.
+
+    Small test tables make every planner prefer a full scan and sort, so PostgreSQL runs with
+    sequential scans and sorts disabled and both it and MySQL get fresh statistics; the question
+    asked is whether a usable index exists, not what the planner picks for a few hundred rows.
+    """
+    table = None
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+                cursor.execute('SET enable_sort = off')
+                cursor.execute(f'ANALYZE "{self.table}"')
+        elif connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE TABLE `{self.table}`')
+
+    def tearDown(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+                cursor.execute('RESET enable_sort')
+
+    def plan(self, queryset):
+        """Return (full_scan, sorts) for `table` in the query plan"""
+        if connection.vendor == 'mysql':
+            plan = json.loads(queryset.explain(format='json'))
+            tables = []
+
+            def walk(node):
+                if isinstance(node, dict):
+                    if 'table_name' in node:
+                        tables.append(node)
+                    for value in node.values():
+                        walk(value)
+                elif isinstance(node, list):
+                    for value in node:
+                        walk(value)
+
+            walk(plan)
+            full_scan = any(t['table_name'] == self.table and t.get('access_type') == 'ALL' for t in tables)
+            return full_scan, '"using_filesort": true' in json.dumps(plan)
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            full_scan = f'Seq Scan on "{self.table}"' in plan
+            return full_scan, re.search(r'^\s*(->\s*)?(Incremental )?Sort\b', plan, re.M) is not None
+        # SQLite: "SCAN <table>" without "USING ... INDEX" reads every row
+        full_scan = re.search(rf'SCAN {self.table}\b(?! USING)', plan) is not None
+        return full_scan, 'USE TEMP B-TREE FOR ORDER BY' in plan
+
+    def assertIndexed(self, queryset, ordered=False):
+        full_scan, sorts = self.plan(queryset)
+        self.assertFalse(full_scan, f'full scan of {self.table}:\n{queryset.explain()}')
+        if ordered:
+            self.assertFalse(sorts, f'sort not served by an index:\n{queryset.explain()}')
+
+class AppointmentQueryPlanTest(QueryPlanMixin, TestCase):
+    table = Appointment._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        lvl = DoctorLevel.objects.create(title='Senior')
+        status_active = DoctorActiveStatus.objects.create(status_name='Active')
+        dept = Department.objects.create(department_name='General')
+        cls.doctors = [
+            Doctor.objects.create(department=dept, dob='1980-01-01', first_name='Doc', last_name=str(i), gender='Male', national_id=f'PLAN{i}', expertise='General', doctor_level=lvl, active_status=status_active)
+            for i in range(5)
+        ]
+        cls.patients = [
+            Patient.objects.create(first_name=f'P{i}', last_name='Plan', dob='1990-05-05', gender='Female', biological_sex='F', first_visit_date='2023-01-01', last_visit_date='2023-01-01')
+            for i in range(40)
+        ]
+        start = timezone.make_aware(datetime(2024, 1, 1, 8))
+        Appointment.objects.bulk_create([
+            Appointment(patient=cls.patients[i % 40], doctor=cls.doctors[i % 5], visit_date=start + timedelta(hours=7 * i), diagnosis=f'Condition {i % 30}')
+            for i in range(600)
+        ])
+        cls.start = start
+
+    def test_list_newest_first(self):
+        self.assertIndexed(AppointmentViewSet.queryset[:200])
+        self.assertIndexed(Appointment.objects.order_by('-visit_date')[:200], ordered=True)
+        # a cursor page of ?pagination=cursor: seek past the previous page's last visit_date
+        self.assertIndexed(Appointment.objects.filter(visit_date__lt=self.start + timedelta(days=60)).order_by('-visit_date', '-id')[:200])
+
+    def test_patient_history_newest_first(self):
+        self.assertIndexed(Appointment.objects.filter(patient=self.patients[3]).order_by('-visit_date'), ordered=True)
+
+    def test_doctor_schedule_in_range(self):
+        queryset = Appointment.objects.filter(
+            doctor=self.doctors[2], visit_date__gte=self.start, visit_date__lt=self.start + timedelta(days=7)
+        ).order_by('visit_date')
+        self.assertIndexed(queryset, ordered=True)
+
+    def test_visit_date_range(self):
+        self.assertIndexed(Appointment.objects.filter(
+            visit_date__gte=self.start + timedelta(days=30), visit_date__lt=self.start + timedelta(days=31)
+        ))
+
+    def test_diagnosis_lookup(self):
+        self.assertIndexed(Appointment.objects.filter(diagnosis='Condition 7'))
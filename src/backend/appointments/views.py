@@ -1,14 +1,39 @@
+import copy
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from django.db import transaction
+from config.bulk import BulkItemErrors, BulkModelMixin
+from config.conditional import ConditionalGetMixin
+from config.export import ExportMixin
+from config.filters import QueryParamFilterBackend, parse_id, parse_moment
+from doctors.models import Department, DoctorActiveStatus, DoctorLevel
 from .models import Appointment
 from .serializers import AppointmentSerializer
+from .signals import appointments_bulk_saved
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
-    queryset = Appointment.objects.select_related('patient', 'doctor').all().order_by('-visit_date')
+class AppointmentViewSet(ConditionalGetMixin, BulkModelMixin, ExportMixin, viewsets.ModelViewSet):
+    # Join the whole doctor graph: the nested DoctorSerializer reads department, level and status
+    queryset = Appointment.objects.select_related(
+        'patient', 'doctor__department', 'doctor__doctor_level', 'doctor__active_status'
+    ).all().order_by('-visit_date')
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ('doctor',)
+    conditional_reference = (Department, DoctorLevel, DoctorActiveStatus)
+    # each filter is served by the (patient, visit_date), (doctor, visit_date) or (visit_date) index
+    # ?pagination=cursor pages by keyset; (visit_date) index order, with id breaking ties
+    cursor_ordering = ('-visit_date', '-id')
+    filter_backends = [QueryParamFilterBackend]
+    filter_params = {
+        'patient': ('patient_id', parse_id),
+        'doctor': ('doctor_id', parse_id),
+        'visit_date_after': ('visit_date__gte', parse_moment),
+        'visit_date_before': ('visit_date__lt', parse_moment),
+    }
+    export_name = 'appointments'
+    export_fields = ('id', 'patient_id', 'doctor_id', 'visit_date', 'diagnosis', 'category', 'note')
 
     def create(self, request, *args, **kwargs):
         # Validate doctor availability (ActiveStatus >= 2)
@@ -22,7 +47,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         from doctors.models import Doctor
         try:
-            doctor = Doctor.objects.get(id=doctor_id)
+            doctor = Doctor.objects.select_related('active_status').get(id=doctor_id)
         except Doctor.DoesNotExist:
             return Response({'detail': 'Doctor not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -40,3 +65,22 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             self.perform_create(serializer)
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def perform_bulk_create(self, instances, serializer):
+        # doctors come from the serializer's preloaded queryset, with active_status joined
+        unavailable = {
+            position: {'doctor_id': ['Doctor is not available.']}
+            for position, appointment in enumerate(instances)
+            if not appointment.doctor.is_available
+        }
+        if unavailable:
+            raise BulkItemErrors(unavailable)
+        super().perform_bulk_create(instances, serializer)
+        appointments_bulk_saved.send(sender=Appointment, appointments=instances, previous=[])
+
+    def perform_bulk_update(self, changes):
+        previous = [copy.copy(appointment) for appointment, _ in changes]
+        super().perform_bulk_update(changes)
+        appointments_bulk_saved.send(
+            sender=Appointment, appointments=[appointment for appointment, _ in changes], previous=previous
+        )
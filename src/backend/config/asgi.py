@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+It serves the ASGI deployment profile: ASYNC_VIEWS defaults to on here, so the read-heavy
+endpoints are answered by async views (see SETUP.md, "ASGI Deployment").
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +15,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASYNC_VIEWS", "True")
 
 application = get_asgi_application()
+
+# load the lookup tables before the first request instead of during it
+from config.reference import warm_reference_data  # noqa: E402
+
+warm_reference_data()
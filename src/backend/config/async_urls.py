@@ -0,0 +1,33 @@
+"""
+URL configuration of the ASGI profile (ASYNC_VIEWS): the read-heavy endpoints answer GETs
+with async views, which pass every other request to the DRF views of config.urls.
+"""
+
+from django.urls import path, re_path
+
+from config import urls
+from config.asyncviews import AsyncReferenceList
+from doctors.views import DepartmentViewSet, DoctorActiveStatusViewSet, DoctorLevelViewSet
+from metrics.views import AsyncOverviewMetrics, aprometheus_metrics
+from patients.views import AsyncPatientTimeline
+from pharmacy.views import TypeMedicineAdministrationViewSet, TypeMedicineFunctionViewSet
+
+
+def lookup(viewset):
+    """Async list of a lookup table, leaving its other methods to `viewset`"""
+    actions = {method: action for method, action in (('get', 'list'), ('post', 'create')) if hasattr(viewset, action)}
+    return AsyncReferenceList.as_view(
+        model=viewset.queryset.model, serializer_class=viewset.serializer_class, fallback=viewset.as_view(actions),
+    )
+
+
+urlpatterns = [
+    path('metrics', aprometheus_metrics),
+    path('api/metrics/overview/', AsyncOverviewMetrics.as_view()),
+    path('api/departments/', lookup(DepartmentViewSet)),
+    path('api/doctor-levels/', lookup(DoctorLevelViewSet)),
+    path('api/doctor-statuses/', lookup(DoctorActiveStatusViewSet)),
+    path('api/medicine-types/', lookup(TypeMedicineFunctionViewSet)),
+    path('api/medicine-admin-methods/', lookup(TypeMedicineAdministrationViewSet)),
+    re_path(r'^api/patients/(?P<pk>[^/.]+)/timeline/$', AsyncPatientTimeline.as_view()),
+] + urls.urlpatterns
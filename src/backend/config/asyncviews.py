@@ -0,0 +1,160 @@
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from config.reference import REFERENCE_DATA, etag_matches
+
+
+def _on_own_connection(call):
+    def run():
+        try:
+            return call()
+        finally:
+            # executor threads outlive the request; hand the connection back (to the pool)
+            connections.close_all()
+    return run
+
+
+async def gather_queries(*calls):
+    """Run independent ORM callables concurrently and return their results in order.
+
+    Django 4.2's async ORM still executes every query on the request's one sync thread,
+    so by default the calls are awaited together but run back to back on that thread's
+    connection, exactly as `acount()`/`aaggregate()` would. With ASYNC_PARALLEL_QUERIES
+    each call runs on its own executor thread and connection, so the database works on
+    them at the same time; every call then borrows a connection, which is why that mode
+    is meant for DB_POOL_SIZE > 0. Parallel calls do not share a transaction or snapshot.
+    """
+    if settings.ASYNC_PARALLEL_QUERIES:
+        return await asyncio.gather(*(
+            sync_to_async(_on_own_connection(call), thread_sensitive=False)() for call in calls
+        ))
+    return await asyncio.gather(*(sync_to_async(call)() for call in calls))
+
+
+class AsyncReadView(View):
+    """Async Django view answering GET/HEAD for a DRF endpoint, authenticated like DRF.
+
+    Mounted on the same path as the DRF view, which it names as `fallback` (a staticmethod
+    when set on the class): every other method, and any GET `handles()` declines, is
+    passed on to that view unchanged, so writes, OPTIONS and the browsable API keep their
+    DRF behaviour. Responses are rendered with DRF's JSONRenderer, so payloads match the
+    DRF view's JSON.
+    """
+    fallback = None
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = 'page'
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # DRF views are CSRF exempt (they authenticate by token); so is everything passed on to them
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not self.handles(request):
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+        try:
+            request.user = await sync_to_async(self.authenticate)(request)
+            return await self.get(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.error(request, exc)
+
+    def handles(self, request):
+        return True
+
+    def authenticate(self, request):
+        """The first user the DRF authentication classes accept; they may query the database"""
+        for authentication_class in self.authentication_classes:
+            result = authentication_class().authenticate(request)
+            if result is not None:
+                return result[0]
+        raise exceptions.NotAuthenticated()
+
+    def render(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    def error(self, request, exc):
+        """The response DRF's exception handler gives for `exc`"""
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticate_header = self.authentication_classes[0]().authenticate_header(request)
+            if authenticate_header:
+                response['WWW-Authenticate'] = authenticate_header
+        return response
+
+    def page_number(self, request, count=None):
+        """The requested page number; `?page=last` needs the row count"""
+        number = request.GET.get(self.page_query_param, 1)
+        if number == 'last' and count is not None:
+            number = max(math.ceil(count / self.page_size), 1)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise exceptions.NotFound('Invalid page.')
+        if number < 1:
+            raise exceptions.NotFound('Invalid page.')
+        return number
+
+    def page_data(self, request, number, count, rows, serializer_class):
+        """`{count, next, previous, results}` exactly as PageNumberPagination builds it"""
+        pages = max(math.ceil(count / self.page_size), 1)
+        if number > pages:
+            raise exceptions.NotFound('Invalid page.')
+        url = request.build_absolute_uri()
+        previous = None
+        if number > 1:
+            previous = (remove_query_param(url, self.page_query_param) if number == 2
+                        else replace_query_param(url, self.page_query_param, number - 1))
+        return {
+            'count': count,
+            'next': replace_query_param(url, self.page_query_param, number + 1) if number < pages else None,
+            'previous': previous,
+            'results': serializer_class(rows, many=True).data,
+        }
+
+    async def paginate(self, request, queryset, serializer_class):
+        """One page of `queryset`. The COUNT and the page's rows do not depend on each other
+        and go through gather_queries() together; only `?page=last` needs the count first."""
+        count = None
+        if request.GET.get(self.page_query_param) == 'last':
+            count = await queryset.acount()
+        number = self.page_number(request, count)
+        offset = (number - 1) * self.page_size
+        count, rows = await gather_queries(
+            queryset.count, lambda: list(queryset[offset:offset + self.page_size]),
+        )
+        return self.page_data(request, number, count, rows, serializer_class)
+
+
+class AsyncReferenceList(AsyncReadView):
+    """List of a registered reference table from REFERENCE_DATA, with ReferenceListMixin's ETag"""
+    model = None
+    serializer_class = None
+
+    async def get(self, request, *args, **kwargs):
+        # no query unless this worker's copy is missing or outdated
+        table = await sync_to_async(REFERENCE_DATA.table)(self.model)
+        if etag_matches(request.headers.get('If-None-Match'), table['etag']):
+            response = HttpResponse(status=304)
+        else:
+            rows = table['rows']
+            number = self.page_number(request, len(rows))
+            offset = (number - 1) * self.page_size
+            response = self.render(self.page_data(
+                request, number, len(rows), rows[offset:offset + self.page_size], self.serializer_class,
+            ))
+        response['ETag'] = table['etag']
+        return response
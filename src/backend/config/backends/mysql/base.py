@@ -0,0 +1,12 @@
+from django.db.backends.mysql import base, creation
+
+from config.dbpool import PooledDatabaseCreationMixin, PooledDatabaseWrapperMixin
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """The MySQL backend with optional connection pooling (see PooledDatabaseWrapperMixin)"""
+    creation_class = DatabaseCreation
@@ -0,0 +1,211 @@
+from collections import Counter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import NotSupportedError, connection, transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed, ValidationError
+from rest_framework.response import Response
+
+
+class BulkItemErrors(Exception):
+    """Errors found while writing a batch, as {position in the request: error detail}"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} invalid item(s)')
+
+
+class PreloadedRows:
+    """Stands in for a related field's queryset, answering get(pk=...) from rows loaded up front"""
+
+    def __init__(self, queryset, values):
+        self.model = queryset.model
+        pk_field = self.model._meta.pk
+        keys = set()
+        for value in values:
+            try:
+                keys.add(pk_field.to_python(value))
+            except (DjangoValidationError, TypeError, ValueError):
+                pass
+        self.rows = queryset.in_bulk(keys) if keys else {}
+
+    def get(self, pk):
+        try:
+            key = self.model._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            raise ValueError(pk)
+        if key not in self.rows:
+            raise self.model.DoesNotExist
+        return self.rows[key]
+
+
+# Key of the first row of the connection's last multi-row INSERT, and the step between keys
+FIRST_INSERTED_KEY_SQL = {
+    'mysql': 'SELECT LAST_INSERT_ID(), @@auto_increment_increment',
+    # SQLite runs one writer at a time; it reports the statement's last rowid and row count
+    'sqlite': 'SELECT last_insert_rowid() - changes() + 1, 1',
+}
+
+
+def bulk_create_with_keys(model, instances, batch_size):
+    """bulk_create() that sets the instances' primary keys on backends whose INSERT cannot return them.
+
+    There each batch is written as one multi-row INSERT. InnoDB reserves the auto-increment
+    values of such a statement in one step, and LAST_INSERT_ID() reports the first of them,
+    so the batch's keys are counted from there.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(instances, batch_size=batch_size)
+    if connection.vendor not in FIRST_INSERTED_KEY_SQL:
+        raise NotSupportedError(f'Cannot read the keys of a multi-row insert on {connection.vendor}')
+    fields = [field for field in model._meta.concrete_fields if field is not model._meta.auto_field]
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, instances) or batch_size)
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        model.objects.bulk_create(batch, batch_size=len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(FIRST_INSERTED_KEY_SQL[connection.vendor])
+            first, step = cursor.fetchone()
+        for offset, instance in enumerate(batch):
+            instance.pk = first + offset * step
+    return instances
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Validates a list with the child serializer, loading each primary-key relation once.
+
+    Without preloading every item would run one SELECT per related field; here each
+    PrimaryKeyRelatedField costs one IN query for the whole batch.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            items = [item for item in data if isinstance(item, dict)]
+            for field in self.child.fields.values():
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and not field.read_only:
+                    values = [item[field.field_name] for item in items if field.field_name in item]
+                    field.queryset = PreloadedRows(field.get_queryset(), values)
+        return super().to_internal_value(data)
+
+    def build_instances(self):
+        """Unsaved model instances for validated create data"""
+        build = getattr(self.child, 'build_instance', None)
+        model = self.child.Meta.model
+        return [build(attrs) if build else model(**attrs) for attrs in self.validated_data]
+
+
+def error_list(errors):
+    """[{index, errors}] for the failing positions of a batch"""
+    return [{'index': index, 'errors': detail} for index, detail in sorted(errors.items())]
+
+
+class BulkModelMixin:
+    """`POST <list>/bulk/` creates and `PATCH <list>/bulk/` updates a JSON array of objects.
+
+    Items use the view's serializer fields (updates also carry `id`) and are written with
+    bulk_create/bulk_update in one transaction, at most `bulk_max_items` per request. A batch
+    is all-or-nothing: any failing item returns 400 with `{"errors": [{"index", "errors"}]}`.
+    Views override perform_bulk_create/perform_bulk_update to keep derived tables in step,
+    raising BulkItemErrors for items that only fail at write time.
+    """
+    bulk_max_items = 1000
+    bulk_methods = ('post', 'patch')
+    bulk_batch_size = 500
+
+    def get_bulk_serializer(self, data, partial=False):
+        return BulkListSerializer(
+            child=self.get_serializer_class()(context=self.get_serializer_context(), partial=partial),
+            data=data,
+            partial=partial,
+            allow_empty=False,
+            max_length=self.bulk_max_items,
+            context=self.get_serializer_context(),
+        )
+
+    def bulk_error_response(self, errors):
+        return Response({'errors': error_list(errors)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def bulk_validation_errors(self, serializer):
+        """{position: detail} for the invalid items; a body that is not a list raises a 400"""
+        if serializer.is_valid():
+            return {}
+        if not isinstance(serializer.errors, list):
+            raise ValidationError(serializer.errors)
+        return {index: detail for index, detail in enumerate(serializer.errors) if detail}
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        if request.method.lower() not in self.bulk_methods:
+            raise MethodNotAllowed(request.method)
+        try:
+            with transaction.atomic():
+                if request.method == 'POST':
+                    return self.bulk_create(request.data)
+                return self.bulk_update(request.data)
+        except BulkItemErrors as exc:
+            return self.bulk_error_response(exc.errors)
+
+    def bulk_create(self, data):
+        serializer = self.get_bulk_serializer(data)
+        errors = self.bulk_validation_errors(serializer)
+        if errors:
+            return self.bulk_error_response(errors)
+        instances = serializer.build_instances()
+        self.perform_bulk_create(instances, serializer)
+        ids = [instance.pk for instance in instances]
+        # MySQL does not report the keys of a multi-row insert
+        return Response(
+            {'created': len(instances), 'ids': ids if None not in ids else None},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def perform_bulk_create(self, instances, serializer):
+        self.get_queryset().model.objects.bulk_create(instances, batch_size=self.bulk_batch_size)
+
+    def bulk_update(self, data):
+        serializer = self.get_bulk_serializer(data, partial=True)
+        errors = self.bulk_validation_errors(serializer)
+        model = self.get_queryset().model
+        ids = []
+        for item in data:
+            try:
+                ids.append(model._meta.pk.to_python(item['id']))
+            except (DjangoValidationError, KeyError, TypeError, ValueError):
+                ids.append(None)
+        seen = Counter(ids)
+        instances = model.objects.select_for_update().in_bulk({pk for pk in ids if pk is not None})
+        for index, pk in enumerate(ids):
+            if pk is None:
+                message = 'A valid id is required.'
+            elif pk not in instances:
+                message = f'Object with id {pk} does not exist.'
+            elif seen[pk] > 1:
+                message = 'Duplicate id in batch.'
+            else:
+                continue
+            errors.setdefault(index, {})['id'] = [message]
+        if errors:
+            return self.bulk_error_response(errors)
+
+        changes = [(instances[pk], attrs) for pk, attrs in zip(ids, serializer.validated_data)]
+        self.perform_bulk_update(changes)
+        return Response({'updated': len(changes)})
+
+    def perform_bulk_update(self, changes):
+        """Apply [(instance, validated attrs)] and write the touched fields with bulk_update"""
+        fields = set()
+        for instance, attrs in changes:
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            fields.update(attrs)
+        if fields:
+            # bulk_update() skips auto_now (updated_at), which conditional GETs compare
+            for field in changes[0][0]._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    for instance, _ in changes:
+                        field.pre_save(instance, add=False)
+                    fields.add(field.name)
+            type(changes[0][0]).objects.bulk_update(
+                [instance for instance, _ in changes], sorted(fields), batch_size=self.bulk_batch_size
+            )
@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Func, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from config.reference import REFERENCE_DATA
+
+
+class ConditionalGetMixin:
+    """ETag (and Last-Modified on detail) for a viewset's `list()` and `retrieve()`, with
+    304 Not Modified answered before anything is loaded or serialized.
+
+    The validators are the row count of the filtered queryset and, for the rows of the page
+    being served only, each row's id and `updated_at` with the latest `updated_at` (and, for
+    one-to-many relations, the count) of each relation in `conditional_related` the
+    serializer reads. The count is handed to PageOrCursorPagination, which would otherwise
+    run the same COUNT(*). The page's ids are selected as the paginator selects its rows,
+    and the relations are then read for those ids only, one-to-many ones as correlated
+    subqueries on their foreign-key index, so the validators do not grow with the related
+    tables. Lookup tables in `conditional_reference`
+    contribute the ETag of their REFERENCE_DATA copy, at no query. The ETag also covers the
+    path with its query string (page, filters, ordering) and the rendered media type. Cursor
+    pages (PageOrCursorPagination) are served unconditionally.
+
+    Writes that skip `auto_now` (QuerySet.update(), bulk_update()) must set `updated_at`
+    themselves, as must SQL outside Django; the triggers of src/sql do that for the scripts.
+    """
+    conditional_related = ()
+    conditional_reference = ()
+
+    def list(self, request, *args, **kwargs):
+        use_cursor = getattr(self.paginator, 'use_cursor', None)
+        if use_cursor is not None and use_cursor(request, self):
+            # keyset pages exist to avoid the COUNT(*) over every row the validators take
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(request, queryset, super().list, args, kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # not a valid key; retrieve() answers 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(request, queryset, super().retrieve, args, kwargs, detail=True)
+
+    def get_page_rows(self, request, count):
+        """Slice of the filtered queryset the paginator will serve, or None for a page it answers 404"""
+        page_size = self.paginator.get_page_size(request) if self.paginator is not None else None
+        if not page_size:
+            return slice(None)
+        number = request.query_params.get(self.paginator.page_query_param) or 1
+        pages = max(1, -(-count // page_size))
+        if number in self.paginator.last_page_strings:
+            number = pages
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return None
+        if not 1 <= number <= pages:
+            return None
+        return slice((number - 1) * page_size, number * page_size)
+
+    def get_validators(self, queryset, rows=slice(None)):
+        """(id, updated_at, related validators...) of each row of `queryset[rows]`"""
+        fields = {}
+        for index, relation in enumerate(self.conditional_related):
+            field = queryset.model._meta.get_field(relation)
+            if not field.one_to_many:
+                # at most one related row, joined on its key
+                fields[f'related_{index}_updated_at'] = F(f'{relation}__updated_at')
+                continue
+            related = field.related_model._default_manager.filter(**{field.field.name: OuterRef('pk')}).order_by()
+            fields[f'related_{index}_count'] = Subquery(related.annotate(n=Func('pk', function='COUNT')).values('n'))
+            fields[f'related_{index}_updated_at'] = Subquery(
+                related.annotate(last=Func('updated_at', function='MAX')).values('last')
+            )
+        queryset = queryset.prefetch_related(None)
+        if rows.stop is None:
+            return list(queryset.annotate(**fields).values_list('pk', 'updated_at', *fields))
+
+        # the joins and subqueries would run for every row the sort and OFFSET pass over,
+        # so select the page first and read its relations by id
+        page = list(queryset.values_list('pk', 'updated_at')[rows])
+        if not fields or not page:
+            return page
+        related = {
+            pk: tuple(values) for pk, *values in queryset.model._default_manager
+            .filter(pk__in=[row[0] for row in page]).annotate(**fields).values_list('pk', *fields)
+        }
+        return [row + related.get(row[0], ()) for row in page]
+
+    def conditional_response(self, request, queryset, respond, args, kwargs, detail=False):
+        if detail:
+            validators = {'rows': self.get_validators(queryset)}
+            if not validators['rows']:
+                return respond(request, *args, **kwargs)
+        else:
+            count = queryset.count()
+            if hasattr(self.paginator, 'known_count'):
+                self.paginator.known_count = count
+            rows = self.get_page_rows(request, count)
+            if rows is None:
+                return respond(request, *args, **kwargs)
+            validators = {'count': count, 'rows': self.get_validators(queryset, rows)}
+
+        content = repr([
+            request.get_full_path(), request.accepted_media_type, sorted(validators.items()),
+            [REFERENCE_DATA.table(model)['etag'] for model in self.conditional_reference],
+        ])
+        etag = '"%s"' % hashlib.md5(content.encode(), usedforsecurity=False).hexdigest()
+        # a list's latest change says nothing about rows deleted from it: lists get only the ETag
+        last_modified = None
+        if detail:
+            changes = [value for value in validators['rows'][0][1:] if isinstance(value, datetime)]
+            last_modified = int(max(changes).timestamp()) if changes else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # browsers keep the body but revalidate it on every request
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
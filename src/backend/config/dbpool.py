@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+import pymysql
+from decouple import config
+
+
+def mysql_connect_kwargs(database=True):
+    """pymysql.connect() arguments from the same .env values as settings.DATABASES"""
+    kwargs = {
+        'host': config('DB_HOST', default='localhost'),
+        'port': config('DB_PORT', default=3306, cast=int),
+        'user': config('DB_USER', default='root'),
+        'password': config('DB_PASSWORD', default=''),
+        'charset': 'utf8mb4',
+    }
+    if database:
+        kwargs['database'] = config('DB_NAME', default='HospitalDB')
+    return kwargs
+
+
+def ping(conn):
+    """DB-API health check that works for any driver"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class ConnectionPool:
+    """A process-local pool of DB-API connections.
+
+    Up to `size` idle connections are kept; acquire() never waits, opening a new
+    connection when none is idle, and release() closes what does not fit. Idle
+    connections are health-checked when they sat unused for `check_after` seconds and
+    replaced once older than `recycle` seconds (keep below MySQL's wait_timeout).
+    Released connections are rolled back. After a fork the child starts empty rather
+    than share the parent's sockets.
+    """
+
+    def __init__(self, connect, size=5, recycle=3600, check_after=30, check=ping):
+        self.connect = connect
+        self.size = size
+        self.recycle = recycle
+        self.check_after = check_after
+        self.check = check
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._opened_at = {}
+        self._pid = os.getpid()
+        self.stats = {'opened': 0, 'reused': 0, 'discarded': 0}
+
+    def _reset_after_fork(self):
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._opened_at.clear()
+            self._pid = os.getpid()
+
+    def acquire(self, connect=None):
+        while True:
+            with self._lock:
+                self._reset_after_fork()
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()  # most recently used first
+            now = time.monotonic()
+            if now - self._opened_at.get(id(conn), now) > self.recycle:
+                self.discard(conn)
+                continue
+            if now - released_at > self.check_after:
+                try:
+                    self.check(conn)
+                except Exception:
+                    self.discard(conn)
+                    continue
+            with self._lock:
+                self.stats['reused'] += 1
+            return conn
+
+        conn = (connect or self.connect)()
+        with self._lock:
+            self._opened_at[id(conn)] = time.monotonic()
+            self.stats['opened'] += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        with self._lock:
+            self._reset_after_fork()
+            if id(conn) in self._opened_at and len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        with self._lock:
+            self._opened_at.pop(id(conn), None)
+            self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def connection(self):
+        """Context manager lending one connection"""
+        return _Lease(self)
+
+    def close_all(self):
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self.discard(conn)
+
+
+class _Lease:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        self.pool.release(self.conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, **options):
+    """The process-wide pool for `key`, created with `options` on first use"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(connect, **options)
+        return pool
+
+
+def close_pools():
+    """Close every idle pooled connection, e.g. before dropping a database"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def mysql_pool(connect_kwargs=None, size=1):
+    """Process-wide pymysql pool for the standalone scripts; connects with the .env settings by default"""
+    kwargs = connect_kwargs or mysql_connect_kwargs()
+    return get_pool(('pymysql',) + tuple(sorted(kwargs.items())), lambda: pymysql.connect(**kwargs), size=size)
+
+
+class PooledDatabaseWrapperMixin:
+    """Django DatabaseWrapper mixin: connect() borrows from a pool and close() gives back.
+
+    Enabled by `POOL_SIZE` in the DATABASES entry (0 disables it). Pair it with
+    CONN_MAX_AGE = 0 so every request returns its connection, letting all of a worker's
+    threads share `POOL_SIZE` idle connections instead of holding one each.
+    """
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get('POOL_SIZE', 0)
+        if not size:
+            return None
+        # keyed by database name too: test runs switch NAME on the same alias
+        return get_pool(
+            (self.alias, self.settings_dict['NAME']), None, size=size,
+            recycle=self.settings_dict.get('POOL_RECYCLE', 3600),
+            check_after=self.settings_dict.get('POOL_CHECK_AFTER', 30),
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.acquire(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block or self.errors_occurred:
+                # never lend out a connection in an unknown state
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection)
+
+
+class PooledDatabaseCreationMixin:
+    """DatabaseCreation mixin closing pooled connections before a test database is dropped"""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,49 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+
+def parse_id(value):
+    value = int(value)
+    if value < 1:
+        raise ValueError(value)
+    return value
+
+
+def parse_moment(value):
+    """Parse an ISO datetime, or a date meaning the start of that local day"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class QueryParamFilterBackend(filters.BaseFilterBackend):
+    """Exact filters declared by the view as `filter_params = {param: (lookup, parser)}`.
+
+    Views should only declare lookups backed by an index. Unparseable values are rejected
+    with a 400 instead of being ignored, so a typo never silently returns the whole table.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = {}
+        errors = {}
+        for param, (lookup, parser) in getattr(view, 'filter_params', {}).items():
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                lookups[lookup] = parser(value)
+            except (TypeError, ValueError):
+                errors[param] = [f'Invalid value: {value!r}.']
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups)
@@ -0,0 +1,330 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('hms.requests')
+
+# upper bounds in milliseconds of the request duration histogram
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current = ContextVar('request_stats', default=None)
+_repeating = ContextVar('expected_repeats', default=False)
+
+
+def _observe(buckets, duration_ms):
+    for i, bound in enumerate(DURATION_BUCKETS_MS):
+        if duration_ms <= bound:
+            buckets[i] += 1
+            return
+
+
+def _cumulative(buckets):
+    total = 0
+    for i, count in enumerate(buckets):
+        total += count
+        buckets[i] = total
+    return buckets
+
+
+class RequestStats:
+    """Measurements of one sampled request; DATABASE hands it the request's queries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.expected_repeats = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.statements = {}
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # async views may run a request's queries on several threads at once
+            with self._lock:
+                self.db_ms += (time.perf_counter() - start) * 1000
+                self.queries += 1
+                if _repeating.get():
+                    self.expected_repeats += 1
+                else:
+                    self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    @property
+    def duplicate_queries(self):
+        """Queries repeating an earlier statement with any parameters: the N+1 signal"""
+        return self.queries - self.expected_repeats - len(self.statements)
+
+    def most_repeated(self):
+        sql, count = max(self.statements.items(), key=lambda item: item[1], default=('', 0))
+        return sql[:200] if count > 1 else None
+
+
+@contextmanager
+def expected_repeats():
+    """Queries run inside still count, but not as duplicates: for code that issues one
+    statement per touched row by design, which the N+1 heuristic would flag otherwise"""
+    token = _repeating.set(True)
+    try:
+        yield
+    finally:
+        _repeating.reset(token)
+
+
+class RequestMetrics:
+    """Thread-safe in-process aggregates per (view, method, status class).
+
+    Every request counts towards the request, duration and size figures; the database,
+    duplicate-query and serializer figures cover sampled requests only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, labels, duration_ms, response_bytes, stats=None):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {
+                    'requests': 0, 'duration_ms': 0.0, 'response_bytes': 0,
+                    'buckets': [0] * len(DURATION_BUCKETS_MS),
+                    'sampled': 0, 'db_ms': 0.0, 'queries': 0, 'duplicate_queries': 0, 'serializer_ms': 0.0,
+                }
+            series['requests'] += 1
+            series['duration_ms'] += duration_ms
+            series['response_bytes'] += response_bytes or 0
+            _observe(series['buckets'], duration_ms)
+            if stats is not None:
+                series['sampled'] += 1
+                series['db_ms'] += stats.db_ms
+                series['queries'] += stats.queries
+                series['duplicate_queries'] += stats.duplicate_queries
+                series['serializer_ms'] += stats.serializer_ms
+
+    def snapshot(self):
+        """{(view, method, status): series}, with histogram buckets made cumulative"""
+        with self._lock:
+            return {labels: dict(values, buckets=_cumulative(list(values['buckets'])))
+                    for labels, values in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class TimingHistogram:
+    """Thread-safe duration histogram per label tuple, in milliseconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, duration_ms):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'count': 0, 'sum_ms': 0.0, 'buckets': [0] * len(DURATION_BUCKETS_MS)}
+            series['count'] += 1
+            series['sum_ms'] += duration_ms
+            _observe(series['buckets'], duration_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: dict(values, buckets=_cumulative(list(values['buckets'])))
+                    for labels, values in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class DatabaseCounters:
+    """Connections opened and statements executed per database alias, for every caller.
+
+    Also passes each statement to the RequestStats of the sampled request it runs for,
+    found through the context, which sync_to_async() carries to whichever thread and
+    connection an async view's queries use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = {}
+        self.queries = {}
+
+    def connection_opened(self, sender, connection, **kwargs):
+        with self._lock:
+            self.connections[connection.alias] = self.connections.get(connection.alias, 0) + 1
+        self.watch(connection)
+
+    def watch(self, conn):
+        # the wrapper list outlives reconnects of the same connection object; insert first since
+        # execute_wrapper() blocks opened earlier in the request pop the last entry on exit
+        if self not in conn.execute_wrappers:
+            conn.execute_wrappers.insert(0, self)
+
+    def __call__(self, execute, sql, params, many, context):
+        alias = context['connection'].alias
+        with self._lock:
+            self.queries[alias] = self.queries.get(alias, 0) + 1
+        stats = _current.get()
+        if stats is None:
+            return execute(sql, params, many, context)
+        return stats(execute, sql, params, many, context)
+
+    def snapshot(self):
+        with self._lock:
+            return {'connections': dict(self.connections), 'queries': dict(self.queries)}
+
+
+REGISTRY = RequestMetrics()
+AUTH_TIMINGS = TimingHistogram()
+DATABASE = DatabaseCounters()
+
+
+def install_query_counting():
+    connection_created.connect(DATABASE.connection_opened, dispatch_uid='hms-database-counters')
+    for conn in connections.all(initialized_only=True):
+        DATABASE.watch(conn)
+
+
+def install_serializer_timing():
+    """Time `serializer.data` for sampled requests, counting nested serializers once"""
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'instrumented', False):
+        return
+
+    def timed_data(serializer):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return data.fget(serializer)
+        stats.serializing = True
+        start = time.perf_counter()
+        try:
+            return data.fget(serializer)
+        finally:
+            stats.serializer_ms += (time.perf_counter() - start) * 1000
+            stats.serializing = False
+
+    timed_data.instrumented = True
+    BaseSerializer.data = property(timed_data)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+def server_timing(stats, duration_ms):
+    return ', '.join((
+        f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries, {stats.duplicate_queries} duplicate"',
+        f'serialize;dur={stats.serializer_ms:.1f}',
+        f'total;dur={duration_ms:.1f}',
+    ))
+
+
+class InstrumentationMiddleware:
+    """Record per-request timing, query counts and response size.
+
+    Every request is timed into REGISTRY. A fraction INSTRUMENTATION_SAMPLE_RATE of them
+    also has its queries and serializer time measured, logged as JSON on `hms.requests`,
+    and, with INSTRUMENTATION_SERVER_TIMING, reported in a `Server-Timing` header. Queries
+    run while a streaming response is consumed are not counted. Works in sync and async
+    middleware chains, so it does not force ASGI requests through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_serializer_timing()
+        install_query_counting()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            self.record(request, response, (time.perf_counter() - start) * 1000)
+            return response
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            duration_ms = (time.perf_counter() - start) * 1000
+        finally:
+            _current.reset(token)
+        return self.report(request, response, duration_ms, stats)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.INSTRUMENTATION_SAMPLE_RATE:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+            self.record(request, response, (time.perf_counter() - start) * 1000)
+            return response
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+            duration_ms = (time.perf_counter() - start) * 1000
+        finally:
+            _current.reset(token)
+        return self.report(request, response, duration_ms, stats)
+
+    def report(self, request, response, duration_ms, stats):
+        response_bytes = self.record(request, response, duration_ms, stats)
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(stats, duration_ms)
+        self.log(request, response, duration_ms, response_bytes, stats)
+        return response
+
+    def record(self, request, response, duration_ms, stats=None):
+        response_bytes = None if response.streaming else len(response.content)
+        labels = (view_name(request), request.method, f'{response.status_code // 100}xx')
+        REGISTRY.record(labels, duration_ms, response_bytes, stats)
+        return response_bytes
+
+    def log(self, request, response, duration_ms, response_bytes, stats):
+        flagged = (stats.duplicate_queries >= settings.INSTRUMENTATION_DUPLICATE_THRESHOLD
+                   or duration_ms >= settings.INSTRUMENTATION_SLOW_MS)
+        level = logging.WARNING if flagged else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        entry = {
+            'view': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 1),
+            'db_ms': round(stats.db_ms, 1),
+            'queries': stats.queries,
+            'duplicate_queries': stats.duplicate_queries,
+            'serializer_ms': round(stats.serializer_ms, 1),
+            'response_bytes': response_bytes,
+        }
+        if flagged:
+            entry['most_repeated'] = stats.most_repeated()
+        logger.log(level, json.dumps(entry))
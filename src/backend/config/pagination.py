@@ -0,0 +1,63 @@
+from django.core.paginator import Paginator
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CountedPaginator(Paginator):
+    """Django's Paginator, taking the row count when the caller has already run the COUNT(*)"""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class KeysetPagination(CursorPagination):
+    """CursorPagination on the view's `cursor_ordering` only.
+
+    CursorPagination would take the order from the view's OrderingFilter, which has none
+    without `?ordering=` and, on a detail action such as the patient timeline, orders a
+    different model; a cursor needs the fixed, unique keyset order anyway.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return (self.ordering,) if isinstance(self.ordering, str) else tuple(self.ordering)
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """Page-number pagination, with keyset (cursor) pagination on request.
+
+    `?pagination=cursor` (or following a `next`/`previous` link carrying `cursor`) switches
+    to CursorPagination on views that declare `cursor_ordering`. Cursor pages skip the
+    COUNT(*) and the OFFSET scan, so page N costs the same as page 1; the response is
+    `{next, previous, results}` without `count`. Views without `cursor_ordering` always
+    use page numbers.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    # COUNT(*) of this request's filtered queryset, when the view has run it (ConditionalGetMixin)
+    known_count = None
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountedPaginator(object_list, per_page, count=self.known_count)
+
+    def use_cursor(self, request, view):
+        if getattr(view, 'cursor_ordering', None) is None:
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request, view):
+            self.cursor_paginator = KeysetPagination()
+            self.cursor_paginator.ordering = view.cursor_ordering
+            self.cursor_paginator.page_size = self.page_size
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
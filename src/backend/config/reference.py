@@ -0,0 +1,186 @@
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import parse_etags
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'reference:version:{}'
+
+
+def _etag(model, rows):
+    fields = [field.attname for field in model._meta.concrete_fields]
+    content = repr([[getattr(row, name) for name in fields] for row in rows])
+    return '"%s"' % hashlib.md5(content.encode(), usedforsecurity=False).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header names `etag` (weak comparison, as for GET)"""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in [tag.removeprefix('W/') for tag in etags]
+
+
+class ReferenceData:
+    """Process-local copies of small lookup tables, versioned through the shared cache.
+
+    A registered table is loaded whole on first use and kept with the version it was read
+    at. ORM writes to it drop this process's copy at once and move the table to a new
+    version in the shared cache when they commit; other workers compare versions at most
+    every REFERENCE_DATA_CHECK_INTERVAL seconds. A primary key missing from the copy is
+    looked up in the database before it is reported missing, so a row another worker just
+    created is usable at once. Writes made with raw SQL are only noticed on restart, or
+    after `invalidate()`.
+
+    Rows are shared between threads: `get()` hands out copies, `table()` rows are for
+    reading only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self.models = []
+
+    def register(self, *models):
+        for model in models:
+            if model not in self.models:
+                self.models.append(model)
+            uid = f'reference-data-{model._meta.label_lower}'
+            post_save.connect(self._changed, sender=model, dispatch_uid=uid)
+            post_delete.connect(self._changed, sender=model, dispatch_uid=uid)
+
+    def _changed(self, sender, **kwargs):
+        self.invalidate(sender)
+
+    def invalidate(self, model):
+        self._drop(model)
+        transaction.on_commit(lambda: self._bump(model))
+
+    def _bump(self, model):
+        key = VERSION_KEY.format(model._meta.label_lower)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+        # a request may have reloaded the uncommitted state in the meantime
+        self._drop(model)
+
+    def _drop(self, model):
+        with self._lock:
+            self._tables.pop(model._meta.label_lower, None)
+
+    def table(self, model):
+        """{'rows', 'by_pk', 'etag', 'version'} of `model`, (re)loaded when missing or outdated"""
+        label = model._meta.label_lower
+        now = time.monotonic()
+        table = self._tables.get(label)
+        if table is not None and now - table['checked_at'] < settings.REFERENCE_DATA_CHECK_INTERVAL:
+            return table
+        # read the version before the rows, so rows older than it are never stored as newer
+        version = cache.get_or_set(VERSION_KEY.format(label), time.time_ns, timeout=None)
+        if table is not None and table['version'] == version:
+            table['checked_at'] = now
+            return table
+        rows = list(model._default_manager.all())
+        table = {
+            'version': version, 'checked_at': now, 'rows': rows,
+            'by_pk': {row.pk: row for row in rows}, 'etag': _etag(model, rows),
+        }
+        with self._lock:
+            self._tables[label] = table
+        return table
+
+    def get(self, model, pk):
+        """A copy of the `model` row with primary key `pk`, or None; raises TypeError or
+        ValueError for a key of the wrong type"""
+        try:
+            pk = model._meta.pk.to_python(pk)
+        except ValidationError as exc:
+            raise ValueError(exc.messages[0])
+        row = self.table(model)['by_pk'].get(pk)
+        if row is None and pk is not None:
+            row = model._default_manager.filter(pk=pk).first()
+            if row is not None:
+                self._drop(model)
+        return copy.copy(row)
+
+    def warm(self):
+        """Load every registered table, e.g. when a worker starts"""
+        for model in self.models:
+            self.table(model)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+REFERENCE_DATA = ReferenceData()
+
+
+def _warm():
+    try:
+        REFERENCE_DATA.warm()
+    except DatabaseError:
+        logger.warning('Reference data not preloaded: database unavailable', exc_info=True)
+    finally:
+        connections.close_all()
+
+
+def warm_reference_data():
+    """Warm REFERENCE_DATA at worker start; a database that is not up yet only makes the
+    first requests load it instead.
+
+    Runs on a thread of its own: ASGI servers may import the application inside their
+    event loop, where the ORM refuses to run, and its connection is closed with it.
+    """
+    thread = threading.Thread(target=_warm, name='reference-data-warmup')
+    thread.start()
+    thread.join()
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField to a registered reference table, resolved from REFERENCE_DATA"""
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = REFERENCE_DATA.get(self.get_queryset().model, data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class ReferenceListMixin:
+    """`list()` of a registered reference table served from REFERENCE_DATA.
+
+    Responses carry an ETag of the table's content; a request whose If-None-Match
+    matches gets 304 Not Modified without a body.
+    """
+
+    def list(self, request, *args, **kwargs):
+        table = REFERENCE_DATA.table(self.queryset.model)
+        if etag_matches(request.headers.get('If-None-Match'), table['etag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': table['etag']})
+        page = self.paginate_queryset(table['rows'])
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(table['rows'], many=True).data)
+        response['ETag'] = table['etag']
+        return response
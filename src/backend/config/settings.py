@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.instrumentation.InstrumentationMiddleware",  # first, so its timing covers the others
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # CORS must be before CommonMiddleware
@@ -66,7 +67,14 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# ASGI deployment profile (SETUP.md, "ASGI Deployment"); config/asgi.py turns it on. The read-heavy
+# endpoints are served by async views and the middleware chain stays async end to end: WhiteNoise
+# 6.5 is sync-only and would hop every request onto a thread, so the proxy serves STATIC_ROOT.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+if ASYNC_VIEWS:
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
+ROOT_URLCONF = "config.async_urls" if ASYNC_VIEWS else "config.urls"
 
 TEMPLATES = [
     {
@@ -90,17 +98,34 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connection reuse: with DB_POOL_SIZE = 0 each worker thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (None: forever, 0: one connection per request). With a pool, requests
+# hand their connection back when they finish, so a worker's threads share up to DB_POOL_SIZE
+# idle connections, recycled after DB_POOL_RECYCLE seconds (keep it below MySQL's wait_timeout).
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=0, cast=int)
+# Async views run their independent queries on separate connections at the same time
+# (config.asyncviews.gather_queries); each borrows one, so it is on by default only with a pool.
+ASYNC_PARALLEL_QUERIES = config('ASYNC_PARALLEL_QUERIES', default=DB_POOL_SIZE > 0, cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'config.backends.mysql',
         'NAME': config('DB_NAME', default='HospitalDB'),
         'USER': config('DB_USER', default='root'),
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='3306'),
+        # under ASGI each request queries from a new thread, whose kept connection would be orphaned
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE or ASYNC_VIEWS else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # ping a reused connection before its first query in a request instead of failing it
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_RECYCLE': config('DB_POOL_RECYCLE', default=3600, cast=int),
         'OPTIONS': {
             'charset': 'utf8mb4',
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+            # pharmacy.stock keeps MedicineStockBalance itself; the ledger triggers of src/sql
+            # skip sessions that set @hms_app_maintains_stock
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES', @hms_app_maintains_stock = 1",
         }
     }
 }
@@ -137,15 +162,23 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Build request.user from the access token's claims instead of loading users.User on every
+# request. Active state and role are still checked, at most once per JWT_USER_CACHE_TTL seconds
+# per user and worker, so deactivations and role changes apply within that time.
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=False, cast=bool)
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=30, cast=int)
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=2048, cast=int)
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication' if JWT_STATELESS_AUTH
+        else 'users.authentication.TimedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.PageOrCursorPagination',
     'PAGE_SIZE': 200,
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
 }
@@ -161,6 +194,56 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Cache Settings
+# The local-memory default is per process; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. django.core.cache.backends.memcached.PyMemcacheCache) when running several workers
+# so metrics invalidation and hit/miss counters are seen by all of them.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='hms-default'),
+    }
+}
+
+# Lookup tables (doctor levels and statuses, departments, medicine types...) are kept in each
+# worker (config.reference); a worker notices another one's write within this many seconds
+REFERENCE_DATA_CHECK_INTERVAL = config('REFERENCE_DATA_CHECK_INTERVAL', default=5, cast=int)
+
+# Dashboard overview metrics are cached for this many seconds unless invalidated earlier
+METRICS_CACHE_TTL = config('METRICS_CACHE_TTL', default=30, cast=int)
+# How long concurrent requests wait for another request to recompute a missing overview
+METRICS_CACHE_LOCK_WAIT = config('METRICS_CACHE_LOCK_WAIT', default=2, cast=int)
+
+# Request instrumentation (config.instrumentation)
+# Every request is timed; this fraction also has its queries and serializer time measured and logged
+INSTRUMENTATION_SAMPLE_RATE = config('INSTRUMENTATION_SAMPLE_RATE', default=1.0 if DEBUG else 0.05, cast=float)
+# Add a Server-Timing header (db, serialize, total) to sampled responses
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=DEBUG, cast=bool)
+# Sampled requests at or above either limit are logged as warnings with their most repeated statement
+INSTRUMENTATION_DUPLICATE_THRESHOLD = config('INSTRUMENTATION_DUPLICATE_THRESHOLD', default=10, cast=int)
+INSTRUMENTATION_SLOW_MS = config('INSTRUMENTATION_SLOW_MS', default=1000, cast=int)
+# Test runs sample no requests unless a test overrides the rate
+TEST_RUNNER = 'config.test_runner.TestRunner'
+
+# Bearer token Prometheus must send to scrape /metrics; without one the endpoint only answers with DEBUG
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # INFO logs every sampled request as one JSON line; WARNING only slow or N+1 ones
+        'hms.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -182,6 +265,8 @@ CORS_ALLOW_HEADERS = list(
         'authorization',
         'content-type',
         'dnt',
+        'if-modified-since',
+        'if-none-match',
         'origin',
         'user-agent',
         'x-csrftoken',
@@ -189,6 +274,9 @@ CORS_ALLOW_HEADERS = list(
     ]
 )
 
+# Validators of conditional GETs (config.conditional), readable by scripts on other origins
+CORS_EXPOSE_HEADERS = ['etag', 'last-modified']
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
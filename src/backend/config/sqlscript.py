@@ -0,0 +1,52 @@
+import re
+
+DELIMITER_LINE = re.compile(r'^\s*DELIMITER\s+(\S+)\s*$', re.IGNORECASE)
+QUOTES = "'\"`"
+
+
+def split_sql_statements(text):
+    """Split a mysql-client style script into statements.
+
+    Honors `DELIMITER` lines (so procedure and trigger bodies stay whole), quoted strings and
+    identifiers, and drops `--` / `#` comments. Statements are returned without their delimiter.
+    """
+    statements = []
+    delimiter = ';'
+    current = []
+    quote = None
+    for line in text.splitlines(keepends=True):
+        if quote is None:
+            directive = DELIMITER_LINE.match(line)
+            if directive:
+                delimiter = directive.group(1)
+                continue
+        i = 0
+        while i < len(line):
+            char = line[i]
+            if quote:
+                current.append(char)
+                if char == '\\' and quote != '`':
+                    current.append(line[i + 1:i + 2])
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif char in QUOTES:
+                quote = char
+                current.append(char)
+            elif char == '#' or (line.startswith('--', i) and line[i + 2:i + 3] in ('', ' ', '\t', '\n', '\r')):
+                current.append('\n')
+                break
+            elif line.startswith(delimiter, i):
+                statement = ''.join(current).strip()
+                if statement:
+                    statements.append(statement)
+                current = []
+                i += len(delimiter)
+                continue
+            else:
+                current.append(char)
+            i += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that leaves request sampling off unless a test turns it on"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # sampled requests would log at random; InstrumentationTest sets the rate it asserts on
+        settings.INSTRUMENTATION_SAMPLE_RATE = 0
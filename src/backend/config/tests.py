@@ -0,0 +1,171 @@
+import json
+import re
+import sqlite3
+import threading
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from config.asyncviews import gather_queries
+from config.dbpool import ConnectionPool
+from config.instrumentation import REGISTRY, RequestStats, expected_repeats
+from config.sqlscript import split_sql_statements
+from doctors.models import Department, Doctor, DoctorActiveStatus, DoctorLevel
+from patients.models import Patient
+
+
+class SqlScriptTest(SimpleTestCase):
+    def test_split_honors_delimiter_blocks_quotes_and_comments(self):
+        script = """
+-- a comment; not a statement
+INSERT INTO t VALUES ('a;b', "it\\'s; fine"); # trailing comment
+DELIMITER //
+CREATE TRIGGER trg BEFORE INSERT ON t
+FOR EACH ROW
+BEGIN
+    SET NEW.x = 1;
+    SET NEW.y = 'END //';
+END //
+DELIMITER ;
+SELECT 1--1;
+"""
+        self.assertEqual(split_sql_statements(script), [
+            "INSERT INTO t VALUES ('a;b', \"it\\'s; fine\")",
+            "CREATE TRIGGER trg BEFORE INSERT ON t\nFOR EACH ROW\nBEGIN\n    SET NEW.x = 1;\n    SET NEW.y = 'END //';\nEND",
+            'SELECT 1--1',
+        ])
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='testuser', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        REGISTRY.reset()
+
+        DoctorLevel.objects.create(id=1, title='Junior')
+        active_status = DoctorActiveStatus.objects.create(id=2, status_name='On-Demand')
+        dept = Department.objects.create(department_name='Cardiology')
+        today = timezone.localdate()
+        self.doc = doc = Doctor.objects.create(first_name='John', last_name='Doc', dob='1980-01-01', gender='Male', national_id='D123', expertise='Cardio', doctor_level_id=1, active_status=active_status, department=dept)
+        self.p1 = Patient.objects.create(first_name='A', last_name='One', dob='1990-01-01', gender='Female', biological_sex='F', first_visit_date=today, last_visit_date=today)
+        self.p2 = Patient.objects.create(first_name='B', last_name='Two', dob='1991-02-02', gender='Male', biological_sex='M', first_visit_date=today, last_visit_date=today)
+        Appointment.objects.create(patient=self.p1, doctor=doc, visit_date=timezone.now())
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0, INSTRUMENTATION_SERVER_TIMING=True, INSTRUMENTATION_SLOW_MS=0)
+    def test_sampled_request_reports_server_timing_log_and_registry(self):
+        with self.assertLogs('hms.requests', 'WARNING') as logs:
+            resp = self.client.get('/api/appointments/')
+        self.assertEqual(resp.status_code, 200)
+        timing = dict(part.split(';', 1) for part in re.split(r', (?=\w+;)', resp['Server-Timing']))
+        self.assertEqual(set(timing), {'db', 'serialize', 'total'})
+        self.assertIn('queries, 0 duplicate', timing['db'])
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['view'], entry['status']), ('appointment-list', 200))
+        self.assertEqual(entry['response_bytes'], len(resp.content))
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['serializer_ms'], 0)
+
+        series = REGISTRY.snapshot()[('appointment-list', 'GET', '2xx')]
+        self.assertEqual((series['requests'], series['sampled']), (1, 1))
+        self.assertEqual(series['queries'], entry['queries'])
+        self.assertEqual(series['buckets'][-1], 1)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0.0, INSTRUMENTATION_SERVER_TIMING=True)
+    def test_unsampled_request_is_only_timed(self):
+        resp = self.client.get('/api/metrics/overview/')
+        self.assertNotIn('Server-Timing', resp)
+        series = REGISTRY.snapshot()[('metrics.views.OverviewMetrics', 'GET', '2xx')]
+        self.assertEqual((series['requests'], series['sampled'], series['queries']), (1, 0, 0))
+
+    def test_repeated_statements_count_as_duplicates(self):
+        stats = RequestStats()
+        with connection.execute_wrapper(stats):
+            for patient in (self.p1, self.p2, self.p1):
+                Appointment.objects.filter(patient=patient).count()
+            Patient.objects.count()
+        self.assertEqual((stats.queries, stats.duplicate_queries), (4, 2))
+        self.assertIn('patient_id', stats.most_repeated())
+
+        stats = RequestStats()
+        with connection.execute_wrapper(stats), expected_repeats():
+            for patient in (self.p1, self.p2, self.p1):
+                Appointment.objects.filter(patient=patient).count()
+        self.assertEqual((stats.queries, stats.duplicate_queries, stats.most_repeated()), (3, 0, None))
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0, INSTRUMENTATION_DUPLICATE_THRESHOLD=2)
+    def test_rollup_updates_of_a_bulk_write_are_not_flagged(self):
+        items = [
+            {'patient': patient.id, 'doctor_id': self.doc.id, 'visit_date': f'2024-03-0{day}T09:00:00Z', 'diagnosis': 'Flu'}
+            for day in (1, 2, 3) for patient in (self.p1, self.p2)
+        ]
+        with self.assertLogs('hms.requests', 'INFO') as logs:
+            resp = self.client.post('/api/appointments/bulk/', data=items, format='json')
+        self.assertEqual(resp.status_code, 201)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((logs.records[0].levelname, entry['duplicate_queries']), ('INFO', 0))
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def connect(self):
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_reuses_idle_connections_up_to_size(self):
+        pool = ConnectionPool(self.connect, size=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)  # no room: closed
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats, {'opened': 2, 'reused': 1, 'discarded': 1})
+        with self.assertRaises(sqlite3.ProgrammingError):
+            second.execute('SELECT 1')
+
+    def test_replaces_broken_and_expired_connections(self):
+        def broken(conn):
+            raise sqlite3.OperationalError('server has gone away')
+
+        pool = ConnectionPool(self.connect, size=2, check_after=0, check=broken)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIsNot(pool.acquire(), conn)
+
+        pool = ConnectionPool(self.connect, size=2, recycle=-1)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIsNot(pool.acquire(), conn)
+        self.assertEqual(pool.stats['discarded'], 1)
+
+    def test_release_rolls_back(self):
+        pool = ConnectionPool(self.connect, size=1)
+        with pool.connection() as conn:
+            conn.execute('CREATE TABLE t (x)')
+            conn.commit()
+            conn.execute('INSERT INTO t VALUES (1)')
+        with pool.connection() as again:
+            self.assertIs(again, conn)
+            self.assertEqual(again.execute('SELECT COUNT(*) FROM t').fetchone(), (0,))
+
+
+class GatherQueriesTest(SimpleTestCase):
+    def test_calls_share_the_request_thread_by_default(self):
+        results = async_to_sync(gather_queries)(threading.get_ident, lambda: 'second')
+        self.assertEqual(results, [threading.get_ident(), 'second'])
+
+    @override_settings(ASYNC_PARALLEL_QUERIES=True)
+    def test_parallel_calls_run_at_the_same_time(self):
+        # each call waits for the others, so running them back to back would break the barrier
+        barrier = threading.Barrier(3, timeout=5)
+
+        def call():
+            barrier.wait()
+            return threading.get_ident()
+
+        idents = async_to_sync(gather_queries)(call, call, call)
+        self.assertEqual(len(set(idents)), 3)
+        self.assertNotIn(threading.get_ident(), idents)
@@ -19,7 +19,6 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
 from rest_framework import routers
-from rest_framework_simplejwt.views import TokenRefreshView
 
 from patients.views import PatientViewSet
 from doctors.views import DoctorViewSet, DepartmentViewSet, DoctorLevelViewSet, DoctorActiveStatusViewSet
@@ -27,11 +26,12 @@ from appointments.views import AppointmentViewSet
 from pharmacy.views import (
     MedicineViewSet,
     MedicineStockHistoryViewSet,
+    PrescriptionViewSet,
     TypeMedicineFunctionViewSet,
     TypeMedicineAdministrationViewSet
 )
-from metrics.views import OverviewMetrics
-from users.views import CustomTokenObtainPairView, UserRegistrationView
+from metrics.views import OverviewMetrics, OverviewCacheStats, DoctorWorkload, DepartmentStats, prometheus_metrics
+from users.views import CustomTokenObtainPairView, CustomTokenRefreshView, UserRegistrationView
 
 router = routers.DefaultRouter()
 router.register(r'patients', PatientViewSet)
@@ -42,6 +42,7 @@ router.register(r'doctor-statuses', DoctorActiveStatusViewSet)
 router.register(r'appointments', AppointmentViewSet)
 router.register(r'medicines', MedicineViewSet)
 router.register(r'medicine-stock', MedicineStockHistoryViewSet)
+router.register(r'prescriptions', PrescriptionViewSet, basename='prescription')
 router.register(r'medicine-types', TypeMedicineFunctionViewSet)
 router.register(r'medicine-admin-methods', TypeMedicineAdministrationViewSet)
 
@@ -52,11 +53,15 @@ def health(request):
 
 urlpatterns = [
     path('', health),
+    path('metrics', prometheus_metrics),
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api/metrics/overview/', OverviewMetrics.as_view()),
+    path('api/metrics/cache-stats/', OverviewCacheStats.as_view()),
+    path('api/metrics/doctor-workload/', DoctorWorkload.as_view()),
+    path('api/metrics/department-stats/', DepartmentStats.as_view()),
     path('api/auth/', include('rest_framework.urls')),
     path('api/auth/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/register/', UserRegistrationView.as_view(), name='user_register'),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# load the lookup tables before the first request instead of during it
+from config.reference import warm_reference_data  # noqa: E402
+
+warm_reference_data()
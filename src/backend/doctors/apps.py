@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DoctorsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "doctors"
+
+    def ready(self):
+        from config.reference import REFERENCE_DATA
+        from .models import Department, DoctorActiveStatus, DoctorLevel
+
+        REFERENCE_DATA.register(DoctorLevel, DoctorActiveStatus, Department)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="doctor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -77,6 +77,7 @@ class Doctor(models.Model):
         DoctorActiveStatus,
         on_delete=models.PROTECT
     )
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'Doctor'
@@ -100,8 +101,12 @@ class Doctor(models.Model):
     @property
     def is_available(self):
         """Check if doctor is available (Active or On-Demand status). Use status_name to avoid id ordering assumptions."""
-        try:
-            return self.active_status.status_name in ('On-Demand', 'Active')
-        except Exception:
-            return False
+        from config.reference import REFERENCE_DATA
+
+        # a status loaded with the doctor is used as is; otherwise the cached lookup table spares a query
+        if Doctor.active_status.is_cached(self):
+            status = self.active_status
+        else:
+            status = REFERENCE_DATA.get(DoctorActiveStatus, self.active_status_id)
+        return status is not None and status.status_name in ('On-Demand', 'Active')
 
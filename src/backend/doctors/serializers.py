@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from config.reference import ReferencePrimaryKeyRelatedField
 from .models import Doctor, Department, DoctorLevel, DoctorActiveStatus
 
 
@@ -29,20 +30,20 @@ class DoctorSerializer(serializers.ModelSerializer):
     doctor_level_title = serializers.CharField(source='doctor_level.title', read_only=True)
     active_status_name = serializers.CharField(source='active_status.status_name', read_only=True)
 
-    # Write fields for creation/update
-    department_id = serializers.PrimaryKeyRelatedField(
+    # Write fields for creation/update, validated against the cached lookup tables
+    department_id = ReferencePrimaryKeyRelatedField(
         queryset=Department.objects.all(),
         source='department',
         write_only=True,
         required=False
     )
-    doctor_level_id = serializers.PrimaryKeyRelatedField(
+    doctor_level_id = ReferencePrimaryKeyRelatedField(
         queryset=DoctorLevel.objects.all(),
         source='doctor_level',
         write_only=True,
         required=False
     )
-    active_status_id = serializers.PrimaryKeyRelatedField(
+    active_status_id = ReferencePrimaryKeyRelatedField(
         queryset=DoctorActiveStatus.objects.all(),
         source='active_status',
         write_only=True,
@@ -1,7 +1,10 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
-from doctors.models import DoctorLevel, DoctorActiveStatus
+from config.reference import REFERENCE_DATA, VERSION_KEY
+from doctors.models import Department, Doctor, DoctorLevel, DoctorActiveStatus
+from doctors.serializers import DoctorSerializer
 
 
 class DoctorsAPITest(TestCase):
@@ -23,3 +26,81 @@ class DoctorsAPITest(TestCase):
         self.assertEqual(resp2.status_code, 200)
         data2 = resp2.json()
         self.assertTrue(len(data2) >= 1)
+
+
+class ReferenceDataTest(TestCase):
+    def setUp(self):
+        REFERENCE_DATA.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(username='test', password='pass'))
+        self.level = DoctorLevel.objects.create(title='Junior')
+        self.status = DoctorActiveStatus.objects.create(status_name='Active')
+        self.department = Department.objects.create(department_name='General')
+        REFERENCE_DATA.warm()
+
+    def payload(self, **overrides):
+        return dict({
+            'first_name': 'Jane', 'dob': '1980-01-01', 'gender': 'Female', 'national_id': 'D1', 'expertise': 'General',
+            'department_id': self.department.id, 'doctor_level_id': self.level.id, 'active_status_id': self.status.id,
+        }, **overrides)
+
+    def test_doctor_payload_validates_against_cached_lookups(self):
+        serializer = DoctorSerializer(data=self.payload())
+        # only the national_id uniqueness check
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['doctor_level'].title, 'Junior')
+
+        serializer = DoctorSerializer(data=self.payload(doctor_level_id=999999, active_status_id='abc'))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['doctor_level_id'][0].code, 'does_not_exist')
+        self.assertEqual(serializer.errors['active_status_id'][0].code, 'incorrect_type')
+
+        # created elsewhere since the copy was loaded: found in the database, then cached
+        DoctorLevel.objects.bulk_create([DoctorLevel(title='Senior')])  # no signals
+        newer = DoctorLevel.objects.get(title='Senior')
+        self.assertTrue(DoctorSerializer(data=self.payload(doctor_level_id=newer.id)).is_valid())
+
+    def test_availability_reads_the_cached_status(self):
+        doctor = Doctor.objects.create(department=self.department, dob='1980-01-01', first_name='John', gender='Male', national_id='D2', expertise='General', doctor_level=self.level, active_status=self.status)
+        doctor = Doctor.objects.get(pk=doctor.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(doctor.is_available)
+
+    def test_writes_and_other_workers_invalidate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.level.title = 'Resident'
+            self.level.save()
+        self.assertEqual(REFERENCE_DATA.get(DoctorLevel, self.level.id).title, 'Resident')
+
+        # another worker's committed write moves the shared version; seen after the check interval
+        DoctorLevel.objects.filter(pk=self.level.pk).update(title='Attending')
+        cache.incr(VERSION_KEY.format(DoctorLevel._meta.label_lower))
+        self.assertEqual(REFERENCE_DATA.get(DoctorLevel, self.level.id).title, 'Resident')
+        with override_settings(REFERENCE_DATA_CHECK_INTERVAL=0):
+            self.assertEqual(REFERENCE_DATA.get(DoctorLevel, self.level.id).title, 'Attending')
+
+    def test_lookup_lists_answer_conditional_requests(self):
+        resp = self.client.get('/api/doctor-levels/')
+        etag = resp['ETag']
+        self.assertEqual(resp.json()['results'], [{'id': self.level.id, 'title': 'Junior'}])
+        with self.assertNumQueries(0):
+            resp = self.client.get('/api/doctor-levels/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((resp.status_code, resp['ETag']), (304, etag))
+
+        DoctorLevel.objects.create(title='Senior')
+        resp = self.client.get('/api/doctor-levels/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(resp.json()['count'], 2)
+
+    def test_doctor_list_etag_follows_lookup_tables(self):
+        Doctor.objects.create(department=self.department, dob='1980-01-01', first_name='John', gender='Male', national_id='D3', expertise='General', doctor_level=self.level, active_status=self.status)
+        etag = self.client.get('/api/doctors/')['ETag']
+        # the COUNT(*) and the page's ids; the lookup tables' part comes from the cached copies
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.department.department_name = 'Cardiology'
+        self.department.save()
+        resp = self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.json()['results'][0]['department_name'], 'Cardiology')
@@ -1,14 +1,17 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.response import Response
 from django.db.models.deletion import ProtectedError
+from config.conditional import ConditionalGetMixin
+from config.reference import ReferenceListMixin
 from .models import Doctor, Department, DoctorLevel, DoctorActiveStatus
 from .serializers import DoctorSerializer, DepartmentSerializer, DoctorLevelSerializer, DoctorActiveStatusSerializer
 
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Doctor.objects.select_related('department', 'doctor_level', 'active_status').all()
     serializer_class = DoctorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_reference = (Department, DoctorLevel, DoctorActiveStatus)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['first_name', 'last_name', 'expertise', 'department__department_name']
     ordering_fields = ['first_name', 'last_name']
@@ -24,19 +27,19 @@ class DoctorViewSet(viewsets.ModelViewSet):
             )
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ReferenceListMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class DoctorLevelViewSet(viewsets.ReadOnlyModelViewSet):
+class DoctorLevelViewSet(ReferenceListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = DoctorLevel.objects.all()
     serializer_class = DoctorLevelSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class DoctorActiveStatusViewSet(viewsets.ReadOnlyModelViewSet):
+class DoctorActiveStatusViewSet(ReferenceListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = DoctorActiveStatus.objects.all()
     serializer_class = DoctorActiveStatusSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class MetricsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'metrics'
-    verbose_name = 'Metrics'
\ No newline at end of file
+    verbose_name = 'Metrics'
+
+    def ready(self):
+        from config.instrumentation import install_query_counting
+        from . import signals  # noqa: F401
+
+        # before any connection opens, so every one counts statements and attributes them to
+        # sampled requests, whichever thread (e.g. an async view's executor) opens it
+        install_query_counting()
@@ -0,0 +1,145 @@
+import statistics
+import time as perf_time
+import tracemalloc
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+
+from appointments.models import Appointment
+from patients.models import Patient
+from pharmacy.models import MedicineStockHistory
+
+from .cache import invalidate_overview_metrics
+
+BENCHMARK_USER = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class QueryCounter:
+    """execute_wrapper counting statements; the test client's request_started resets connection.queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Scenario:
+    """One request against a hot endpoint; `before` runs untimed ahead of every request.
+
+    A `revalidate` scenario sends the ETag of an untimed first response as If-None-Match, so
+    it times the 304 a browser gets for a page that has not changed.
+    """
+
+    def __init__(self, name, path, method='get', data=None, before=None, revalidate=False):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.before = before
+        self.revalidate = revalidate
+        self.headers = {}
+
+    def prepare(self, client):
+        if self.before:
+            self.before()
+        if self.revalidate and not self.headers:
+            self.headers = {'HTTP_IF_NONE_MATCH': self.send(client)['ETag']}
+
+    def send(self, client, **headers):
+        send = getattr(client, self.method)
+        return send(self.path, self.data, format='json', **headers) if self.data else send(self.path, **headers)
+
+    def request(self, client):
+        response = self.send(client, **self.headers)
+        if response.status_code >= 400 or (self.revalidate and response.status_code != 304):
+            raise RuntimeError(f'{self.name}: {self.method.upper()} {self.path} returned {response.status_code}')
+        return response
+
+
+def hot_endpoints():
+    """Scenarios for the endpoints on the reception and dashboard paths, keyed to the seeded rows"""
+    user_model = get_user_model()
+    if not user_model.objects.filter(username=BENCHMARK_USER).exists():
+        user_model.objects.create_user(username=BENCHMARK_USER, password=BENCHMARK_PASSWORD)
+    patient = Patient.objects.exclude(phone__isnull=True).exclude(phone='').order_by('pk').first()
+    busiest = (
+        Appointment.objects.values('patient_id').annotate(n=Count('id')).order_by('-n', 'patient_id').first()
+    )
+    medicine = (
+        MedicineStockHistory.objects.values('medicine_id').annotate(n=Count('id')).order_by('-n', 'medicine_id').first()
+    )
+    return [
+        Scenario('patients_list', '/api/patients/'),
+        Scenario('patients_list_not_modified', '/api/patients/', revalidate=True),
+        Scenario('patients_search_phone', '/api/patients/search/?' + urlencode({'q': patient.phone[:6]})),
+        Scenario('patients_search_name', '/api/patients/search/?' + urlencode({'q': f'{patient.first_name} {patient.last_name[:2]}'})),
+        Scenario('appointments_list', '/api/appointments/'),
+        Scenario('appointments_by_patient', f'/api/appointments/?patient={busiest["patient_id"]}'),
+        # every request recomputes: a cache hit would only measure the cache
+        Scenario('metrics_overview', '/api/metrics/overview/', before=invalidate_overview_metrics),
+        Scenario('stock_history', f'/api/medicine-stock/?medicine={medicine["medicine_id"]}'),
+        Scenario('token_obtain', '/api/auth/token/', method='post',
+                 data={'username': BENCHMARK_USER, 'password': BENCHMARK_PASSWORD}),
+    ]
+
+
+def measure(client, scenario, iterations):
+    """{p50_ms, p95_ms, queries, peak_kib} for `iterations` requests after one warm-up.
+
+    Peak Python memory comes from one extra traced request, since tracing slows the timed ones.
+    """
+    timings = []
+    queries = 0
+    for iteration in range(iterations + 1):
+        scenario.prepare(client)
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = perf_time.perf_counter()
+            scenario.request(client)
+            elapsed = (perf_time.perf_counter() - start) * 1000
+        if iteration:
+            timings.append(elapsed)
+            queries = max(queries, counter.count)
+
+    scenario.prepare(client)
+    tracemalloc.start()
+    try:
+        scenario.request(client)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0], 2),
+        'queries': queries,
+        'peak_kib': round(peak / 1024),
+    }
+
+
+def compare(results, baseline, latency_tolerance=0.3, memory_tolerance=0.5, noise_ms=1.0):
+    """Regressions of results against baseline results, as readable strings.
+
+    Query counts are deterministic and may not grow at all. Latency may grow by
+    `latency_tolerance` (a fraction) plus `noise_ms`; peak memory by `memory_tolerance`.
+    Scenarios missing from the baseline are not compared.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f'{name}: {current["queries"]} queries, baseline {base["queries"]}')
+        for key in ('p50_ms', 'p95_ms'):
+            limit = base[key] * (1 + latency_tolerance) + noise_ms
+            if current[key] > limit:
+                regressions.append(f'{name}: {key} {current[key]:.1f}, baseline {base[key]:.1f} (limit {limit:.1f})')
+        limit = base['peak_kib'] * (1 + memory_tolerance)
+        if current['peak_kib'] > limit:
+            regressions.append(f'{name}: peak {current["peak_kib"]} KiB, baseline {base["peak_kib"]} KiB (limit {limit:.0f})')
+    return regressions
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .overview import acompute_overview_metrics, compute_overview_metrics
+
+GENERATION_KEY = 'metrics:overview:generation'
+LOCK_KEY = 'metrics:overview:lock:{}'
+STATS_KEY = 'metrics:overview:stats:{}'
+STAT_NAMES = ('hits', 'misses', 'invalidations')
+
+
+def _bump(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # missing or evicted counter; add() keeps a concurrent first increment
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def _abump(name):
+    key = STATS_KEY.format(name)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def _overview_key(generation, threshold, today):
+    today = today or timezone.localdate()
+    return f'metrics:overview:v{generation}:{today.isoformat()}:{threshold}'
+
+
+def overview_cache_key(threshold, today=None):
+    """Cache key for one threshold, scoped to today and the current invalidation generation"""
+    return _overview_key(cache.get_or_set(GENERATION_KEY, time.time_ns, timeout=None), threshold, today)
+
+
+def get_overview_metrics(threshold=10):
+    """Return (payload, cache_hit) for the dashboard overview.
+
+    On a miss only one caller recomputes; concurrent callers wait up to
+    METRICS_CACHE_LOCK_WAIT seconds for its result before computing themselves.
+    """
+    key = overview_cache_key(threshold)
+    data = cache.get(key)
+    if data is not None:
+        _bump('hits')
+        return data, True
+
+    _bump('misses')
+    lock_key = LOCK_KEY.format(key)
+    acquired = cache.add(lock_key, 1, timeout=settings.METRICS_CACHE_LOCK_WAIT)
+    if not acquired:
+        deadline = time.monotonic() + settings.METRICS_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            data = cache.get(key)
+            if data is not None:
+                return data, False
+    try:
+        data = compute_overview_metrics(threshold)
+        cache.set(key, data, timeout=settings.METRICS_CACHE_TTL)
+    finally:
+        # a caller that gave up waiting must not release the lock of the one still computing
+        if acquired:
+            cache.delete(lock_key)
+    return data, False
+
+
+async def aget_overview_metrics(threshold=10):
+    """get_overview_metrics() for async views: waits without blocking a thread, and a
+    miss runs its aggregate queries concurrently"""
+    key = _overview_key(await cache.aget_or_set(GENERATION_KEY, time.time_ns, timeout=None), threshold, None)
+    data = await cache.aget(key)
+    if data is not None:
+        await _abump('hits')
+        return data, True
+
+    await _abump('misses')
+    lock_key = LOCK_KEY.format(key)
+    acquired = await cache.aadd(lock_key, 1, timeout=settings.METRICS_CACHE_LOCK_WAIT)
+    if not acquired:
+        deadline = time.monotonic() + settings.METRICS_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            data = await cache.aget(key)
+            if data is not None:
+                return data, False
+    try:
+        data = await acompute_overview_metrics(threshold)
+        await cache.aset(key, data, timeout=settings.METRICS_CACHE_TTL)
+    finally:
+        if acquired:
+            await cache.adelete(lock_key)
+    return data, False
+
+
+def invalidate_overview_metrics():
+    """Retire every cached overview payload by moving to a new key generation"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # an evicted generation must not restart at a value whose keys may still be cached
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+    _bump('invalidations')
+
+
+def overview_cache_stats():
+    stats = {name: cache.get(STATS_KEY.format(name), 0) for name in STAT_NAMES}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+    stats['ttl'] = settings.METRICS_CACHE_TTL
+    return stats
@@ -0,0 +1,163 @@
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+from django.utils import timezone
+
+from config.asyncviews import gather_queries
+from config.instrumentation import AUTH_TIMINGS, DATABASE, DURATION_BUCKETS_MS, REGISTRY
+from users.blacklist import blacklist_stats
+
+from .cache import overview_cache_stats
+from .models import DailyAppointmentStat, DailyPatientVisit
+from .overview import low_stock_alerts, pending_appointments
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROCESS_START = time.time()
+LOW_STOCK_THRESHOLD = 10
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class Exposition:
+    """Prometheus text format (version 0.0.4) writer"""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name, value, **labels):
+        self.lines.append(f'{name}{_labels(**labels)} {value}')
+
+    def histogram(self, name, buckets, count, sum_seconds, **labels):
+        for bound, cumulative in zip(DURATION_BUCKETS_MS, buckets):
+            self.sample(f'{name}_bucket', cumulative, **labels, le=f'{bound / 1000:g}')
+        self.sample(f'{name}_bucket', count, **labels, le='+Inf')
+        self.sample(f'{name}_sum', round(sum_seconds, 6), **labels)
+        self.sample(f'{name}_count', count, **labels)
+
+    def text(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def request_metrics(out):
+    series = sorted(REGISTRY.snapshot().items())
+    counters = (
+        ('hms_http_requests_total', 'requests', 'Requests handled by this process.'),
+        ('hms_http_response_bytes_total', 'response_bytes', 'Bytes of non-streaming response bodies.'),
+        ('hms_http_sampled_requests_total', 'sampled', 'Requests sampled for query and serializer measurement.'),
+        ('hms_http_sampled_queries_total', 'queries', 'Queries run by sampled requests.'),
+        ('hms_http_sampled_duplicate_queries_total', 'duplicate_queries',
+         'Queries of sampled requests repeating an earlier statement (N+1 signal).'),
+        ('hms_http_sampled_db_seconds_total', 'db_ms', 'Database time of sampled requests.'),
+        ('hms_http_sampled_serializer_seconds_total', 'serializer_ms', 'Serializer time of sampled requests.'),
+    )
+    for name, key, help_text in counters:
+        out.family(name, 'counter', help_text)
+        for (view, method, status), values in series:
+            value = round(values[key] / 1000, 6) if key.endswith('_ms') else values[key]
+            out.sample(name, value, view=view, method=method, status=status)
+
+    out.family('hms_http_request_duration_seconds', 'histogram', 'Request latency per view.')
+    for (view, method, status), values in series:
+        out.histogram('hms_http_request_duration_seconds', values['buckets'], values['requests'],
+                      values['duration_ms'] / 1000, view=view, method=method, status=status)
+
+
+def internals(out):
+    database = DATABASE.snapshot()
+    out.family('hms_db_connections_opened_total', 'counter', 'Database connections opened by this process.')
+    for alias, count in sorted(database['connections'].items()):
+        out.sample('hms_db_connections_opened_total', count, alias=alias)
+    out.family('hms_db_queries_total', 'counter', 'Statements executed by this process.')
+    for alias, count in sorted(database['queries'].items()):
+        out.sample('hms_db_queries_total', count, alias=alias)
+
+    out.family('hms_auth_duration_seconds', 'histogram', 'JWT authentication time by outcome.')
+    for (outcome,), values in sorted(AUTH_TIMINGS.snapshot().items()):
+        out.histogram('hms_auth_duration_seconds', values['buckets'], values['count'],
+                      values['sum_ms'] / 1000, outcome=outcome)
+
+    # shared through the cache, so these cover every worker
+    stats = overview_cache_stats()
+    for name in ('hits', 'misses', 'invalidations'):
+        out.family(f'hms_overview_cache_{name}_total', 'counter', f'Overview metrics cache {name}.')
+        out.sample(f'hms_overview_cache_{name}_total', stats[name])
+    if stats['hit_ratio'] is not None:
+        out.family('hms_overview_cache_hit_ratio', 'gauge', 'Overview metrics cache hits per lookup.')
+        out.sample('hms_overview_cache_hit_ratio', float(stats['hit_ratio']))
+
+    # one row stored by the last prune_token_blacklist run: counting these tables on every scrape is a scan
+    tokens = blacklist_stats()
+    if tokens:
+        for name, key, help_text in (
+            ('hms_token_outstanding_rows', 'outstanding', 'Outstanding refresh tokens after the last prune.'),
+            ('hms_token_blacklisted_rows', 'blacklisted', 'Blacklisted refresh tokens after the last prune.'),
+            ('hms_token_pruned_last_run', 'pruned', 'Expired outstanding tokens deleted by the last prune.'),
+            ('hms_token_prune_timestamp_seconds', 'at', 'When the last prune finished.'),
+        ):
+            out.family(name, 'gauge', help_text)
+            out.sample(name, round(tokens[key], 3) if key == 'at' else tokens[key])
+
+    out.family('hms_process_start_time_seconds', 'gauge', 'Start of this worker; counters above are per process.')
+    out.sample('hms_process_start_time_seconds', round(PROCESS_START, 3), pid=os.getpid())
+
+
+def _domain_gauges(today):
+    """(name, help, query, labels) per gauge, read from the rollup and balance tables only,
+    never from appointments or stock history"""
+    return (
+        ('hms_appointments_today', 'Appointments booked for today.',
+         lambda: DailyAppointmentStat.objects.filter(day=today).aggregate(total=Sum('appointment_count'))['total'] or 0,
+         {}),
+        ('hms_patients_today', 'Distinct patients with an appointment today.',
+         DailyPatientVisit.objects.filter(day=today).count, {}),
+        ('hms_pending_appointments', 'Appointments booked from the start of today onwards.',
+         lambda: pending_appointments(today), {}),
+        ('hms_low_stock_medicines', 'Medicines at or below the low stock threshold.',
+         lambda: low_stock_alerts(LOW_STOCK_THRESHOLD), {'threshold': LOW_STOCK_THRESHOLD}),
+    )
+
+
+def _write_gauges(out, gauges, values):
+    for (name, help_text, _, labels), value in zip(gauges, values):
+        out.family(name, 'gauge', help_text)
+        out.sample(name, value, **labels)
+
+
+def domain_gauges(out):
+    gauges = _domain_gauges(timezone.localdate())
+    _write_gauges(out, gauges, [query() for _, _, query, _ in gauges])
+
+
+async def adomain_gauges(out):
+    gauges = _domain_gauges(timezone.localdate())
+    _write_gauges(out, gauges, await gather_queries(*(query for _, _, query, _ in gauges)))
+
+
+def render_metrics():
+    out = Exposition()
+    request_metrics(out)
+    internals(out)
+    domain_gauges(out)
+    return out.text()
+
+
+async def arender_metrics():
+    out = Exposition()
+    request_metrics(out)
+    await sync_to_async(internals)(out)  # shared cache and token stats reads
+    await adomain_gauges(out)
+    return out.text()
@@ -3,6 +3,8 @@ from django.conf import settings
 from django.db import connection
 from pathlib import Path
 
+from config.sqlscript import split_sql_statements
+
 
 class Command(BaseCommand):
     help = 'Apply SQL files under src/sql (views, procedures, triggers) that are not covered by migrations.'
@@ -32,7 +34,7 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.NOTICE(f'Applying SQL from: {target}'))
         sql_text = target.read_text()
-        statements = [s.strip() for s in sql_text.split(';') if s.strip()]
+        statements = split_sql_statements(sql_text)
         with connection.cursor() as cursor:
             for stmt in statements:
                 try:
@@ -0,0 +1,119 @@
+import statistics
+import threading
+import time as perf_time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from config.dbpool import PooledDatabaseWrapperMixin, close_pools
+
+# the handshake the connection modes differ by is the shipped backend's
+SHIPPED_ENGINE = 'config.backends.mysql'
+
+
+class Command(BaseCommand):
+    help = ('Compare per-request latency with a new database connection per request, persistent '
+            'connections (CONN_MAX_AGE) and the connection pool, on a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per thread and mode.')
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--path', default='/api/medicines/',
+                            help='A cheap endpoint that still queries the database, so connection set-up '
+                                 'dominates the difference. Lookup tables such as /api/doctor-levels/ are '
+                                 'served from the per-worker copy without a connection.')
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--any-backend', action='store_true',
+                            help=f'Run on a database engine other than {SHIPPED_ENGINE}. Its connection '
+                                 f'set-up costs differ, so the figures do not describe the shipped setup.')
+
+    def handle(self, *args, **options):
+        engine = connection.settings_dict['ENGINE']
+        if engine != SHIPPED_ENGINE and not options['any_backend']:
+            raise CommandError(
+                f'The default database uses {engine}, not {SHIPPED_ENGINE}; run against MySQL, '
+                f'or pass --any-backend for figures that only compare the modes on {connection.vendor}.'
+            )
+        self.stdout.write(f'Engine {engine} ({connection.vendor})')
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        self.stdout.write(f'Using test database {test_name}')
+        modes = [
+            ('per-request', {'CONN_MAX_AGE': 0, 'POOL_SIZE': 0}),
+            ('persistent', {'CONN_MAX_AGE': 60, 'POOL_SIZE': 0}),
+        ]
+        if isinstance(connections[DEFAULT_DB_ALIAS], PooledDatabaseWrapperMixin):
+            modes.append(('pooled', {'CONN_MAX_AGE': 0, 'POOL_SIZE': options['pool_size']}))
+        else:
+            self.stdout.write(f'{connection.vendor} runs without the pooled backend; skipping the pooled mode')
+
+        # every thread's connection shares this dict, so the overrides reach all of them
+        settings_dict = connection.settings_dict
+        try:
+            self.stdout.write(f'{"mode":<12} {"requests":>9} {"opened":>7} {"mean ms":>8} {"p50 ms":>7} {"p95 ms":>7}')
+            for label, overrides in modes:
+                original = {key: settings_dict.get(key) for key in overrides}
+                connections.close_all()
+                settings_dict.update(overrides)
+                try:
+                    timings, opened = self.run(options)
+                finally:
+                    connections.close_all()
+                    close_pools()
+                    settings_dict.update(original)
+                self.stdout.write(
+                    f'{label:<12} {len(timings):>9} {opened:>7} {statistics.fmean(timings):>8.2f} '
+                    f'{statistics.median(timings):>7.2f} {statistics.quantiles(timings, n=20)[-1]:>7.2f}'
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+    def run(self, options):
+        timings = []
+        opened = []
+
+        def count(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        def handshakes():
+            # the pool hands out connections through connect() too, so count what it opened
+            pool = getattr(connections[DEFAULT_DB_ALIAS], 'pool', None)
+            return pool.stats['opened'] if pool else len(opened)
+
+        def worker():
+            client = APIClient()
+            client.force_authenticate(user=get_user_model()(username='benchmark'))
+            samples = []
+            for _ in range(options['requests']):
+                # the test client skips the request_started/finished connection handling
+                # a WSGI server triggers, so do it here
+                start = perf_time.perf_counter()
+                close_old_connections()
+                response = client.get(options['path'])
+                close_old_connections()
+                samples.append((perf_time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{options["path"]} returned {response.status_code}')
+            timings.extend(samples)
+            connections.close_all()
+
+        connection_created.connect(count)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                worker()  # warm up imports and the URL resolver
+                timings.clear()
+                before = handshakes()
+                threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            connection_created.disconnect(count)
+        return timings, handshakes() - before
@@ -0,0 +1,76 @@
+import time as perf_time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from metrics.benchmarks import QueryCounter
+
+from .benchmark_overview import Command as OverviewBenchmark
+
+
+def read_pages(client, url):
+    """Follow `next` links through the paged list API; returns the number of rows read"""
+    rows = 0
+    while url:
+        body = client.get(url).json()
+        rows += len(body['results'])
+        url = body['next']
+    return rows
+
+
+def read_stream(client, url):
+    """Consume a streamed export without keeping it; returns the number of data lines read"""
+    response = client.get(url)
+    lines = sum(chunk.count(b'\n') for chunk in response.streaming_content)
+    response.close()
+    return lines - url.endswith('csv')  # the CSV header line
+
+
+class Command(OverviewBenchmark):
+    help = ('Benchmark reading every appointment through the paged list API against the '
+            'streaming CSV/NDJSON export on a seeded throwaway test database.')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        # every page of the list API is read, so seed less than the overview benchmark
+        parser.set_defaults(appointments=200_000)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        self.describe_database(test_name)
+        try:
+            self.seed(options)
+            client = APIClient()
+            client.force_authenticate(user=get_user_model()(username='benchmark'))
+            readers = (
+                ('pages', read_pages, '/api/appointments/'),
+                ('cursor', read_pages, '/api/appointments/?pagination=cursor'),
+                ('csv', read_stream, '/api/appointments/export/?format=csv'),
+                ('ndjson', read_stream, '/api/appointments/export/?format=ndjson'),
+            )
+            self.stdout.write(
+                f'{"reader":<8} {"rows":>9} {"queries":>8} {"seconds":>8} {"rows/s":>9} {"peak MiB":>9}'
+            )
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for label, read, url in readers:
+                    queries = QueryCounter()
+                    with connection.execute_wrapper(queries):
+                        start = perf_time.perf_counter()
+                        rows = read(client, url)
+                        seconds = perf_time.perf_counter() - start
+                    # a second pass under tracemalloc, which would skew the timing above
+                    tracemalloc.start()
+                    read(client, url)
+                    peak = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f'{label:<8} {rows:>9} {queries.count:>8} {seconds:>8.2f} '
+                        f'{rows / seconds:>9.0f} {peak:>9.1f}'
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
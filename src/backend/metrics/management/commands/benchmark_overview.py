@@ -0,0 +1,130 @@
+import statistics
+import time as perf_time
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum, Case, When, IntegerField, F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from metrics.overview import compute_overview_metrics
+from metrics.rollup import rebuild_appointment_rollups
+from metrics.synthetic import SyntheticHospital
+from pharmacy.models import MedicineStockHistory
+
+
+def legacy_overview_metrics(threshold=10):
+    """The previous OverviewMetrics implementation, kept as the benchmark baseline"""
+    today = timezone.localdate()
+
+    def day_range(d):
+        return (timezone.make_aware(datetime.combine(d, time.min)),
+                timezone.make_aware(datetime.combine(d, time.max)))
+
+    total_patients_today = (
+        Appointment.objects.filter(visit_date__range=day_range(today)).values('patient').distinct().count()
+    )
+    pending_appointments = Appointment.objects.filter(visit_date__gte=day_range(today)[0]).count()
+    doctors_on_duty = Doctor.objects.filter(active_status__status_name__in=['Active', 'On-Demand']).count()
+
+    stock_qs = MedicineStockHistory.objects.values('medicine').annotate(
+        current_stock=Sum(
+            Case(
+                When(add_remove=True, then=F('amount')),
+                When(add_remove=False, then=F('amount') * -1),
+                output_field=IntegerField(),
+            )
+        )
+    )
+    low_stock_alerts = sum(1 for s in stock_qs if (s['current_stock'] or 0) <= threshold)
+
+    weekly = []
+    for i in range(6, -1, -1):
+        d = today - timedelta(days=i)
+        cnt = Appointment.objects.filter(visit_date__range=day_range(d)).values('patient').distinct().count()
+        weekly.append({'name': d.strftime('%a'), 'date': d.isoformat(), 'patients': cnt})
+
+    top_conditions = (
+        Appointment.objects.exclude(diagnosis__isnull=True).exclude(diagnosis__exact='')
+        .values('diagnosis').annotate(count=Count('id')).order_by('-count')[:5]
+    )
+    return {
+        'total_patients_today': total_patients_today,
+        'pending_appointments': pending_appointments,
+        'doctors_on_duty': doctors_on_duty,
+        'low_stock_alerts': low_stock_alerts,
+        'weekly_patient_counts': weekly,
+        'top_conditions': [{'name': t['diagnosis'], 'count': t['count']} for t in top_conditions],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the overview metrics queries against the previous implementation '
+            'on a seeded throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--appointments', type=int, default=1_000_000)
+        parser.add_argument('--patients', type=int, default=50_000)
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--medicines', type=int, default=500)
+        parser.add_argument('--stock-movements', type=int, default=100_000)
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database (and its seeded rows) for the next run.')
+
+    def describe_database(self, test_name):
+        self.stdout.write(f'Using test database {test_name} on {connection.vendor}')
+        if connection.vendor != 'mysql':
+            self.stdout.write(self.style.WARNING(
+                'The application runs on MySQL; plans and timings on another database do not describe it.'
+            ))
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        self.describe_database(test_name)
+        try:
+            self.seed(options)
+            self.stdout.write(f'{"implementation":<10} {"queries":>8} {"median ms":>10} {"min ms":>8} {"max ms":>8}')
+            for label, fn in (('legacy', legacy_overview_metrics), ('current', compute_overview_metrics)):
+                queries, timings = self.measure(fn, options['iterations'])
+                self.stdout.write(
+                    f'{label:<10} {queries:>8} {statistics.median(timings):>10.1f} '
+                    f'{min(timings):>8.1f} {max(timings):>8.1f}'
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+    def measure(self, fn, iterations):
+        fn()  # warm up caches and connections
+        timings = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = perf_time.perf_counter()
+                fn()
+                timings.append((perf_time.perf_counter() - start) * 1000)
+        return len(ctx.captured_queries), timings
+
+    def seed(self, options):
+        existing = Appointment.objects.count()
+        if existing >= options['appointments']:
+            self.stdout.write(f'Reusing {existing} seeded appointments')
+            return
+
+        first_run = not Doctor.objects.exists()
+        hospital = SyntheticHospital(seed=options['seed'], batch_size=options['batch_size'], log=self.stdout.write)
+        hospital.generate(
+            doctors=options['doctors'] if first_run else 0,
+            patients=options['patients'] if first_run else 0,
+            medicines=options['medicines'] if first_run else 0,
+            appointments=options['appointments'] - existing,
+            stock_movements=options['stock_movements'] if first_run else 0,
+        )
+        # bulk inserts skip the rollup signals, so rebuild them like a bulk import would
+        rebuild_appointment_rollups(batch_size=options['batch_size'])
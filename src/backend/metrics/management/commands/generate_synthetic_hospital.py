@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from metrics.cache import invalidate_overview_metrics
+from metrics.rollup import rebuild_appointment_rollups
+from metrics.synthetic import SyntheticHospital
+from patients.identifiers import rebuild_patient_identifiers
+
+
+class Command(BaseCommand):
+    help = ('Add deterministic, realistically skewed synthetic doctors, patients, medicines, '
+            'appointments and stock movements with bulk inserts, e.g. --patients 2000000 '
+            '--appointments 10000000 --stock-movements 5000000 for production-scale tests.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--patients', type=int, default=20_000)
+        parser.add_argument('--medicines', type=int, default=300)
+        parser.add_argument('--appointments', type=int, default=200_000)
+        parser.add_argument('--stock-movements', type=int, default=100_000)
+        parser.add_argument('--years', type=float, default=3,
+                            help='History before --today that appointments are spread over.')
+        parser.add_argument('--today', type=date.fromisoformat,
+                            help='Anchor date (YYYY-MM-DD); fix it to regenerate identical rows later.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Skip rebuilding patient identifiers and appointment rollups.')
+
+    def handle(self, *args, **options):
+        hospital = SyntheticHospital(
+            seed=options['seed'], today=options['today'], years=options['years'],
+            batch_size=options['batch_size'], log=self.stdout.write,
+        )
+        try:
+            hospital.generate(
+                doctors=options['doctors'],
+                patients=options['patients'],
+                medicines=options['medicines'],
+                appointments=options['appointments'],
+                stock_movements=options['stock_movements'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not options['no_rebuild']:
+            # bulk inserts skip the signals that maintain these
+            rebuild_patient_identifiers(batch_size=options['batch_size'])
+            try:
+                rebuild_appointment_rollups(batch_size=options['batch_size'])
+            except RuntimeError as e:
+                self.stdout.write(self.style.WARNING(f'{e} Then run manage.py rebuild_appointment_rollups.'))
+        invalidate_overview_metrics()
+        self.stdout.write(self.style.SUCCESS('Generated synthetic hospital data.'))
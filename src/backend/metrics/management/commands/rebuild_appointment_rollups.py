@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from metrics.rollup import rebuild_appointment_rollups
+
+
+class Command(BaseCommand):
+    help = ('Recompute the daily appointment rollups (DailyAppointmentStat, DailyDiagnosisStat, '
+            'DailyPatientVisit) from Appointments.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            written = rebuild_appointment_rollups(batch_size=options['batch_size'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        for table, rows in written.items():
+            self.stdout.write(f'{table}: {rows} row(s)')
+        self.stdout.write(self.style.SUCCESS('Rebuilt appointment rollups.'))
@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from metrics.benchmarks import compare, hot_endpoints, measure
+
+from .benchmark_overview import Command as OverviewBenchmark
+
+DATASET_OPTIONS = ('doctors', 'patients', 'medicines', 'appointments', 'stock_movements', 'seed')
+
+
+class Command(OverviewBenchmark):
+    help = ('Drive the hot API endpoints in-process on a seeded throwaway test database, record '
+            'p50/p95 latency, query count and peak memory, and fail on regressions against a baseline.')
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(appointments=200_000, patients=20_000, iterations=20)
+        parser.add_argument('--baseline', type=Path, default=Path(settings.BASE_DIR) / 'metrics' / 'benchmark_baseline.json',
+                            help='Baseline JSON, keyed by database vendor.')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Store this run as the baseline for the current database vendor instead of comparing.')
+        parser.add_argument('--latency-tolerance', type=float, default=0.3,
+                            help='Allowed p50/p95 growth as a fraction of the baseline (plus 1 ms of noise).')
+        parser.add_argument('--memory-tolerance', type=float, default=0.5,
+                            help='Allowed peak memory growth as a fraction of the baseline.')
+        parser.add_argument('--only', action='append', metavar='SCENARIO',
+                            help='Run only this scenario; repeatable.')
+
+    def handle(self, *args, **options):
+        dataset = {key: options[key] for key in DATASET_OPTIONS}
+        stored = json.loads(options['baseline'].read_text()) if options['baseline'].exists() else {}
+        baseline = stored.get(connection.vendor)
+        if baseline is None and not options['update_baseline']:
+            # checked before seeding: without a baseline the run could not fail on a regression
+            raise CommandError(
+                f'No {connection.vendor} baseline in {options["baseline"]}; record one on the machine '
+                f'that runs the check with --update-baseline.'
+            )
+        if baseline and not options['update_baseline'] and baseline['dataset'] != dataset:
+            raise CommandError(
+                f'The {connection.vendor} baseline was recorded with {baseline["dataset"]}; rerun with '
+                f'the same options or record a new baseline with --update-baseline.'
+            )
+
+        old_name = connection.settings_dict['NAME']
+        keepdb = options['keepdb']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        self.stdout.write(f'Using test database {test_name}')
+        try:
+            self.seed(options)
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+        if options['update_baseline']:
+            stored[connection.vendor] = {'dataset': dataset, 'results': results}
+            options['baseline'].write_text(json.dumps(stored, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Stored the {connection.vendor} baseline in {options["baseline"]}'))
+            return
+        regressions = compare(results, baseline['results'], options['latency_tolerance'], options['memory_tolerance'])
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against the {connection.vendor} baseline.'))
+
+    def run(self, options):
+        scenarios = hot_endpoints()
+        if options['only']:
+            unknown = set(options['only']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['only']]
+
+        client = APIClient()
+        client.force_authenticate(user=get_user_model()(username='benchmark'))
+        results = {}
+        self.stdout.write(f'{"scenario":<24} {"p50 ms":>8} {"p95 ms":>8} {"queries":>8} {"peak KiB":>9}')
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for scenario in scenarios:
+                result = results[scenario.name] = measure(client, scenario, options['iterations'])
+                self.stdout.write(
+                    f'{scenario.name:<24} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                    f'{result["queries"]:>8} {result["peak_kib"]:>9}'
+                )
+        return results
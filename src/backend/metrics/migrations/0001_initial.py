@@ -0,0 +1,162 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import TruncDate
+
+
+def populate_rollups(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    DailyAppointmentStat = apps.get_model("metrics", "DailyAppointmentStat")
+    DailyDiagnosisStat = apps.get_model("metrics", "DailyDiagnosisStat")
+    DailyPatientVisit = apps.get_model("metrics", "DailyPatientVisit")
+    appointments = Appointment.objects.annotate(day=TruncDate("visit_date")).order_by()
+
+    DailyAppointmentStat.objects.bulk_create(
+        [
+            DailyAppointmentStat(
+                day=row["day"], doctor_id=row["doctor_id"], appointment_count=row["n"]
+            )
+            for row in appointments.values("day", "doctor_id").annotate(
+                n=models.Count("id")
+            )
+        ],
+        batch_size=1000,
+    )
+    DailyDiagnosisStat.objects.bulk_create(
+        [
+            DailyDiagnosisStat(
+                day=row["day"], diagnosis=row["diagnosis"], appointment_count=row["n"]
+            )
+            for row in appointments.exclude(diagnosis__isnull=True)
+            .exclude(diagnosis__exact="")
+            .values("day", "diagnosis")
+            .annotate(n=models.Count("id"))
+        ],
+        batch_size=1000,
+    )
+    DailyPatientVisit.objects.bulk_create(
+        [
+            DailyPatientVisit(
+                day=row["day"], patient_id=row["patient_id"], appointment_count=row["n"]
+            )
+            for row in appointments.values("day", "patient_id").annotate(
+                n=models.Count("id")
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("appointments", "0001_initial"),
+        ("patients", "0001_initial"),
+        ("doctors", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAppointmentStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("appointment_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Daily Appointment Stat",
+                "verbose_name_plural": "Daily Appointment Stats",
+                "db_table": "DailyAppointmentStat",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyDiagnosisStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("diagnosis", models.CharField(max_length=255)),
+                ("appointment_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Daily Diagnosis Stat",
+                "verbose_name_plural": "Daily Diagnosis Stats",
+                "db_table": "DailyDiagnosisStat",
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyPatientVisit",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("appointment_count", models.PositiveIntegerField(default=0)),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_visits",
+                        to="patients.patient",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Patient Visit",
+                "verbose_name_plural": "Daily Patient Visits",
+                "db_table": "DailyPatientVisit",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailydiagnosisstat",
+            constraint=models.UniqueConstraint(
+                fields=("day", "diagnosis"), name="uniq_daily_diagnosis_stat"
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailyappointmentstat",
+            name="doctor",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="daily_appointment_stats",
+                to="doctors.doctor",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailypatientvisit",
+            constraint=models.UniqueConstraint(
+                fields=("day", "patient"), name="uniq_daily_patient_visit"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyappointmentstat",
+            constraint=models.UniqueConstraint(
+                fields=("day", "doctor"), name="uniq_daily_appointment_stat"
+            ),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+from django.db import models
+
+
+class DailyAppointmentStat(models.Model):
+    """Appointments per doctor per local calendar day"""
+    day = models.DateField()
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        related_name='daily_appointment_stats'
+    )
+    appointment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'DailyAppointmentStat'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'doctor'], name='uniq_daily_appointment_stat'),
+        ]
+        verbose_name = 'Daily Appointment Stat'
+        verbose_name_plural = 'Daily Appointment Stats'
+
+    def __str__(self):
+        return f"{self.day} doctor {self.doctor_id}: {self.appointment_count}"
+
+
+class DailyDiagnosisStat(models.Model):
+    """Appointments per diagnosis per local calendar day (blank diagnoses are not counted)"""
+    day = models.DateField()
+    diagnosis = models.CharField(max_length=255)
+    appointment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'DailyDiagnosisStat'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'diagnosis'], name='uniq_daily_diagnosis_stat'),
+        ]
+        verbose_name = 'Daily Diagnosis Stat'
+        verbose_name_plural = 'Daily Diagnosis Stats'
+
+    def __str__(self):
+        return f"{self.day} {self.diagnosis}: {self.appointment_count}"
+
+
+class DailyPatientVisit(models.Model):
+    """One row per patient seen on a day; counting rows gives distinct patients per day"""
+    day = models.DateField()
+    patient = models.ForeignKey(
+        'patients.Patient',
+        on_delete=models.CASCADE,
+        related_name='daily_visits'
+    )
+    appointment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'DailyPatientVisit'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'patient'], name='uniq_daily_patient_visit'),
+        ]
+        verbose_name = 'Daily Patient Visit'
+        verbose_name_plural = 'Daily Patient Visits'
+
+    def __str__(self):
+        return f"{self.day} patient {self.patient_id}: {self.appointment_count}"
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from functools import partial
+
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from doctors.models import Department, Doctor
+from pharmacy.models import MedicineStockBalance
+
+from config.asyncviews import gather_queries
+
+from .models import DailyAppointmentStat, DailyDiagnosisStat, DailyPatientVisit
+
+
+def pending_appointments(today):
+    """Appointments booked from the start of today onwards"""
+    return DailyAppointmentStat.objects.filter(day__gte=today).aggregate(
+        total=Sum('appointment_count')
+    )['total'] or 0
+
+
+def weekly_patient_counts(today, days=7):
+    """Distinct patients per day for the last `days` days, read from DailyPatientVisit"""
+    first_day = today - timedelta(days=days - 1)
+    counts = dict(
+        DailyPatientVisit.objects.filter(day__range=(first_day, today))
+        .values('day')
+        .annotate(patients=Count('id'))
+        .values_list('day', 'patients')
+    )
+    weekly = []
+    for i in range(days):
+        d = first_day + timedelta(days=i)
+        weekly.append({'name': d.strftime('%a'), 'date': d.isoformat(), 'patients': counts.get(d, 0)})
+    return weekly
+
+
+def doctors_on_duty():
+    # Use status names instead of hardcoded IDs
+    return Doctor.objects.filter(active_status__status_name__in=['Active', 'On-Demand']).count()
+
+
+def low_stock_alerts(threshold):
+    """Medicines at or below threshold, counted on the maintained balance table"""
+    return MedicineStockBalance.objects.filter(current_stock__lte=threshold).count()
+
+
+def top_conditions(limit=5):
+    rows = (
+        DailyDiagnosisStat.objects
+        .values('diagnosis')
+        .annotate(count=Sum('appointment_count'))
+        .order_by('-count')[:limit]
+    )
+    return [{'name': r['diagnosis'], 'count': r['count']} for r in rows]
+
+
+def doctor_workload(today):
+    """Total and upcoming appointments per doctor, busiest first"""
+    doctors = (
+        Doctor.objects.select_related('department')
+        .annotate(
+            total_appointments=Coalesce(Sum('daily_appointment_stats__appointment_count'), Value(0)),
+            upcoming_appointments=Coalesce(
+                Sum('daily_appointment_stats__appointment_count',
+                    filter=Q(daily_appointment_stats__day__gte=today)),
+                Value(0),
+            ),
+        )
+        .order_by('-total_appointments', 'id')
+    )
+    return [
+        {
+            'doctor_id': d.id,
+            'doctor_name': f"{d.first_name} {d.last_name or ''}".strip(),
+            'department_name': d.department.department_name,
+            'total_appointments': d.total_appointments,
+            'upcoming_appointments': d.upcoming_appointments,
+        }
+        for d in doctors
+    ]
+
+
+def department_stats():
+    """Doctor availability and appointment totals per department"""
+    departments = (
+        Department.objects
+        .annotate(
+            total_doctors=Count('doctors', distinct=True),
+            available_doctors=Count(
+                'doctors', distinct=True,
+                filter=Q(doctors__active_status__status_name__in=['Active', 'On-Demand']),
+            ),
+            total_appointments=Coalesce(
+                Sum('doctors__daily_appointment_stats__appointment_count'), Value(0)
+            ),
+        )
+        .order_by('-total_appointments', 'id')
+    )
+    return [
+        {
+            'department_id': d.id,
+            'department_name': d.department_name,
+            'total_doctors': d.total_doctors,
+            'available_doctors': d.available_doctors,
+            'total_appointments': d.total_appointments,
+        }
+        for d in departments
+    ]
+
+
+def compute_overview_metrics(threshold=10, today=None):
+    """Build the dashboard overview payload"""
+    today = today or timezone.localdate()
+    weekly = weekly_patient_counts(today)
+    return {
+        'total_patients_today': weekly[-1]['patients'],
+        'pending_appointments': pending_appointments(today),
+        'doctors_on_duty': doctors_on_duty(),
+        'low_stock_alerts': low_stock_alerts(threshold),
+        'weekly_patient_counts': weekly,
+        'top_conditions': top_conditions(),
+    }
+
+
+async def acompute_overview_metrics(threshold=10, today=None):
+    """compute_overview_metrics() for async views, its independent queries gathered"""
+    today = today or timezone.localdate()
+    weekly, pending, on_duty, low_stock, conditions = await gather_queries(
+        partial(weekly_patient_counts, today),
+        partial(pending_appointments, today),
+        doctors_on_duty,
+        partial(low_stock_alerts, threshold),
+        top_conditions,
+    )
+    return {
+        'total_patients_today': weekly[-1]['patients'],
+        'pending_appointments': pending,
+        'doctors_on_duty': on_duty,
+        'low_stock_alerts': low_stock,
+        'weekly_patient_counts': weekly,
+        'top_conditions': conditions,
+    }
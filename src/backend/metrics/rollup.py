@@ -0,0 +1,111 @@
+from collections import Counter
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from appointments.models import Appointment
+from config.instrumentation import expected_repeats
+
+from .models import DailyAppointmentStat, DailyDiagnosisStat, DailyPatientVisit
+
+ROLLUP_FIELDS = ('patient_id', 'doctor_id', 'visit_date', 'diagnosis')
+
+
+def rollup_day(visit_date):
+    """Local calendar day of a visit_date as the rollups bucket it"""
+    value = Appointment._meta.get_field('visit_date').to_python(visit_date)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localdate(value)
+
+
+def appointment_rollup_values(appointment):
+    return {field: getattr(appointment, field) for field in ROLLUP_FIELDS}
+
+
+def _increment(model, lookup, delta):
+    """Add delta to one rollup row, creating it on first use and dropping it at zero"""
+    updated = model.objects.filter(**lookup).update(appointment_count=F('appointment_count') + delta)
+    if updated:
+        if delta < 0:
+            model.objects.filter(**lookup, appointment_count__lte=0).delete()
+        return
+    if delta > 0:
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, appointment_count=delta)
+        except IntegrityError:
+            # a concurrent writer created the row first
+            model.objects.filter(**lookup).update(appointment_count=F('appointment_count') + delta)
+
+
+def apply_appointment_rollups(changes):
+    """Count appointments into the daily rollups (delta=1) or take them out (delta=-1).
+
+    `changes` is an iterable of (rollup values, delta). Deltas are netted per rollup row first,
+    so a batch costs one update per touched row and an edit that keeps the day, doctor and
+    diagnosis costs nothing. Must run inside the transaction that writes the appointments.
+    """
+    totals = Counter()
+    for values, delta in changes:
+        day = rollup_day(values['visit_date'])
+        totals[DailyAppointmentStat, (('day', day), ('doctor_id', values['doctor_id']))] += delta
+        totals[DailyPatientVisit, (('day', day), ('patient_id', values['patient_id']))] += delta
+        if values['diagnosis']:
+            totals[DailyDiagnosisStat, (('day', day), ('diagnosis', values['diagnosis']))] += delta
+    with expected_repeats():
+        for (model, lookup), delta in totals.items():
+            if delta:
+                _increment(model, dict(lookup), delta)
+
+
+def _bulk_insert(model, rows, batch_size):
+    rows = iter(rows)
+    total = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return total
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+
+
+def rebuild_appointment_rollups(batch_size=1000):
+    """Recompute every rollup table from Appointments.
+
+    Days are bucketed in the current time zone by the database (on MySQL this needs the
+    time zone tables loaded). Returns {table name: rows written}.
+    """
+    appointments = Appointment.objects.annotate(day=TruncDate('visit_date')).order_by()
+    if appointments.filter(day__isnull=True).exists():
+        raise RuntimeError(
+            'Could not convert visit_date to a local day; load the database time zone tables.'
+        )
+
+    by_doctor = appointments.values('day', 'doctor_id').annotate(n=Count('id'))
+    by_patient = appointments.values('day', 'patient_id').annotate(n=Count('id'))
+    by_diagnosis = (
+        appointments.exclude(diagnosis__isnull=True).exclude(diagnosis__exact='')
+        .values('day', 'diagnosis').annotate(n=Count('id'))
+    )
+
+    with transaction.atomic():
+        for model in (DailyAppointmentStat, DailyDiagnosisStat, DailyPatientVisit):
+            model.objects.all().delete()
+        return {
+            DailyAppointmentStat._meta.db_table: _bulk_insert(DailyAppointmentStat, (
+                DailyAppointmentStat(day=r['day'], doctor_id=r['doctor_id'], appointment_count=r['n'])
+                for r in by_doctor.iterator()
+            ), batch_size),
+            DailyDiagnosisStat._meta.db_table: _bulk_insert(DailyDiagnosisStat, (
+                DailyDiagnosisStat(day=r['day'], diagnosis=r['diagnosis'], appointment_count=r['n'])
+                for r in by_diagnosis.iterator()
+            ), batch_size),
+            DailyPatientVisit._meta.db_table: _bulk_insert(DailyPatientVisit, (
+                DailyPatientVisit(day=r['day'], patient_id=r['patient_id'], appointment_count=r['n'])
+                for r in by_patient.iterator()
+            ), batch_size),
+        }
@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from appointments.models import Appointment
+from appointments.signals import appointments_bulk_saved
+from doctors.models import Doctor
+from pharmacy.models import MedicineStockHistory
+from pharmacy.signals import stock_movements_recorded
+
+from .cache import invalidate_overview_metrics
+from .rollup import ROLLUP_FIELDS, appointment_rollup_values, apply_appointment_rollups
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_rolled_up_appointment(sender, instance, raw=False, **kwargs):
+    """Keep the stored values of an appointment being updated so post_save can move its counts"""
+    instance._rollup_previous = None
+    if not raw and not instance._state.adding and instance.pk is not None:
+        instance._rollup_previous = (
+            Appointment.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Appointment)
+def roll_up_saved_appointment(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changes = [(appointment_rollup_values(instance), 1)]
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        changes.append((previous, -1))
+    apply_appointment_rollups(changes)
+
+
+@receiver(post_delete, sender=Appointment)
+def roll_up_deleted_appointment(sender, instance, **kwargs):
+    apply_appointment_rollups([(appointment_rollup_values(instance), -1)])
+
+
+@receiver(appointments_bulk_saved)
+def roll_up_bulk_saved_appointments(sender, appointments, previous, **kwargs):
+    """Move the rollup counts of appointments written with bulk_create/bulk_update"""
+    apply_appointment_rollups(
+        [(appointment_rollup_values(appointment), -1) for appointment in previous]
+        + [(appointment_rollup_values(appointment), 1) for appointment in appointments]
+    )
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+@receiver([post_save, post_delete], sender=Doctor)
+@receiver([post_save, post_delete], sender=MedicineStockHistory)
+@receiver(appointments_bulk_saved)
+@receiver(stock_movements_recorded)
+def invalidate_cached_overview(sender, **kwargs):
+    """Drop cached overview metrics once the write that changes them is committed.
+
+    Invalidating before commit would let a concurrent reader re-cache the old numbers.
+    """
+    transaction.on_commit(invalidate_overview_metrics)
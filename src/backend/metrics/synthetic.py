@@ -0,0 +1,403 @@
+import random
+import time as perf_time
+import unicodedata
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from appointments.models import Appointment
+from doctors.models import Department, Doctor, DoctorActiveStatus, DoctorLevel
+from patients.models import (
+    Patient, PatientCoreMedicalInformation, PatientEmergencyContact, PatientPersonalInformation,
+)
+from pharmacy.models import (
+    Medicine, MedicineStockHistory, TypeMedicineAdministration, TypeMedicineFunction,
+)
+from pharmacy.stock import lock_stock_balances, record_stock_movements
+
+# (value, relative frequency); family names follow their share of the Vietnamese population
+FAMILY_NAMES = [
+    ('Nguyễn', 38.4), ('Trần', 11.0), ('Lê', 9.5), ('Phạm', 7.1), ('Hoàng', 5.1), ('Huỳnh', 5.1),
+    ('Phan', 4.5), ('Vũ', 3.9), ('Võ', 3.9), ('Đặng', 2.1), ('Bùi', 2.0), ('Đỗ', 1.4), ('Hồ', 1.3),
+    ('Ngô', 1.3), ('Dương', 1.0), ('Lý', 0.5), ('Mai', 0.4), ('Trương', 0.4), ('Đinh', 0.3), ('Lâm', 0.3),
+]
+MIDDLE_NAMES = {
+    'Male': ['Văn', 'Minh', 'Hữu', 'Đức', 'Quốc', 'Thanh', 'Hoàng', 'Gia'],
+    'Female': ['Thị', 'Ngọc', 'Thanh', 'Minh', 'Thu', 'Kim', 'Bảo', 'Gia'],
+}
+GIVEN_NAMES = {
+    'Male': ['Minh', 'Nam', 'Hùng', 'Dũng', 'Tuấn', 'Long', 'Quang', 'Phong', 'Sơn', 'Hải', 'Duy',
+             'Khánh', 'Quân', 'Thành', 'Trung', 'Hiếu', 'Phúc', 'Bình', 'Cường', 'An'],
+    'Female': ['Linh', 'Anh', 'Trang', 'Hương', 'Lan', 'Mai', 'Ngọc', 'Thảo', 'Hà', 'Phương', 'Vy',
+               'Yến', 'Hạnh', 'Giang', 'Châu', 'Hoa', 'Tâm', 'Nhung', 'Quyên', 'An'],
+}
+MOBILE_PREFIXES = ['90', '91', '93', '94', '96', '97', '98', '32', '33', '34', '35', '36', '37', '38',
+                   '39', '70', '76', '77', '78', '79', '81', '82', '83', '84', '85', '86', '88', '89']
+CITIES = [('TP Hồ Chí Minh', 40), ('Hà Nội', 30), ('Đà Nẵng', 8), ('Hải Phòng', 6), ('Cần Thơ', 5),
+          ('Biên Hòa', 4), ('Huế', 3), ('Nha Trang', 2), ('Vũng Tàu', 2)]
+INSURERS = [('Bảo hiểm Xã hội', 70), ('Bảo Việt', 12), ('Prudential', 6), ('Manulife', 5),
+            ('PVI', 4), ('AIA', 3)]
+BLOOD_TYPES = [('O+', 41), ('B+', 30), ('A+', 20), ('AB+', 6), ('O-', 1), ('B-', 1), ('A-', 0.6),
+               ('AB-', 0.4)]
+# (name, share of the doctors)
+DEPARTMENTS = [
+    ('Internal Medicine', 18), ('Emergency Medicine', 14), ('Pediatrics', 12), ('Surgery', 12),
+    ('Obstetrics and Gynecology', 10), ('Cardiology', 9), ('Orthopedics', 8), ('Neurology', 7),
+    ('Oncology', 6), ('Radiology', 4),
+]
+DOCTOR_LEVELS = [('Junior', 40), ('Associate', 30), ('Senior', 22), ('Head', 8)]
+DOCTOR_STATUSES = [('Active', 75), ('On-Demand', 10), ('Inactive', 15)]
+DIAGNOSES = [
+    'Hypertension', 'Type 2 Diabetes', 'Common Cold', 'Influenza', 'Asthma', 'Migraine',
+    'Gastritis', 'Bronchitis', 'Back Pain', 'Allergic Rhinitis', 'Anemia', 'Dermatitis',
+    'Urinary Tract Infection', 'Pneumonia', 'Sinusitis', 'Arthritis', 'Anxiety', 'Insomnia',
+]
+# three times as common from November to February
+SEASONAL_DIAGNOSES = {'Common Cold', 'Influenza', 'Bronchitis', 'Pneumonia', 'Sinusitis'}
+ALLERGIES = ['Penicillin', 'Peanuts', 'Seafood', 'Aspirin', 'Latex', 'Sulfa drugs', 'Pollen']
+CHRONIC_CONDITIONS = ['Hypertension', 'Type 2 Diabetes', 'Asthma', 'Arthritis', 'COPD',
+                      'Chronic Kidney Disease', 'Hepatitis B']
+MEDICINES = [
+    ('Paracetamol', '500mg', 'tablets'), ('Amoxicillin', '500mg', 'capsules'),
+    ('Omeprazole', '20mg', 'capsules'), ('Metformin', '500mg', 'tablets'),
+    ('Amlodipine', '5mg', 'tablets'), ('Cetirizine', '10mg', 'tablets'),
+    ('Ibuprofen', '400mg', 'tablets'), ('Azithromycin', '250mg', 'tablets'),
+    ('Atorvastatin', '20mg', 'tablets'), ('Salbutamol', '100mcg', 'inhalers'),
+    ('Losartan', '50mg', 'tablets'), ('Oseltamivir', '75mg', 'capsules'),
+    ('Ceftriaxone', '1g', 'vials'), ('Loratadine', '10mg', 'tablets'),
+    ('Metoclopramide', '10mg', 'tablets'), ('Insulin glargine', '100IU/ml', 'pens'),
+]
+PRODUCERS = ['Pymepharco', 'Domesco', 'Imexpharm', 'Traphaco', 'Stada', 'Sanofi', 'Hautraco']
+# visits per weekday (Monday first) and per hour of the day
+WEEKDAY_LOAD = [1.0, 0.95, 0.95, 0.9, 0.9, 0.55, 0.25]
+HOUR_LOAD = {7: 8, 8: 12, 9: 12, 10: 10, 11: 7, 13: 7, 14: 9, 15: 8, 16: 6, 17: 3}
+BOOKING_DAYS = 14
+
+
+def zipf_weights(count, exponent=1.0):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def ascii_name(name):
+    name = name.replace('Đ', 'D').replace('đ', 'd')
+    return unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+
+
+def pick(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+class SyntheticHospital:
+    """Deterministic, realistically skewed hospital data, written with bulk inserts.
+
+    The same arguments and `today` always produce the same rows. Rows get explicit ids after
+    the current maximum, so foreign keys need no read-back and the generator can add to
+    existing data. Skews: family names by population share, a heavy tail of frequent
+    patients, uneven doctor loads, weekday/hour/seasonal visit patterns with growth over
+    time, Zipf-distributed diagnoses and medicines, and families sharing a phone number.
+    """
+
+    def __init__(self, seed=42, today=None, years=3, batch_size=5000, log=None):
+        self.seed = seed
+        self.today = today or timezone.localdate()
+        self.start = self.today - timedelta(days=round(365.25 * years))
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.tz = timezone.get_current_timezone()
+
+    def rng(self, table):
+        # one stream per table: a table's rows do not shift when another table's code changes
+        return random.Random(f'{self.seed}:{table}')
+
+    def generate(self, doctors=0, patients=0, medicines=0, appointments=0, stock_movements=0):
+        """Add the given number of rows of each kind; returns {table: rows written}"""
+        counts = {}
+        steps = (
+            (Doctor, self.generate_doctors, doctors),
+            (Patient, self.generate_patients, patients),
+            (Medicine, self.generate_medicines, medicines),
+            (Appointment, self.generate_appointments, appointments),
+            (MedicineStockHistory, self.generate_stock_movements, stock_movements),
+        )
+        for model, step, count in steps:
+            if count:
+                started = perf_time.perf_counter()
+                written = counts[model._meta.db_table] = step(count)
+                seconds = perf_time.perf_counter() - started
+                self.log(f'{model._meta.db_table}: {written} row(s) in {seconds:.1f}s ({written / seconds:.0f} rows/s)')
+        statements = connection.ops.sequence_reset_sql(no_style(), [model for model, _, count in steps if count])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        return counts
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def write(self, model, rows, after_batch=None):
+        """Bulk insert an iterable of unsaved rows in batches; returns the count"""
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                total += self.insert(model, batch, after_batch)
+                batch = []
+        return total + (self.insert(model, batch, after_batch) if batch else 0)
+
+    def insert(self, model, batch, after_batch=None):
+        with transaction.atomic():
+            if model is MedicineStockHistory:
+                record_stock_movements(batch, batch_size=self.batch_size)
+            else:
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            if after_batch:
+                after_batch()
+        return len(batch)
+
+    def lookup_ids(self, model, field, weighted):
+        ids = {}
+        for name, weight in weighted:
+            ids[model.objects.get_or_create(**{field: name})[0].pk] = weight
+        return list(ids.items())
+
+    def generate_doctors(self, count):
+        rng = self.rng('doctors')
+        departments = self.lookup_ids(Department, 'department_name', DEPARTMENTS)
+        levels = self.lookup_ids(DoctorLevel, 'title', DOCTOR_LEVELS)
+        statuses = self.lookup_ids(DoctorActiveStatus, 'status_name', DOCTOR_STATUSES)
+        first_id = self.next_id(Doctor)
+
+        def rows():
+            for doctor_id in range(first_id, first_id + count):
+                gender = rng.choice(['Male', 'Female'])
+                yield Doctor(
+                    id=doctor_id,
+                    department_id=pick(rng, departments),
+                    medical_license_id=f'ML-SYN-{doctor_id:06d}',
+                    dob=date(rng.randint(1960, 1995), rng.randint(1, 12), rng.randint(1, 28)),
+                    first_name=pick(rng, FAMILY_NAMES),
+                    middle_name=rng.choice(MIDDLE_NAMES[gender]),
+                    last_name=rng.choice(GIVEN_NAMES[gender]),
+                    gender=gender,
+                    national_id=f'SYN{doctor_id:09d}',
+                    phone=f'0{rng.choice(MOBILE_PREFIXES)}{rng.randrange(10 ** 7):07d}',
+                    expertise='General',
+                    doctor_level_id=pick(rng, levels),
+                    active_status_id=pick(rng, statuses),
+                )
+        return self.write(Doctor, rows())
+
+    def generate_patients(self, count):
+        rng = self.rng('patients')
+        first_id = self.next_id(Patient)
+        days = (self.today - self.start).days
+        given_weights = zipf_weights(len(GIVEN_NAMES['Male']), 0.8)
+        personal, notes, contacts = [], [], []
+        recent_phones = []
+
+        def rows():
+            for patient_id in range(first_id, first_id + count):
+                gender = 'Female' if rng.random() < 0.51 else 'Male'
+                family = pick(rng, FAMILY_NAMES)
+                given = rng.choices(GIVEN_NAMES[gender], given_weights)[0]
+                age = int(rng.triangular(0, 95, 38))
+                if recent_phones and rng.random() < 0.08:
+                    phone = rng.choice(recent_phones)  # a family member registered earlier
+                else:
+                    phone = f'0{rng.choice(MOBILE_PREFIXES)}{rng.randrange(10 ** 7):07d}'
+                    recent_phones.append(phone)
+                    del recent_phones[:-1000]
+                first_visit = self.start + timedelta(days=rng.randrange(days))
+                insured = rng.random() < 0.7
+                yield Patient(
+                    id=patient_id,
+                    first_name=family,
+                    middle_name=rng.choice(MIDDLE_NAMES[gender]),
+                    last_name=given,
+                    dob=self.today - timedelta(days=age * 365 + rng.randrange(365)),
+                    ethnicity='Kinh' if rng.random() < 0.85 else rng.choice(['Tày', 'Thái', 'Mường', 'Khmer', 'Hoa']),
+                    preferred_language='Vietnamese' if rng.random() < 0.95 else 'English',
+                    gender=gender,
+                    biological_sex=gender,
+                    phone=phone,
+                    phone_normalized=phone,
+                    email=f'{ascii_name(given)}.{ascii_name(family)}{patient_id}@example.vn' if rng.random() < 0.35 else None,
+                    first_visit_date=first_visit,
+                    last_visit_date=first_visit + timedelta(days=rng.randrange((self.today - first_visit).days + 1)),
+                    insurance_id=f'INS-{patient_id:09d}' if insured else None,
+                    insurance_provider=pick(rng, INSURERS) if insured else None,
+                    blood_type=pick(rng, BLOOD_TYPES),
+                    height=int(rng.gauss(165 if gender == 'Male' else 155, 7)) if age >= 18 else 60 + age * 6,
+                    weight=int(rng.gauss(62 if gender == 'Male' else 52, 9)) if age >= 18 else 4 + age * 3,
+                    dnr_status=age > 80 and rng.random() < 0.2,
+                    organ_donor_status=rng.random() < 0.1,
+                )
+                if rng.random() < 0.8:
+                    personal.append(PatientPersonalInformation(
+                        patient_id=patient_id,
+                        nat_id=f'{rng.randrange(1, 97):03d}{rng.randrange(10)}{rng.randrange(100):02d}{patient_id % 10 ** 6:06d}',
+                        passport_no=f'C{rng.randrange(10 ** 7):07d}' if rng.random() < 0.05 else None,
+                        city=pick(rng, CITIES),
+                        country='Vietnam',
+                    ))
+                if rng.random() < 0.15:
+                    notes.append(PatientCoreMedicalInformation(patient_id=patient_id, information_type=1, note=rng.choice(ALLERGIES)))
+                # chronic conditions become likelier with age
+                if rng.random() < age / 150:
+                    notes.append(PatientCoreMedicalInformation(patient_id=patient_id, information_type=3, note=rng.choice(CHRONIC_CONDITIONS)))
+                if rng.random() < 0.6:
+                    contacts.append(PatientEmergencyContact(
+                        patient_id=patient_id, contact_type='Primary', relationship=rng.choice(['Spouse', 'Parent', 'Child', 'Sibling']),
+                        contact_information=f'0{rng.choice(MOBILE_PREFIXES)}{rng.randrange(10 ** 7):07d}', last_updated=first_visit,
+                    ))
+
+        def write_details():
+            # after each patient batch, so the foreign keys resolve
+            for details in (personal, notes, contacts):
+                if details:
+                    type(details[0]).objects.bulk_create(details, batch_size=self.batch_size)
+                    details.clear()
+
+        return self.write(Patient, rows(), after_batch=write_details)
+
+    def generate_medicines(self, count):
+        rng = self.rng('medicines')
+        functions = self.lookup_ids(TypeMedicineFunction, 'name', [('Analgesic', 1)])
+        oral = self.lookup_ids(TypeMedicineAdministration, 'name', [('Oral', 1)])
+        first_id = self.next_id(Medicine)
+
+        def rows():
+            for medicine_id in range(first_id, first_id + count):
+                name, strength, unit = MEDICINES[(medicine_id - first_id) % len(MEDICINES)]
+                series = (medicine_id - first_id) // len(MEDICINES)
+                yield Medicine(
+                    id=medicine_id,
+                    medicine_name=f'{name} {strength}' + (f' ({series + 1})' if series else ''),
+                    producer=rng.choice(PRODUCERS),
+                    medicine_type_id=functions[0][0],
+                    medicine_administration_method_id=oral[0][0],
+                    medicine_unit=unit,
+                )
+        return self.write(Medicine, rows())
+
+    def day_loads(self):
+        """[(day, relative visit volume)] from `start` to two weeks of bookings after today"""
+        days = (self.today - self.start).days
+        loads = []
+        for offset in range(days + BOOKING_DAYS):
+            day = self.start + timedelta(days=offset)
+            load = WEEKDAY_LOAD[day.weekday()] * (1.25 if day.month in (11, 12, 1, 2) else 1.0)
+            load *= 0.7 + 0.3 * min(offset, days) / days  # the hospital grows
+            if day > self.today:
+                load *= 0.3 * (1 - (day - self.today).days / (BOOKING_DAYS + 1))
+            loads.append((day, load))
+        return loads
+
+    def split(self, total, weights):
+        """Whole numbers proportional to weights summing exactly to total"""
+        scale = total / sum(weights)
+        shares = [weight * scale for weight in weights]
+        counts = [int(share) for share in shares]
+        by_remainder = sorted(range(len(shares)), key=lambda i: counts[i] - shares[i])
+        for i in by_remainder[:total - sum(counts)]:
+            counts[i] += 1
+        return counts
+
+    def generate_appointments(self, count):
+        rng = self.rng('appointments')
+        patient_ids = array('q', Patient.objects.order_by('pk').values_list('pk', flat=True))
+        doctor_ids = list(Doctor.objects.order_by('pk').values_list('pk', flat=True))
+        if not patient_ids or not doctor_ids:
+            raise ValueError('Appointments need patients and doctors; generate those first.')
+        # a few patients visit very often, most rarely; doctor loads are uneven too
+        patient_weights = array('d', accumulate(rng.paretovariate(1.2) for _ in patient_ids))
+        doctor_weights = list(accumulate(rng.lognormvariate(0, 0.6) for _ in doctor_ids))
+        diagnosis_weights = zipf_weights(len(DIAGNOSES))
+        winter_weights = [w * (3 if d in SEASONAL_DIAGNOSES else 1) for d, w in zip(DIAGNOSES, diagnosis_weights)]
+        hours, hour_weights = zip(*HOUR_LOAD.items())
+        first_id = self.next_id(Appointment)
+        loads = self.day_loads()
+
+        def rows():
+            next_id = first_id
+            for (day, _), visits in zip(loads, self.split(count, [load for _, load in loads])):
+                # ids follow visit time, as they would for rows created as patients check in
+                times = sorted((rng.choices(hours, hour_weights)[0], rng.randrange(0, 60, 5)) for _ in range(visits))
+                patients = rng.choices(patient_ids, cum_weights=patient_weights, k=visits)
+                doctors = rng.choices(doctor_ids, cum_weights=doctor_weights, k=visits)
+                weights = winter_weights if day.month in (11, 12, 1, 2) else diagnosis_weights
+                for (hour, minute), patient_id, doctor_id in zip(times, patients, doctors):
+                    past = day <= self.today
+                    yield Appointment(
+                        id=next_id,
+                        patient_id=patient_id,
+                        doctor_id=doctor_id,
+                        visit_date=datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.tz),
+                        diagnosis=rng.choices(DIAGNOSES, weights)[0] if past and rng.random() < 0.9 else None,
+                        category='Follow-up' if rng.random() < 0.3 else 'Consultation',
+                    )
+                    next_id += 1
+        return self.write(Appointment, rows())
+
+    def generate_stock_movements(self, count):
+        """Prescriptions against past appointments, with restocks whenever a medicine runs low.
+
+        Goes through record_stock_movements, so balances stay current and MySQL's stock
+        triggers accept every removal.
+        """
+        rng = self.rng('stock')
+        medicine_ids = list(Medicine.objects.order_by('pk').values_list('pk', flat=True))
+        if not medicine_ids:
+            raise ValueError('Stock movements need medicines; generate those first.')
+        popularity = zipf_weights(len(medicine_ids), 1.1)
+        with transaction.atomic():
+            balances = lock_stock_balances(medicine_ids)
+        past = Appointment.objects.filter(visit_date__lt=timezone.now())
+        removals_per_visit = max(count / max(past.count(), 1), 0.01)
+
+        def past_appointment_ids():
+            # keyset chunks: MySQL drivers would buffer a whole iterator() result
+            last = 0
+            while True:
+                ids = list(past.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+                if not ids:
+                    return
+                yield from ids
+                last = ids[-1]
+
+        def restock(medicine_id, rank):
+            amount = int(2000 * popularity[rank]) + rng.randrange(100, 300)
+            balances[medicine_id] += amount
+            return MedicineStockHistory(medicine_id=medicine_id, add_remove=True, amount=amount, note='Restock')
+
+        def rows():
+            written = 0
+            for appointment_id in past_appointment_ids():
+                prescriptions = int(removals_per_visit) + (rng.random() < removals_per_visit % 1)
+                for rank in rng.choices(range(len(medicine_ids)), popularity, k=prescriptions):
+                    medicine_id = medicine_ids[rank]
+                    amount = min(int(rng.expovariate(1 / 8)) + 1, 60)
+                    if balances[medicine_id] < amount:
+                        yield restock(medicine_id, rank)
+                        written += 1
+                    if written >= count:
+                        return
+                    balances[medicine_id] -= amount
+                    yield MedicineStockHistory(medicine_id=medicine_id, add_remove=False, amount=amount,
+                                               appointment_id=appointment_id, note='Prescription')
+                    written += 1
+                    if written >= count:
+                        return
+            # too few past appointments for the requested count: fill with restocks
+            while written < count:
+                rank = rng.randrange(len(medicine_ids))
+                yield restock(medicine_ids[rank], rank)
+                written += 1
+        return self.write(MedicineStockHistory, rows())
@@ -1,19 +1,41 @@
-from django.test import TestCase
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db.models import Sum
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from io import StringIO
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 from appointments.models import Appointment
 from doctors.models import Doctor, DoctorActiveStatus, Department, DoctorLevel
-from patients.models import Patient
-from pharmacy.models import Medicine, MedicineStockHistory
-from datetime import date, timedelta
+from patients.models import Patient, PatientIdentifier
+from pharmacy.models import Medicine, MedicineStockBalance, MedicineStockHistory
+from metrics.models import DailyAppointmentStat, DailyDiagnosisStat, DailyPatientVisit
+from django.utils import timezone
+from datetime import datetime, timedelta
+from config.reference import REFERENCE_DATA
+from metrics.benchmarks import compare, hot_endpoints, measure
+from metrics.cache import LOCK_KEY, aget_overview_metrics, get_overview_metrics, overview_cache_key
+from metrics.overview import compute_overview_metrics
+from users.blacklist import record_blacklist_stats
+from config.instrumentation import AUTH_TIMINGS, REGISTRY
 
 
-class MetricsAPITest(TestCase):
+class MetricsTestBase(TestCase):
     def setUp(self):
         User = get_user_model()
         self.user = User.objects.create_user(username='testuser', password='pass')
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
+        cache.clear()
+
+        today = timezone.localdate()
 
         # create doctor status and doctor
         DoctorLevel.objects.create(id=1, title='Junior')
@@ -22,20 +44,25 @@ class MetricsAPITest(TestCase):
         self.doc = Doctor.objects.create(first_name='John', last_name='Doc', dob='1980-01-01', gender='Male', national_id='D123', expertise='Cardio', doctor_level_id=1, active_status=active_status, department=dept)
 
         # patients and appointments
-        self.p1 = Patient.objects.create(first_name='A', last_name='One', dob='1990-01-01', gender='Female', biological_sex='F', first_visit_date=date.today(), last_visit_date=date.today())
-        self.p2 = Patient.objects.create(first_name='B', last_name='Two', dob='1991-02-02', gender='Male', biological_sex='M', first_visit_date=date.today(), last_visit_date=date.today())
+        self.p1 = Patient.objects.create(first_name='A', last_name='One', dob='1990-01-01', gender='Female', biological_sex='F', first_visit_date=today, last_visit_date=today)
+        self.p2 = Patient.objects.create(first_name='B', last_name='Two', dob='1991-02-02', gender='Male', biological_sex='M', first_visit_date=today, last_visit_date=today)
 
-        Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=date.today())
-        Appointment.objects.create(patient=self.p2, doctor=self.doc, visit_date=date.today() + timedelta(days=1))
+        Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(today))
+        Appointment.objects.create(patient=self.p2, doctor=self.doc, visit_date=self.visit(today + timedelta(days=1)))
 
         # medicines and stock
         from pharmacy.models import TypeMedicineFunction, TypeMedicineAdministration
         TypeMedicineFunction.objects.get_or_create(id=1, defaults={'name': 'Generic'})
         TypeMedicineAdministration.objects.get_or_create(id=1, defaults={'name': 'Oral'})
-        med = Medicine.objects.create(medicine_name='TestMed', producer='Acme', medicine_type_id=1, medicine_administration_method_id=1, medicine_unit='tabs')
+        self.med = med = Medicine.objects.create(medicine_name='TestMed', producer='Acme', medicine_type_id=1, medicine_administration_method_id=1, medicine_unit='tabs')
         MedicineStockHistory.objects.create(medicine=med, add_remove=True, amount=5)
         MedicineStockHistory.objects.create(medicine=med, add_remove=False, amount=2)
 
+    def visit(self, day, hour=9):
+        return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+class MetricsAPITest(MetricsTestBase):
     def test_overview_metrics(self):
         resp = self.client.get('/api/metrics/overview/')
         self.assertEqual(resp.status_code, 200)
@@ -44,4 +71,309 @@ class MetricsAPITest(TestCase):
         self.assertEqual(data['total_patients_today'], 1)
         self.assertEqual(data['pending_appointments'], 2)
         self.assertEqual(data['doctors_on_duty'], 1)
-        self.assertEqual(data['low_stock_alerts'], 1)
\ No newline at end of file
+        self.assertEqual(data['low_stock_alerts'], 1)
+
+    def test_overview_query_count_is_independent_of_window(self):
+        today = timezone.localdate()
+        for offset in range(1, 10):
+            Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(today - timedelta(days=offset)), diagnosis='Flu')
+        # weekly buckets + pending + doctors on duty + low stock + top conditions
+        with self.assertNumQueries(5):
+            resp = self.client.get('/api/metrics/overview/')
+        data = resp.json()
+        weekly = data['weekly_patient_counts']
+        self.assertEqual(len(weekly), 7)
+        self.assertEqual(weekly[-1]['date'], today.isoformat())
+        self.assertEqual([w['patients'] for w in weekly], [1, 1, 1, 1, 1, 1, 1])
+        self.assertEqual(data['top_conditions'], [{'name': 'Flu', 'count': 9}])
+
+    def test_weekly_counts_are_distinct_patients(self):
+        today = timezone.localdate()
+        Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(today, hour=15))
+        Appointment.objects.create(patient=self.p2, doctor=self.doc, visit_date=self.visit(today, hour=23))
+        data = self.client.get('/api/metrics/overview/').json()
+        self.assertEqual(data['total_patients_today'], 2)
+        self.assertEqual(data['weekly_patient_counts'][-1]['patients'], 2)
+
+    def test_overview_is_cached_per_threshold(self):
+        resp = self.client.get('/api/metrics/overview/')
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            resp = self.client.get('/api/metrics/overview/')
+        self.assertEqual(resp['X-Cache'], 'HIT')
+        self.assertEqual(resp.json()['low_stock_alerts'], 1)
+
+        resp = self.client.get('/api/metrics/overview/?low_stock_threshold=2')
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(resp.json()['low_stock_alerts'], 0)
+
+        stats = self.client.get('/api/metrics/cache-stats/').json()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    @override_settings(METRICS_CACHE_LOCK_WAIT=0.1)
+    def test_a_caller_that_stops_waiting_keeps_the_computing_callers_lock(self):
+        for threshold, get in ((10, get_overview_metrics), (2, async_to_sync(aget_overview_metrics))):
+            lock_key = LOCK_KEY.format(overview_cache_key(threshold))
+            # another request is computing the overview
+            cache.add(lock_key, 1)
+            self.assertEqual(get(threshold)[1], False)
+            self.assertIsNotNone(cache.get(lock_key))
+
+    def test_writes_invalidate_cached_overview(self):
+        self.client.get('/api/metrics/overview/')
+        writes = [
+            lambda: Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(timezone.localdate() + timedelta(days=2))),
+            lambda: Doctor.objects.filter(pk=self.doc.pk).first().save(),
+            lambda: MedicineStockHistory.objects.create(medicine=self.med, add_remove=True, amount=50),
+            lambda: Appointment.objects.filter(patient=self.p1).first().delete(),
+        ]
+        for write in writes:
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertEqual(self.client.get('/api/metrics/overview/')['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get('/api/metrics/overview/')['X-Cache'], 'HIT')
+
+        data = self.client.get('/api/metrics/overview/').json()
+        self.assertEqual(data['low_stock_alerts'], 0)
+        self.assertEqual(self.client.get('/api/metrics/cache-stats/').json()['invalidations'], 4)
+
+
+def rollup_snapshot():
+    return (
+        set(DailyAppointmentStat.objects.values_list('day', 'doctor_id', 'appointment_count')),
+        set(DailyDiagnosisStat.objects.values_list('day', 'diagnosis', 'appointment_count')),
+        set(DailyPatientVisit.objects.values_list('day', 'patient_id', 'appointment_count')),
+    )
+
+
+class AppointmentRollupTest(MetricsTestBase):
+    def test_rollups_follow_appointment_writes(self):
+        today = timezone.localdate()
+        other = Doctor.objects.create(first_name='Jane', last_name='Doc', dob='1982-01-01', gender='Female', national_id='D456', expertise='Neuro', doctor_level_id=1, active_status_id=2, department=self.doc.department)
+        appt = Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(today, hour=10), diagnosis='Flu')
+        self.assertIn((today, self.p1.id, 2), rollup_snapshot()[2])
+
+        appt.visit_date = self.visit(today - timedelta(days=3))
+        appt.doctor = other
+        appt.diagnosis = 'Migraine'
+        appt.save()
+        Appointment.objects.create(patient=self.p2, doctor=other, visit_date=self.visit(today - timedelta(days=3), hour=23), diagnosis='Migraine')
+        Appointment.objects.filter(patient=self.p2, visit_date__gte=self.visit(today + timedelta(days=1))).get().delete()
+
+        incremental = rollup_snapshot()
+        self.assertEqual(incremental[1], {(today - timedelta(days=3), 'Migraine', 2)})
+        self.assertNotIn(today + timedelta(days=1), {row[0] for row in incremental[2]})
+
+        out = StringIO()
+        call_command('rebuild_appointment_rollups', stdout=out)
+        self.assertIn('Rebuilt appointment rollups', out.getvalue())
+        self.assertEqual(rollup_snapshot(), incremental)
+
+    def test_rebuild_restores_rows_written_in_bulk(self):
+        today = timezone.localdate()
+        Appointment.objects.bulk_create([
+            Appointment(patient=self.p2, doctor=self.doc, visit_date=self.visit(today, hour=h), diagnosis='Asthma')
+            for h in (8, 12)
+        ])
+        self.assertEqual(self.client.get('/api/metrics/overview/').json()['total_patients_today'], 1)
+        call_command('rebuild_appointment_rollups', stdout=StringIO())
+        cache.clear()
+        data = self.client.get('/api/metrics/overview/').json()
+        self.assertEqual(data['total_patients_today'], 2)
+        self.assertEqual(data['top_conditions'], [{'name': 'Asthma', 'count': 2}])
+
+    def test_doctor_workload_and_department_stats(self):
+        Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(timezone.localdate() - timedelta(days=30)))
+        workload = self.client.get('/api/metrics/doctor-workload/').json()
+        self.assertEqual(workload, [{
+            'doctor_id': self.doc.id, 'doctor_name': 'John Doc', 'department_name': 'Cardiology',
+            'total_appointments': 3, 'upcoming_appointments': 2,
+        }])
+        departments = self.client.get('/api/metrics/department-stats/').json()
+        self.assertEqual(departments[0]['total_doctors'], 1)
+        self.assertEqual(departments[0]['available_doctors'], 1)
+        self.assertEqual(departments[0]['total_appointments'], 3)
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class PrometheusMetricsTest(MetricsTestBase):
+    def setUp(self):
+        super().setUp()
+        REGISTRY.reset()
+        AUTH_TIMINGS.reset()
+
+    def scrape(self, **headers):
+        return APIClient().get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token', **headers)
+
+    def samples(self, text):
+        return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+    def test_requires_the_configured_token(self):
+        self.assertEqual(APIClient().get('/metrics').status_code, 401)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.scrape().status_code, 403)
+
+    def test_exposes_request_auth_cache_and_domain_metrics(self):
+        self.client.get('/api/metrics/overview/')
+        self.client.get('/api/metrics/overview/')
+        APIClient().get('/api/patients/', HTTP_AUTHORIZATION='Bearer not-a-token')
+        record_blacklist_stats({'outstanding': 3, 'blacklisted': 1, 'expired': 0}, 2)
+
+        # the token stats row and the four domain gauges
+        with self.assertNumQueries(5):
+            resp = self.scrape()
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain; version=0.0.4'))
+        samples = self.samples(resp.content.decode())
+
+        labels = 'view="metrics.views.OverviewMetrics",method="GET",status="2xx"'
+        self.assertEqual(samples[f'hms_http_requests_total{{{labels}}}'], '2')
+        self.assertEqual(samples[f'hms_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], '2')
+        self.assertEqual(samples['hms_auth_duration_seconds_count{outcome="failure"}'], '1')
+        self.assertEqual(samples['hms_overview_cache_hits_total'], '1')
+        self.assertEqual(samples['hms_overview_cache_hit_ratio'], '0.5')
+        self.assertEqual(samples['hms_appointments_today'], '1')
+        self.assertEqual(samples['hms_pending_appointments'], '2')
+        self.assertEqual(samples['hms_low_stock_medicines{threshold="10"}'], '1')
+        self.assertGreater(int(samples['hms_db_queries_total{alias="default"}']), 0)
+        self.assertEqual((samples['hms_token_outstanding_rows'], samples['hms_token_pruned_last_run']), ('3', '2'))
+
+
+@override_settings(ROOT_URLCONF='config.async_urls', METRICS_TOKEN='scrape-token')
+class AsyncViewsTest(MetricsTestBase):
+    def setUp(self):
+        super().setUp()
+        REGISTRY.reset()
+        REFERENCE_DATA.clear()
+        self.headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def get(self, path, headers=None):
+        # AsyncClient goes through the async handler and middleware chain, as under ASGI
+        async def get():
+            return await self.async_client.get(path, headers=self.headers if headers is None else headers)
+        return async_to_sync(get)()
+
+    def test_overview_is_computed_concurrently_and_cached(self):
+        # user + the five overview aggregates
+        with self.assertNumQueries(6):
+            resp = self.get('/api/metrics/overview/?low_stock_threshold=3')
+        self.assertEqual(resp['X-Cache'], 'MISS')
+        self.assertEqual(resp.json(), compute_overview_metrics(3))
+        resp = self.get('/api/metrics/overview/?low_stock_threshold=3')
+        self.assertEqual(resp['X-Cache'], 'HIT')
+
+    def test_lookups_match_the_drf_views_and_pass_writes_on(self):
+        for i in range(3):
+            Department.objects.create(department_name=f'Ward {i}')
+        for path in ('/api/departments/', '/api/doctor-levels/', '/api/medicine-types/', '/api/departments/?page=2'):
+            with override_settings(ROOT_URLCONF='config.urls'):
+                expected = self.client.get(path)
+            resp = self.get(path)
+            self.assertEqual((resp.status_code, resp.json()), (expected.status_code, expected.json()))
+            self.assertEqual(resp.get('ETag'), expected.get('ETag'))
+        etag = self.get('/api/departments/')['ETag']
+        with self.assertNumQueries(1):  # user
+            resp = self.get('/api/departments/', headers={**self.headers, 'if-none-match': etag})
+        self.assertEqual(resp.status_code, 304)
+
+        resp = self.client.post('/api/departments/', {'department_name': 'Oncology'}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.client.post('/api/doctor-levels/', {'title': 'Chief'}).status_code, 405)
+
+    def test_requires_authentication(self):
+        resp = self.get('/api/doctor-statuses/', headers={})
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(resp['WWW-Authenticate'], 'Bearer realm="api"')
+        resp = self.get('/api/doctor-statuses/', headers={'authorization': 'Bearer not-a-token'})
+        self.assertEqual((resp.status_code, resp.json()['code']), (401, 'token_not_valid'))
+
+    def test_prometheus_metrics(self):
+        self.assertEqual(self.get('/metrics', headers={}).status_code, 401)
+        with self.assertNumQueries(5):
+            resp = self.get('/metrics', headers={'authorization': 'Bearer scrape-token'})
+        self.assertIn('hms_pending_appointments 2\n', resp.content.decode())
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0, INSTRUMENTATION_SERVER_TIMING=True)
+    def test_async_requests_are_instrumented(self):
+        resp = self.get('/api/metrics/overview/')
+        self.assertIn('6 queries, 0 duplicate', resp['Server-Timing'])
+        series = REGISTRY.snapshot()[('metrics.views.AsyncOverviewMetrics', 'GET', '2xx')]
+        self.assertEqual((series['sampled'], series['queries']), (1, 6))
+
+
+class BenchmarkTest(MetricsTestBase):
+    def test_measures_hot_endpoints_and_flags_regressions(self):
+        Patient.objects.filter(pk=self.p2.pk).update(phone='0901234567')
+        Appointment.objects.create(patient=self.p1, doctor=self.doc, visit_date=self.visit(timezone.localdate()))
+        scenarios = {scenario.name: scenario for scenario in hot_endpoints()}
+        self.assertIn('token_obtain', scenarios)
+        results = {name: measure(self.client, scenarios[name], iterations=3)
+                   for name in ('appointments_by_patient', 'metrics_overview', 'token_obtain')}
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['peak_kib'], 0)
+        # the cache is invalidated before each request, so the overview is recomputed every time
+        self.assertGreater(results['metrics_overview']['queries'], 1)
+        self.assertEqual(compare(results, results), [])
+
+        baseline = {name: dict(result) for name, result in results.items()}
+        baseline['metrics_overview']['queries'] -= 1
+        baseline['token_obtain']['p50_ms'] = baseline['token_obtain']['p95_ms'] = 0
+        regressions = compare(results, baseline, noise_ms=0)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith('metrics_overview: '))
+        self.assertIn('p95_ms', regressions[2])
+
+
+    def test_run_benchmarks_fails_without_a_baseline_for_the_vendor(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            baseline.write_text(json.dumps({'other-vendor': {}}))
+            with self.assertRaisesMessage(CommandError, f'No {connection.vendor} baseline'):
+                call_command('run_benchmarks', baseline=baseline, stdout=StringIO())
+
+class SyntheticHospitalTest(TestCase):
+    def generate(self):
+        out = StringIO()
+        call_command('generate_synthetic_hospital', '--today=2025-03-10', doctors=8, patients=200, medicines=6,
+                     appointments=2000, stock_movements=1000, batch_size=500, stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        return (
+            list(Patient.objects.order_by('id').values_list('first_name', 'last_name', 'phone', 'dob')),
+            list(Appointment.objects.order_by('id').values_list('patient_id', 'doctor_id', 'visit_date', 'diagnosis')),
+            list(MedicineStockHistory.objects.order_by('id').values_list('medicine_id', 'add_remove', 'amount', 'appointment_id')),
+        )
+
+    def test_generates_deterministic_skewed_data(self):
+        out = self.generate()
+        self.assertIn('Appointments: 2000 row(s)', out)
+        patients, appointments, movements = first = self.snapshot()
+        self.assertEqual((len(patients), len(appointments), len(movements)), (200, 2000, 1000))
+
+        # a heavy tail of frequent patients, more weekday than Sunday visits, no overdrawn stock
+        visits = sorted(Counter(a[0] for a in appointments).values(), reverse=True)
+        self.assertGreater(sum(visits[:20]), 0.3 * len(appointments))
+        weekdays = Counter(timezone.localtime(a[2]).weekday() for a in appointments)
+        self.assertGreater(weekdays[0], 2 * weekdays[6])
+        self.assertTrue(all(m[3] for m in movements if not m[1]))
+        self.assertFalse(MedicineStockBalance.objects.filter(current_stock__lt=0).exists())
+        self.assertEqual(DailyAppointmentStat.objects.aggregate(n=Sum('appointment_count'))['n'], 2000)
+
+        for model in (MedicineStockHistory, Appointment, PatientIdentifier, Patient, Medicine, Doctor):
+            model.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+
+    def test_revalidating_the_patient_list_costs_less_than_loading_it(self):
+        self.generate()
+        client = APIClient()
+        client.force_authenticate(user=get_user_model().objects.create_user(username='revalidate'))
+        scenarios = {scenario.name: scenario for scenario in hot_endpoints()}
+        page, not_modified = (measure(client, scenarios[name], iterations=10)
+                              for name in ('patients_list', 'patients_list_not_modified'))
+        # the COUNT(*), the page's ids and their related validators
+        self.assertEqual(not_modified['queries'], 3)
+        self.assertLess(not_modified['p50_ms'], page['p50_ms'])
@@ -1,90 +1,90 @@
+import hmac
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Case, When, IntegerField, F, Count
-from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+
+from config.asyncviews import AsyncReadView
+
+from .cache import aget_overview_metrics, get_overview_metrics, overview_cache_stats
+from .exposition import CONTENT_TYPE, arender_metrics, render_metrics
+from .overview import doctor_workload, department_stats
+
 
-from appointments.models import Appointment
-from doctors.models import Doctor
-from pharmacy.models import MedicineStockHistory
+def low_stock_threshold(params):
+    # low stock threshold can be passed as query param (default 10)
+    try:
+        return int(params.get('low_stock_threshold', 10))
+    except Exception:
+        return 10
 
 
 class OverviewMetrics(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = date.today()
-
-        total_patients_today = (
-            Appointment.objects.filter(
-                visit_date__range=(
-                    datetime.combine(today, datetime.min.time()),
-                    datetime.combine(today, datetime.max.time())
-                )
-            )
-            .values('patient')
-            .distinct()
-            .count()
-        )
-
-        pending_appointments = Appointment.objects.filter(visit_date__gte=today).count()
-
-        # Use status names instead of hardcoded IDs
-        doctors_on_duty = Doctor.objects.filter(
-            active_status__status_name__in=['Active', 'On-Demand']
-        ).count()
-
-        # low stock threshold can be passed as query param (default 10)
-        try:
-            threshold = int(request.query_params.get('low_stock_threshold', 10))
-        except Exception:
-            threshold = 10
-
-        stock_qs = (
-            MedicineStockHistory.objects.values('medicine')
-            .annotate(
-                current_stock=Sum(
-                    Case(
-                        When(add_remove=True, then=F('amount')),
-                        When(add_remove=False, then=F('amount') * -1),
-                        output_field=IntegerField(),
-                    )
-                )
-            )
-        )
-        low_stock_alerts = sum(1 for s in stock_qs if (s['current_stock'] or 0) <= threshold)
-
-        # last 7 days patient counts
-        weekly = []
-        for i in range(6, -1, -1):
-            d = today - timedelta(days=i)
-            # Use date range to match DATE part of DATETIME field
-            start_dt = datetime.combine(d, datetime.min.time())
-            end_dt = datetime.combine(d, datetime.max.time())
-            cnt = (
-                Appointment.objects.filter(visit_date__range=(start_dt, end_dt))
-                .values('patient')
-                .distinct()
-                .count()
-            )
-            weekly.append({'name': d.strftime('%a'), 'date': d.isoformat(), 'patients': cnt})
-
-        # top conditions (diagnosis)
-        top_conditions = (
-            Appointment.objects
-            .exclude(diagnosis__isnull=True)
-            .exclude(diagnosis__exact='')
-            .values('diagnosis')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:5]
-        )
-        conditions = [{'name': t['diagnosis'], 'count': t['count']} for t in top_conditions]
-
-        return Response({
-            'total_patients_today': total_patients_today,
-            'pending_appointments': pending_appointments,
-            'doctors_on_duty': doctors_on_duty,
-            'low_stock_alerts': low_stock_alerts,
-            'weekly_patient_counts': weekly,
-            'top_conditions': conditions,
-        })
\ No newline at end of file
+        data, hit = get_overview_metrics(low_stock_threshold(request.query_params))
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class AsyncOverviewMetrics(AsyncReadView):
+    fallback = staticmethod(OverviewMetrics.as_view())
+
+    async def get(self, request):
+        data, hit = await aget_overview_metrics(low_stock_threshold(request.GET))
+        response = self.render(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class OverviewCacheStats(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(overview_cache_stats())
+
+
+class DoctorWorkload(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(doctor_workload(timezone.localdate()))
+
+
+class DepartmentStats(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(department_stats())
+
+
+def metrics_access_denied(request):
+    """The error response for a scrape without the right METRICS_TOKEN, else None"""
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            return HttpResponse('Invalid or missing metrics token\n', status=401, content_type='text/plain')
+    elif not settings.DEBUG:
+        return HttpResponse('Set METRICS_TOKEN to enable /metrics\n', status=403, content_type='text/plain')
+    return None
+
+
+def prometheus_metrics(request):
+    """Prometheus scrape target; a plain view so scraping skips DRF and JWT authentication"""
+    denied = metrics_access_denied(request)
+    if denied is not None:
+        return denied
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
+
+
+async def aprometheus_metrics(request):
+    """prometheus_metrics() for the ASGI profile, with the domain gauges queried concurrently"""
+    denied = metrics_access_denied(request)
+    if denied is not None:
+        return denied
+    return HttpResponse(await arender_metrics(), content_type=CONTENT_TYPE)
@@ -0,0 +1,97 @@
+import hashlib
+import re
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Patient, PatientIdentifier, PatientPersonalInformation
+from .search import normalize_phone
+
+DOCUMENT_KINDS = ('nat_id', 'passport_no', 'drivers_license_no')
+
+
+def normalize_document(value):
+    """Document numbers compared without case, spaces or punctuation"""
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper() or None
+
+
+def identifier_hash(normalized):
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def lookup_hashes(value):
+    """Hashes a typed identifier can be stored under, read as a document number or a phone number"""
+    return {identifier_hash(v) for v in (normalize_document(value), normalize_phone(value)) if v}
+
+
+def document_identifiers(personal_info):
+    return {kind: normalize_document(getattr(personal_info, kind)) for kind in DOCUMENT_KINDS}
+
+
+def sync_patient_identifiers(patient_id, normalized):
+    """Store {kind: normalized value} for one patient; a None value removes that kind"""
+    existing = {
+        row.kind: row for row in PatientIdentifier.objects.filter(patient_id=patient_id, kind__in=normalized)
+    }
+    stale = []
+    for kind, value in normalized.items():
+        row = existing.get(kind)
+        if value is None:
+            if row is not None:
+                stale.append(row.pk)
+            continue
+        value_hash = identifier_hash(value)
+        if row is None:
+            PatientIdentifier.objects.create(patient_id=patient_id, kind=kind, value_hash=value_hash)
+        elif row.value_hash != value_hash:
+            PatientIdentifier.objects.filter(pk=row.pk).update(value_hash=value_hash)
+    if stale:
+        PatientIdentifier.objects.filter(pk__in=stale).delete()
+
+
+def sync_phone_identifiers(patients):
+    """Replace the phone identifiers of saved patients whose phone_normalized is current"""
+    if not patients:
+        return
+    PatientIdentifier.objects.filter(patient__in=patients, kind='phone').delete()
+    PatientIdentifier.objects.bulk_create([
+        PatientIdentifier(patient=patient, kind='phone', value_hash=identifier_hash(patient.phone_normalized))
+        for patient in patients
+        if patient.phone_normalized
+    ], batch_size=1000)
+
+
+def _all_identifiers():
+    for patient_id, phone_normalized in Patient.objects.exclude(phone_normalized=None).values_list(
+        'id', 'phone_normalized'
+    ).iterator():
+        yield PatientIdentifier(patient_id=patient_id, kind='phone', value_hash=identifier_hash(phone_normalized))
+    for info in PatientPersonalInformation.objects.only('patient_id', *DOCUMENT_KINDS).iterator():
+        for kind, value in document_identifiers(info).items():
+            if value is not None:
+                yield PatientIdentifier(patient_id=info.patient_id, kind=kind, value_hash=identifier_hash(value))
+
+
+def rebuild_patient_identifiers(batch_size=1000):
+    """Recompute Patient.phone_normalized and the PatientIdentifier table.
+
+    For rows loaded outside Django (SQL scripts, imports). Returns (phones updated, identifiers written).
+    """
+    with transaction.atomic():
+        changed = []
+        for patient in Patient.objects.only('id', 'phone', 'phone_normalized').iterator():
+            normalized = normalize_phone(patient.phone)
+            if normalized != patient.phone_normalized:
+                patient.phone_normalized = normalized
+                changed.append(patient)
+        Patient.objects.bulk_update(changed, ['phone_normalized'], batch_size=batch_size)
+
+        PatientIdentifier.objects.all().delete()
+        rows = _all_identifiers()
+        written = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return len(changed), written
+            PatientIdentifier.objects.bulk_create(batch, batch_size=batch_size)
+            written += len(batch)
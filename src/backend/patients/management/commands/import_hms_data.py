@@ -0,0 +1,240 @@
+import csv
+import json
+import os
+import time as perf_time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from metrics.cache import invalidate_overview_metrics
+from metrics.rollup import rebuild_appointment_rollups
+from patients.identifiers import rebuild_patient_identifiers
+from patients.models import Patient
+from pharmacy.models import MedicineStockHistory
+from pharmacy.stock import InsufficientStockBatch, record_stock_movements
+
+# in dependency order: appointments reference doctors and patients, stock references appointments
+MODELS = {
+    'doctors': Doctor,
+    'patients': Patient,
+    'appointments': Appointment,
+    'stock': MedicineStockHistory,
+}
+
+
+def read_rows(path):
+    """Yield one dict per CSV row or NDJSON line, without loading the file"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.suffix.lower() in ('.ndjson', '.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def column_fields(model):
+    """{accepted column name: field}; foreign keys are accepted as `patient` or `patient_id`"""
+    columns = {}
+    for field in model._meta.concrete_fields:
+        columns[field.attname] = field
+        columns[field.name] = field
+    return columns
+
+
+def convert(field, value):
+    if value == '' and (field.null or not isinstance(field, (models.CharField, models.TextField))):
+        return None
+    if field.is_relation:
+        field = field.target_field
+    value = field.to_python(value)
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class Command(BaseCommand):
+    help = ('Import doctors, patients, appointments and stock movements from CSV or NDJSON files '
+            'in batches, resumable from a checkpoint file. Derived tables are rebuilt at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+', metavar='KIND=PATH',
+                            help=f'e.g. patients=patients.csv appointments=visits.ndjson; '
+                                 f'kinds: {", ".join(MODELS)}')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--checkpoint', type=Path,
+                            help='JSON file recording the rows committed per source; a rerun resumes after them.')
+        parser.add_argument('--defer-indexes', action='store_true',
+                            help='Drop secondary indexes on the imported tables while loading and '
+                                 'recreate them at the end (initial loads only: queries slow down meanwhile).')
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Skip rebuilding rollups and patient identifiers after the import.')
+
+    def handle(self, *args, **options):
+        sources = {}
+        for source in options['sources']:
+            kind, _, path = source.partition('=')
+            if kind not in MODELS or not path:
+                raise CommandError(f'Expected KIND=PATH with KIND one of {", ".join(MODELS)}, got {source!r}')
+            if not os.path.exists(path):
+                raise CommandError(f'{path} does not exist')
+            sources[kind] = Path(path)
+
+        self.verbosity = options['verbosity']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = {}
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            self.checkpoint = json.loads(self.checkpoint_path.read_text())
+
+        imported = [kind for kind in MODELS if kind in sources]
+        deferred = self.drop_indexes([MODELS[kind] for kind in imported]) if options['defer_indexes'] else []
+        try:
+            for kind in imported:
+                self.import_source(kind, sources[kind], options['batch_size'])
+        finally:
+            self.restore_indexes(deferred)
+
+        self.reset_sequences([MODELS[kind] for kind in imported])
+        if not options['no_rebuild']:
+            self.rebuild(imported)
+        invalidate_overview_metrics()
+
+    def import_source(self, kind, path, batch_size):
+        model = MODELS[kind]
+        columns = column_fields(model)
+        done = self.checkpoint.get(kind, {})
+        skip = done.get('rows', 0) if done.get('source') == str(path.resolve()) else 0
+        if skip:
+            self.stdout.write(f'{kind}: resuming after {skip} row(s) from the checkpoint')
+
+        rows = islice(read_rows(path), skip, None)
+        position = skip
+        started = perf_time.perf_counter()
+        unknown = None
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            if unknown is None:
+                unknown = sorted(set(batch[0]) - set(columns))
+                if unknown:
+                    self.stdout.write(self.style.WARNING(f'{kind}: ignoring column(s) {", ".join(unknown)}'))
+            instances = [self.build(model, columns, row, f'{path}, row {position + i + 1}')
+                         for i, row in enumerate(batch)]
+            if position == skip and skip:
+                # a crash between the last commit and its checkpoint would repeat that batch
+                instances = self.drop_existing(model, instances)
+            try:
+                with transaction.atomic():
+                    self.insert(kind, instances, batch_size)
+            except InsufficientStockBatch as exc:
+                errors = '; '.join(f'row {position + i + 1}: {error}' for i, error in sorted(exc.errors.items()))
+                raise CommandError(f'{path}: {errors}')
+            except DatabaseError as exc:
+                raise CommandError(f'{path}, rows {position + 1}-{position + len(batch)}: {exc}')
+            position += len(batch)
+            self.save_checkpoint(kind, path, position)
+            if self.verbosity > 1:
+                self.stdout.write(f'{kind}: {position} row(s)')
+
+        seconds = perf_time.perf_counter() - started
+        count = position - skip
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind}: imported {count} row(s) in {seconds:.1f}s ({count / seconds if seconds else 0:.0f} rows/s)'
+        ))
+
+    def build(self, model, columns, row, location):
+        values = {}
+        for column, value in row.items():
+            field = columns.get(column)
+            if field is None or value is None:
+                continue
+            try:
+                values[field.attname] = convert(field, value)
+            except ValidationError as exc:
+                raise CommandError(f'{location}: {column}: {" ".join(exc.messages)}')
+        return model(**values)
+
+    def drop_existing(self, model, instances):
+        ids = [instance.pk for instance in instances if instance.pk is not None]
+        if not ids:
+            return instances
+        existing = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        return [instance for instance in instances if instance.pk not in existing]
+
+    def insert(self, kind, instances, batch_size):
+        if kind == 'stock':
+            # moves the balances in the same transaction, which MySQL's stock trigger checks against
+            record_stock_movements(instances, batch_size=batch_size)
+        else:
+            MODELS[kind].objects.bulk_create(instances, batch_size=batch_size)
+
+    def save_checkpoint(self, kind, path, rows):
+        if not self.checkpoint_path:
+            return
+        self.checkpoint[kind] = {'source': str(path.resolve()), 'rows': rows}
+        partial = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        partial.write_text(json.dumps(self.checkpoint, indent=2))
+        os.replace(partial, self.checkpoint_path)
+
+    def deferrable_indexes(self, model):
+        # MySQL needs an index leading with each foreign key column, so those stay
+        return [
+            index for index in model._meta.indexes
+            if not model._meta.get_field(index.fields[0].lstrip('-')).is_relation
+        ]
+
+    def existing_indexes(self, model):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+    def drop_indexes(self, targets):
+        deferred = []
+        with connection.schema_editor() as editor:
+            for model in targets:
+                existing = self.existing_indexes(model)
+                for index in self.deferrable_indexes(model):
+                    if index.name in existing:
+                        editor.remove_index(model, index)
+                    deferred.append((model, index))
+        return deferred
+
+    def restore_indexes(self, deferred):
+        if not deferred:
+            return
+        started = perf_time.perf_counter()
+        with connection.schema_editor() as editor:
+            for model, index in deferred:
+                if index.name not in self.existing_indexes(model):
+                    editor.add_index(model, index)
+        self.stdout.write(f'Recreated {len(deferred)} index(es) in {perf_time.perf_counter() - started:.1f}s')
+
+    def reset_sequences(self, targets):
+        # rows imported with explicit ids leave PostgreSQL sequences behind; MySQL needs nothing
+        statements = connection.ops.sequence_reset_sql(no_style(), targets)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def rebuild(self, imported):
+        # bulk inserts skip the per-row signals that keep these tables current
+        if 'patients' in imported:
+            _, identifiers = rebuild_patient_identifiers()
+            self.stdout.write(f'Rebuilt patient identifiers ({identifiers} row(s)).')
+        if 'appointments' in imported:
+            try:
+                rebuild_appointment_rollups()
+                self.stdout.write('Rebuilt appointment rollups.')
+            except RuntimeError as e:
+                self.stdout.write(self.style.WARNING(
+                    f'{e} Then run manage.py rebuild_appointment_rollups.'
+                ))
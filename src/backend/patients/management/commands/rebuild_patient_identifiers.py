@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from patients.identifiers import rebuild_patient_identifiers
+from patients.models import PatientIdentifier
+
+
+class Command(BaseCommand):
+    help = ('Recompute Patient.phone_normalized and the hashed PatientIdentifier lookup table '
+            'from patient phones and document numbers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        phones, identifiers = rebuild_patient_identifiers(batch_size=options['batch_size'])
+        self.stdout.write(f'Patient.phone_normalized: {phones} row(s) updated')
+        self.stdout.write(f'{PatientIdentifier._meta.db_table}: {identifiers} row(s)')
+        self.stdout.write(self.style.SUCCESS('Rebuilt patient identifiers.'))
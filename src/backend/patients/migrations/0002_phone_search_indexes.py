@@ -0,0 +1,58 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:56
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_phone(value):
+    # frozen copy of patients.search.normalize_phone as of this migration
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("84") and len(digits) == 11:
+        digits = "0" + digits[2:]
+    return digits or None
+
+
+def populate_phone_normalized(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    patients = []
+    for patient in Patient.objects.exclude(phone=None).only("id", "phone").iterator():
+        patient.phone_normalized = normalize_phone(patient.phone)
+        patients.append(patient)
+    Patient.objects.bulk_update(patients, ["phone_normalized"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="patient",
+            name="phone_normalized",
+            field=models.CharField(
+                blank=True, editable=False, max_length=20, null=True
+            ),
+        ),
+        migrations.RunPython(populate_phone_normalized, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["first_name"], name="Patient_first_n_c80ffa_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(
+                fields=["phone_normalized"], name="Patient_phone_n_a62c4a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["email"], name="Patient_email_566e21_idx"),
+        ),
+    ]
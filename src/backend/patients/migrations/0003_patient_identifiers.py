@@ -0,0 +1,109 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:59
+
+import hashlib
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# frozen copies of patients.identifiers as of this migration
+DOCUMENT_KINDS = ("nat_id", "passport_no", "drivers_license_no")
+
+
+def normalize_document(value):
+    return re.sub(r"[^0-9A-Za-z]", "", value or "").upper() or None
+
+
+def identifier_hash(normalized):
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def populate_identifiers(apps, schema_editor):
+    Patient = apps.get_model("patients", "Patient")
+    PatientPersonalInformation = apps.get_model(
+        "patients", "PatientPersonalInformation"
+    )
+    PatientIdentifier = apps.get_model("patients", "PatientIdentifier")
+    rows = [
+        PatientIdentifier(
+            patient_id=patient_id, kind="phone", value_hash=identifier_hash(phone)
+        )
+        for patient_id, phone in Patient.objects.exclude(
+            phone_normalized=None
+        ).values_list("id", "phone_normalized")
+    ]
+    for info in PatientPersonalInformation.objects.all():
+        for kind in DOCUMENT_KINDS:
+            value = normalize_document(getattr(info, kind))
+            if value is not None:
+                rows.append(
+                    PatientIdentifier(
+                        patient_id=info.patient_id,
+                        kind=kind,
+                        value_hash=identifier_hash(value),
+                    )
+                )
+    PatientIdentifier.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("patients", "0002_phone_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PatientIdentifier",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("phone", "Phone"),
+                            ("nat_id", "National ID"),
+                            ("passport_no", "Passport"),
+                            ("drivers_license_no", "Driver's License"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("value_hash", models.CharField(max_length=64)),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="identifiers",
+                        to="patients.patient",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Patient Identifier",
+                "verbose_name_plural": "Patient Identifiers",
+                "db_table": "PatientIdentifier",
+                "indexes": [
+                    models.Index(
+                        fields=["value_hash"], name="PatientIden_value_h_3101d2_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="patientidentifier",
+            constraint=models.UniqueConstraint(
+                fields=("patient", "kind"), name="uniq_patient_identifier_kind"
+            ),
+        ),
+        migrations.RunPython(populate_identifiers, migrations.RunPython.noop),
+    ]
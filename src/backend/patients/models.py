@@ -1,5 +1,7 @@
 from django.db import models
 
+from .search import normalize_phone
+
 
 class Patient(models.Model):
     first_name = models.CharField(max_length=50)
@@ -11,6 +13,8 @@ class Patient(models.Model):
     gender = models.CharField(max_length=20)
     biological_sex = models.CharField(max_length=20)
     phone = models.CharField(max_length=20, blank=True, null=True)
+    # digits-only copy of phone for exact and prefix lookups, kept in step by save()
+    phone_normalized = models.CharField(max_length=20, blank=True, null=True, editable=False)
     email = models.EmailField(max_length=100, blank=True, null=True)
     first_visit_date = models.DateField()
     last_visit_date = models.DateField()
@@ -21,14 +25,27 @@ class Patient(models.Model):
     weight = models.IntegerField(blank=True, null=True)
     dnr_status = models.BooleanField(default=False)
     organ_donor_status = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'Patient'
         ordering = ['last_name', 'first_name']
-        indexes = [models.Index(fields=['last_name'])]
+        indexes = [
+            models.Index(fields=['last_name']),
+            models.Index(fields=['first_name']),
+            models.Index(fields=['phone_normalized']),
+            models.Index(fields=['email']),
+        ]
         verbose_name = 'Patient'
         verbose_name_plural = 'Patients'
 
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}" 
 
@@ -43,6 +60,7 @@ class PatientPersonalInformation(models.Model):
     city = models.CharField(max_length=100, blank=True, null=True)
     state = models.CharField(max_length=100, blank=True, null=True)
     country = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'PatientPersonalInformation'
@@ -53,10 +71,39 @@ class PatientPersonalInformation(models.Model):
         return f"Personal Info {self.patient_id}"
 
 
+class PatientIdentifier(models.Model):
+    """SHA-256 of one normalized identifier of a patient, for returning-patient lookups.
+
+    Maintained from Patient.phone and the PatientPersonalInformation document numbers by
+    patients.signals; `manage.py rebuild_patient_identifiers` recomputes the table.
+    """
+    KIND_CHOICES = [
+        ('phone', 'Phone'),
+        ('nat_id', 'National ID'),
+        ('passport_no', 'Passport'),
+        ('drivers_license_no', "Driver's License"),
+    ]
+
+    # no FK index: the unique (patient, kind) constraint covers it
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='identifiers', db_index=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    value_hash = models.CharField(max_length=64)
+
+    class Meta:
+        db_table = 'PatientIdentifier'
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'kind'], name='uniq_patient_identifier_kind'),
+        ]
+        indexes = [models.Index(fields=['value_hash'])]
+        verbose_name = 'Patient Identifier'
+        verbose_name_plural = 'Patient Identifiers'
+
+
 class PatientCoreMedicalInformation(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='core_med_info')
     information_type = models.IntegerField()
     note = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'PatientCoreMedicalInformation'
@@ -70,6 +117,7 @@ class PatientEmergencyContact(models.Model):
     contact_information = models.CharField(max_length=255)
     relationship = models.CharField(max_length=50)
     last_updated = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'PatientEmergencyContact'
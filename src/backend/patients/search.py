@@ -0,0 +1,96 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework import filters
+
+PHONE_TERM = re.compile(r'^\+?[\d\s().-]+$')
+NAME_TOKEN = re.compile(r'[^\W_]+')
+# Every name token must prefix one of these; at least one must prefix an indexed column
+NAME_FIELDS = ('first_name', 'middle_name', 'last_name')
+INDEXED_NAME_FIELDS = ('first_name', 'last_name')
+
+
+def normalize_phone(value):
+    """Digits only, with a +84/0084 country code folded into the local 0 prefix"""
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith('84') and len(digits) == 11:
+        digits = '0' + digits[2:]
+    return digits or None
+
+
+def _phone_prefix(digits):
+    # a range instead of LIKE so every backend can walk the phone_normalized index
+    upper = digits[:-1] + chr(ord(digits[-1]) + 1)
+    return Q(phone_normalized__gte=digits, phone_normalized__lt=upper)
+
+
+def _any_field(token, fields, lookup):
+    return reduce(or_, (Q(**{f'{field}__{lookup}': token}) for field in fields))
+
+
+def _name_query(tokens, lookup):
+    # the OR over indexed columns drives the index; the per-token ANDs then filter the rows it finds
+    driving = reduce(or_, (_any_field(token, INDEXED_NAME_FIELDS, lookup) for token in tokens))
+    return driving & reduce(and_, (_any_field(token, NAME_FIELDS, lookup) for token in tokens))
+
+
+def search_tiers(term):
+    """Classify a search term as (match kind, exact-match Q, prefix-match Q), or None.
+
+    Terms of phone characters with at least three digits search phone_normalized, terms with
+    an @ search email, anything else searches names token by token. Every prefix Q also
+    matches the exact rows.
+    """
+    term = (term or '').strip()
+    if not term:
+        return None
+    if PHONE_TERM.match(term):
+        digits = normalize_phone(term)
+        if digits and len(digits) >= 3:
+            return 'phone', Q(phone_normalized=digits), _phone_prefix(digits)
+    if '@' in term:
+        return 'email', Q(email__iexact=term), Q(email__istartswith=term)
+    tokens = NAME_TOKEN.findall(term)
+    if not tokens:
+        return None
+    return 'name', _name_query(tokens, 'iexact'), _name_query(tokens, 'istartswith')
+
+
+def search_patients(queryset, term, limit=20):
+    """Patients matching term, exact matches before prefix matches, at most `limit` of them.
+
+    Each tier is one indexed, LIMITed query, so the cost follows `limit` rather than the
+    table size. Results carry `match` (phone, email or name) and `exact` attributes.
+    """
+    tiers = search_tiers(term)
+    if tiers is None:
+        return []
+    match, exact, prefix = tiers
+    ordering = ('phone_normalized', 'id') if match == 'phone' else (*queryset.model._meta.ordering, 'id')
+
+    results = list(queryset.filter(exact).order_by(*ordering)[:limit])
+    for patient in results:
+        patient.exact = True
+    if len(results) < limit:
+        found = [patient.pk for patient in results]
+        for patient in queryset.filter(prefix).exclude(pk__in=found).order_by(*ordering)[:limit - len(results)]:
+            patient.exact = False
+            results.append(patient)
+    for patient in results:
+        patient.match = match
+    return results
+
+
+class PatientSearchFilter(filters.BaseFilterBackend):
+    """`?search=` for patient lists: the prefix tier of search_tiers, so it stays indexed"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        tiers = search_tiers(request.query_params.get(self.search_param))
+        if tiers is None:
+            return queryset
+        return queryset.filter(tiers[2])
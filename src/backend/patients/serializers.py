@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from appointments.models import Appointment
+from pharmacy.serializers import PrescriptionSerializer
 from .models import Patient, PatientPersonalInformation, PatientCoreMedicalInformation, PatientEmergencyContact
 
 
@@ -20,6 +22,18 @@ class PatientEmergencyContactSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class PatientSearchResultSerializer(serializers.ModelSerializer):
+    match = serializers.CharField(read_only=True)
+    exact = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Patient
+        fields = [
+            'id', 'first_name', 'middle_name', 'last_name', 'dob', 'gender',
+            'phone', 'email', 'last_visit_date', 'match', 'exact'
+        ]
+
+
 class PatientSerializer(serializers.ModelSerializer):
     personal_info = PatientPersonalInformationSerializer(read_only=True, source='patientpersonalinformation')
     core_med_info = PatientCoreMedicalInformationSerializer(many=True, read_only=True)
@@ -43,16 +57,38 @@ class PatientSerializer(serializers.ModelSerializer):
             'allergies', 'chronic_conditions'
         ]
 
+    def _notes_by_type(self, obj):
+        """Group core medical notes by information type, once per patient"""
+        notes = getattr(obj, '_core_med_notes', None)
+        if notes is None:
+            notes = {}
+            for info in obj.core_med_info.all():
+                if info.note:
+                    notes.setdefault(info.information_type, []).append(info.note)
+            obj._core_med_notes = notes
+        return notes
+
     def get_allergies(self, obj):
         """Return list of allergy notes"""
-        return [
-            info.note for info in obj.core_med_info.all()
-            if info.information_type == 1 and info.note
-        ]
+        return self._notes_by_type(obj).get(1, [])
 
     def get_chronic_conditions(self, obj):
         """Return list of chronic condition notes"""
-        return [
-            info.note for info in obj.core_med_info.all()
-            if info.information_type == 3 and info.note
-        ]
+        return self._notes_by_type(obj).get(3, [])
+
+
+class TimelineDoctorSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField(allow_null=True)
+    department_name = serializers.CharField(source='department.department_name')
+
+
+class PatientTimelineVisitSerializer(serializers.ModelSerializer):
+    """One appointment of a patient with the medicine dispensed against it"""
+    doctor = TimelineDoctorSerializer(read_only=True)
+    prescriptions = PrescriptionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = ['id', 'visit_date', 'diagnosis', 'category', 'note', 'doctor', 'prescriptions']
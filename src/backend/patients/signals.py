@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .identifiers import DOCUMENT_KINDS, document_identifiers, sync_patient_identifiers
+from .models import Patient, PatientPersonalInformation
+
+
+@receiver(post_save, sender=Patient)
+def sync_phone_identifier(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'phone_normalized' not in update_fields):
+        return
+    sync_patient_identifiers(instance.pk, {'phone': instance.phone_normalized})
+
+
+@receiver(post_save, sender=PatientPersonalInformation)
+def sync_document_identifiers(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_patient_identifiers(instance.patient_id, document_identifiers(instance))
+
+
+@receiver(post_delete, sender=PatientPersonalInformation)
+def drop_document_identifiers(sender, instance, **kwargs):
+    sync_patient_identifiers(instance.patient_id, dict.fromkeys(DOCUMENT_KINDS))
@@ -1,3 +1,454 @@
-from django.test import TestCase
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from config.bulk import FIRST_INSERTED_KEY_SQL
+from config.pagination import PageOrCursorPagination
+from patients.models import Patient, PatientIdentifier, PatientPersonalInformation, PatientCoreMedicalInformation, PatientEmergencyContact
+from appointments.models import Appointment
+from appointments.tests import QueryPlanMixin
+from doctors.models import Doctor, DoctorLevel, DoctorActiveStatus, Department
+from pharmacy.models import Medicine, MedicineStockBalance, MedicineStockHistory, TypeMedicineFunction, TypeMedicineAdministration
+from metrics.models import DailyAppointmentStat
+from patients.identifiers import rebuild_patient_identifiers
+from patients.search import search_tiers
+from patients.views import PatientViewSet
 
-# Create your tests here.
+
+class PatientAPITest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='patientuser', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_patients(self, count):
+        for i in range(count):
+            p = Patient.objects.create(first_name=f'P{i}', last_name='Test', dob='1990-01-01', gender='Female', biological_sex='F', first_visit_date='2024-01-01', last_visit_date='2024-01-01')
+            PatientPersonalInformation.objects.create(patient=p, nat_id=f'N{i}', city='Hanoi')
+            PatientCoreMedicalInformation.objects.create(patient=p, information_type=1, note='Penicillin')
+            PatientCoreMedicalInformation.objects.create(patient=p, information_type=3, note='Asthma')
+            PatientEmergencyContact.objects.create(patient=p, contact_type='Primary', contact_information='0900000000', relationship='Sister', last_updated='2024-01-01')
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        self.create_patients(3)
+        # count + the page's ids + their related validators + patients with personal info
+        # + core med info + emergency contacts
+        with self.assertNumQueries(6):
+            resp = self.client.get('/api/patients/')
+        self.assertEqual(resp.status_code, 200)
+
+        self.create_patients(12)
+        with self.assertNumQueries(6):
+            resp = self.client.get('/api/patients/')
+        self.assertEqual(resp.json()['count'], 15)
+
+        patient = resp.json()['results'][0]
+        self.assertEqual(patient['allergies'], ['Penicillin'])
+        self.assertEqual(patient['chronic_conditions'], ['Asthma'])
+        self.assertEqual(patient['personal_info']['city'], 'Hanoi')
+        self.assertEqual(len(patient['emergency_contacts']), 1)
+
+    def test_retrieve_query_count(self):
+        self.create_patients(1)
+        patient = Patient.objects.get()
+        # validators + patient with personal info + core med info + emergency contacts
+        with self.assertNumQueries(4):
+            resp = self.client.get(f'/api/patients/{patient.id}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['allergies'], ['Penicillin'])
+
+    def test_timeline_returns_visits_with_prescriptions(self):
+        self.create_patients(2)
+        patient, other = Patient.objects.order_by('id')
+        dept = Department.objects.create(department_name='General')
+        doc = Doctor.objects.create(department=dept, dob='1980-01-01', first_name='John', last_name='Doe', gender='Male', national_id='D1', expertise='General', doctor_level=DoctorLevel.objects.create(title='Senior'), active_status=DoctorActiveStatus.objects.create(status_name='Active'))
+        med = Medicine.objects.create(medicine_name='Amoxicillin', medicine_type=TypeMedicineFunction.objects.create(name='Antibiotic'), medicine_administration_method=TypeMedicineAdministration.objects.create(name='Oral'), medicine_unit='tabs')
+        MedicineStockHistory.objects.create(medicine=med, add_remove=True, amount=100)
+        older = Appointment.objects.create(patient=patient, doctor=doc, visit_date='2024-01-01T09:00:00Z', diagnosis='Flu')
+        newer = Appointment.objects.create(patient=patient, doctor=doc, visit_date='2024-02-01T09:00:00Z')
+        Appointment.objects.create(patient=other, doctor=doc, visit_date='2024-03-01T09:00:00Z')
+        for appt in (older, older, newer):
+            MedicineStockHistory.objects.create(medicine=med, add_remove=False, amount=2, appointment=appt)
+
+        # patient exists + count + visits with doctor/department + prescriptions with medicine
+        with self.assertNumQueries(4):
+            resp = self.client.get(f'/api/patients/{patient.id}/timeline/')
+        visits = resp.json()['results']
+        self.assertEqual([v['id'] for v in visits], [newer.id, older.id])
+        self.assertEqual(visits[0]['doctor']['department_name'], 'General')
+        self.assertEqual(len(visits[1]['prescriptions']), 2)
+        self.assertEqual(visits[1]['prescriptions'][0]['medicine_name'], 'Amoxicillin')
+
+        self.assertEqual(self.client.get('/api/patients/999999/timeline/').status_code, 404)
+
+    @mock.patch.object(PageOrCursorPagination, 'page_size', 2)
+    def test_cursor_pagination_of_list_and_timeline(self):
+        # neither request passes ?ordering=, so the keyset order comes from cursor_ordering
+        self.create_patients(3)
+        expected = list(Patient.objects.order_by('-id').values_list('id', flat=True))
+        seen = []
+        next_url = '/api/patients/?pagination=cursor'
+        while next_url:
+            resp = self.client.get(next_url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('count', resp.json())
+            seen.extend(p['id'] for p in resp.json()['results'])
+            next_url = resp.json()['next']
+        self.assertEqual(seen, expected)
+
+        patient = Patient.objects.order_by('id').first()
+        doc = Doctor.objects.create(department=Department.objects.create(department_name='General'), dob='1980-01-01', first_name='John', last_name='Doe', gender='Male', national_id='D1', expertise='General', doctor_level=DoctorLevel.objects.create(title='Senior'), active_status=DoctorActiveStatus.objects.create(status_name='Active'))
+        for day in (1, 2, 2):
+            Appointment.objects.create(patient=patient, doctor=doc, visit_date=f'2024-01-0{day}T09:00:00Z')
+        expected = list(Appointment.objects.order_by('-visit_date', '-id').values_list('id', flat=True))
+        seen = []
+        next_url = f'/api/patients/{patient.id}/timeline/?pagination=cursor'
+        while next_url:
+            resp = self.client.get(next_url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('count', resp.json())
+            seen.extend(v['id'] for v in resp.json()['results'])
+            next_url = resp.json()['next']
+        self.assertEqual(seen, expected)
+
+    @override_settings(ROOT_URLCONF='config.async_urls')
+    def test_async_timeline_matches_the_drf_action(self):
+        self.create_patients(1)
+        patient = Patient.objects.get()
+        doc = Doctor.objects.create(department=Department.objects.create(department_name='General'), dob='1980-01-01', first_name='John', last_name='Doe', gender='Male', national_id='D1', expertise='General', doctor_level=DoctorLevel.objects.create(title='Senior'), active_status=DoctorActiveStatus.objects.create(status_name='Active'))
+        med = Medicine.objects.create(medicine_name='Amoxicillin', medicine_type=TypeMedicineFunction.objects.create(name='Antibiotic'), medicine_administration_method=TypeMedicineAdministration.objects.create(name='Oral'), medicine_unit='tabs')
+        MedicineStockHistory.objects.create(medicine=med, add_remove=True, amount=100)
+        for day in (1, 2):
+            appt = Appointment.objects.create(patient=patient, doctor=doc, visit_date=f'2024-01-0{day}T09:00:00Z')
+            MedicineStockHistory.objects.create(medicine=med, add_remove=False, amount=2, appointment=appt)
+        headers = {'authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+        def get(path):
+            async def fetch():
+                return await self.async_client.get(path, headers=headers)
+            return async_to_sync(fetch)()
+
+        path = f'/api/patients/{patient.id}/timeline/'
+        with override_settings(ROOT_URLCONF='config.urls'):
+            expected = self.client.get(path).json()
+        # user + patient exists + count + visits + prescriptions
+        with self.assertNumQueries(5):
+            resp = get(path)
+        self.assertEqual(resp.json(), expected)
+        # keyset pages are left to the DRF action
+        self.assertNotIn('count', get(path + '?pagination=cursor').json())
+        self.assertEqual(get('/api/patients/999999/timeline/').status_code, 404)
+        self.assertEqual(get('/api/patients/abc/timeline/').status_code, 404)
+
+    def test_appointment_and_stock_history_filters(self):
+        self.create_patients(2)
+        patient, other = Patient.objects.order_by('id')
+        dept = Department.objects.create(department_name='General')
+        doc = Doctor.objects.create(department=dept, dob='1980-01-01', first_name='John', last_name='Doe', gender='Male', national_id='D1', expertise='General', doctor_level=DoctorLevel.objects.create(title='Senior'), active_status=DoctorActiveStatus.objects.create(status_name='Active'))
+        med = Medicine.objects.create(medicine_name='Amoxicillin', medicine_type=TypeMedicineFunction.objects.create(name='Antibiotic'), medicine_administration_method=TypeMedicineAdministration.objects.create(name='Oral'), medicine_unit='tabs')
+        MedicineStockHistory.objects.create(medicine=med, add_remove=True, amount=100)
+        mine = Appointment.objects.create(patient=patient, doctor=doc, visit_date='2024-01-15T09:00:00Z')
+        theirs = Appointment.objects.create(patient=other, doctor=doc, visit_date='2024-02-15T09:00:00Z')
+        MedicineStockHistory.objects.create(medicine=med, add_remove=False, amount=1, appointment=mine)
+        MedicineStockHistory.objects.create(medicine=med, add_remove=False, amount=1, appointment=theirs)
+
+        resp = self.client.get(f'/api/appointments/?patient={patient.id}')
+        self.assertEqual([a['id'] for a in resp.json()['results']], [mine.id])
+        resp = self.client.get(f'/api/appointments/?doctor={doc.id}&visit_date_after=2024-02-01&visit_date_before=2024-03-01')
+        self.assertEqual([a['id'] for a in resp.json()['results']], [theirs.id])
+
+        resp = self.client.get(f'/api/medicine-stock/?patient={patient.id}')
+        self.assertEqual([s['appointment'] for s in resp.json()['results']], [mine.id])
+        resp = self.client.get(f'/api/medicine-stock/?medicine={med.id}')
+        self.assertEqual(resp.json()['count'], 3)
+        resp = self.client.get(f'/api/prescriptions/?appointment={theirs.id}')
+        self.assertEqual(resp.json()['count'], 1)
+
+        resp = self.client.get('/api/appointments/?patient=abc&visit_date_after=yesterday')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(set(resp.json()), {'patient', 'visit_date_after'})
+
+    def test_search_ranks_exact_matches_before_prefixes(self):
+        def patient(first, last, phone, email=None):
+            return Patient.objects.create(first_name=first, middle_name='Van', last_name=last, phone=phone, email=email, dob='1990-01-01', gender='Male', biological_sex='M', first_visit_date='2024-01-01', last_visit_date='2024-01-01')
+
+        an = patient('Nguyen', 'An', '+84 912 345 678', 'nv.an@email.vn')
+        anh = patient('Nguyen', 'Anh', '0912-345-679')
+        binh = patient('Tran', 'Binh', '0933 000 111')
+        self.assertEqual(an.phone_normalized, '0912345678')
+
+        # exact query + prefix query
+        with self.assertNumQueries(2):
+            resp = self.client.get('/api/patients/search/?q=an')
+        results = resp.json()['results']
+        self.assertEqual([(r['id'], r['exact']) for r in results], [(an.id, True), (anh.id, False)])
+        self.assertEqual(results[0]['match'], 'name')
+
+        resp = self.client.get('/api/patients/search/?q=nguyen van anh')
+        self.assertEqual([r['id'] for r in resp.json()['results']], [anh.id])
+        resp = self.client.get('/api/patients/search/?q=0912 345 67')
+        self.assertEqual([r['id'] for r in resp.json()['results']], [an.id, anh.id])
+        resp = self.client.get('/api/patients/search/?q=0912345679')
+        self.assertEqual([(r['id'], r['match'], r['exact']) for r in resp.json()['results']], [(anh.id, 'phone', True)])
+        resp = self.client.get('/api/patients/search/?q=NV.AN@email.vn')
+        self.assertEqual([r['id'] for r in resp.json()['results']], [an.id])
+        resp = self.client.get('/api/patients/search/?q=nguyen&limit=1')
+        self.assertEqual(len(resp.json()['results']), 1)
+        self.assertEqual(self.client.get('/api/patients/search/?q=an&limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/patients/search/').json()['results'], [])
+
+        # the list's ?search= uses the same indexed predicates
+        resp = self.client.get('/api/patients/?search=tran')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [binh.id])
+
+        binh.phone = '+84 (98) 765-4321'
+        binh.save(update_fields=['phone'])
+        binh.refresh_from_db()
+        self.assertEqual(binh.phone_normalized, '0987654321')
+
+
+    def test_lookup_by_phone_or_document_number(self):
+        self.create_patients(2)
+        patient, other = Patient.objects.order_by('id')
+        patient.phone = '0912 345 678'
+        patient.save()
+        info = patient.patientpersonalinformation
+        info.passport_no = 'c1234567'
+        info.save()
+
+        # matching patients + core med info + emergency contacts
+        with self.assertNumQueries(3):
+            resp = self.client.get('/api/patients/lookup/?identifier=%2B84912345678')
+        results = resp.json()['results']
+        self.assertEqual([p['id'] for p in results], [patient.id])
+        self.assertEqual(results[0]['allergies'], ['Penicillin'])
+
+        for identifier in ('n1', 'N-1'):
+            resp = self.client.get(f'/api/patients/lookup/?identifier={identifier}')
+            self.assertEqual([p['id'] for p in resp.json()['results']], [other.id])
+        resp = self.client.get('/api/patients/lookup/?identifier=C 1234567')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [patient.id])
+        self.assertEqual(self.client.get('/api/patients/lookup/?identifier=0999999999').json()['results'], [])
+        self.assertEqual(self.client.get('/api/patients/lookup/').status_code, 400)
+
+        # changed and removed identifiers stop matching
+        info.passport_no = None
+        info.save()
+        self.assertEqual(self.client.get('/api/patients/lookup/?identifier=C1234567').json()['results'], [])
+        self.assertEqual(
+            set(PatientIdentifier.objects.filter(patient=patient).values_list('kind', flat=True)),
+            {'phone', 'nat_id'},
+        )
+
+        # rows written outside Django are picked up by the rebuild
+        Patient.objects.filter(pk=other.pk).update(phone='+84 933 000 111')
+        PatientIdentifier.objects.all().delete()
+        self.assertEqual(rebuild_patient_identifiers(), (1, 4))
+        resp = self.client.get('/api/patients/lookup/?identifier=0933000111')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [other.id])
+
+    def test_bulk_create_and_update(self):
+        items = [
+            {'first_name': f'Bulk{i}', 'last_name': 'Transfer', 'dob': '1990-01-01', 'gender': 'Female', 'biological_sex': 'F',
+             'phone': f'+84 90 000 000{i}', 'first_visit_date': '2024-01-01', 'last_visit_date': '2024-01-01',
+             'allergies': 'Penicillin, Latex', 'chronic_conditions': 'Asthma'}
+            for i in range(5)
+        ]
+        res = self.client.post('/api/patients/bulk/', data=items, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['created'], 5)
+        patient = Patient.objects.get(first_name='Bulk3')
+        self.assertEqual(patient.phone_normalized, '0900000003')
+        self.assertEqual(sorted(patient.core_med_info.values_list('information_type', 'note')), [(1, 'Latex'), (1, 'Penicillin'), (3, 'Asthma')])
+        resp = self.client.get('/api/patients/lookup/?identifier=0900000003')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [patient.id])
+
+        res = self.client.patch('/api/patients/bulk/', data=[
+            {'id': patient.id, 'phone': '0911 111 111'}, {'id': patient.id + 1, 'weight': 60},
+        ], format='json')
+        self.assertEqual(res.json(), {'updated': 2})
+        self.assertEqual(self.client.get('/api/patients/lookup/?identifier=0900000003').json()['results'], [])
+        resp = self.client.get('/api/patients/lookup/?identifier=0911111111')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [patient.id])
+        self.assertEqual(Patient.objects.get(pk=patient.id + 1).weight, 60)
+
+        res = self.client.post('/api/patients/bulk/', data=[items[0], {**items[1], 'dob': 'unknown'}], format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([e['index'] for e in res.json()['errors']], [1])
+        self.assertEqual(Patient.objects.count(), 5)
+
+    def test_bulk_create_reads_back_keys_the_insert_does_not_return(self):
+        if connection.vendor not in FIRST_INSERTED_KEY_SQL:
+            self.skipTest('only the MySQL and SQLite key readback is implemented')
+        self.create_patients(1)
+        items = [
+            {'first_name': f'Bulk{i}', 'last_name': 'Transfer', 'dob': '1990-01-01', 'gender': 'Female', 'biological_sex': 'F',
+             'phone': f'+84 90 000 000{i}', 'first_visit_date': '2024-01-01', 'last_visit_date': '2024-01-01',
+             'allergies': f'Allergy{i}'}
+            for i in range(5)
+        ]
+        # as on MySQL: one multi-row INSERT per batch, its keys counted from the first
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                mock.patch.object(PatientViewSet, 'bulk_batch_size', 2):
+            # savepoint and release, INSERT and key read per batch, the phone identifiers, the notes per batch
+            with self.assertNumQueries(2 + 3 * 2 + 2 + 3):
+                res = self.client.post('/api/patients/bulk/', data=items, format='json')
+        self.assertEqual(res.status_code, 201)
+        ids = res.json()['ids']
+        self.assertEqual(list(Patient.objects.filter(pk__in=ids).order_by('pk').values_list('first_name', flat=True)), [f'Bulk{i}' for i in range(5)])
+        self.assertEqual(
+            sorted(PatientCoreMedicalInformation.objects.filter(patient__in=ids).values_list('patient_id', 'note')),
+            [(pk, f'Allergy{i}') for i, pk in enumerate(ids)],
+        )
+        resp = self.client.get('/api/patients/lookup/?identifier=0900000004')
+        self.assertEqual([p['id'] for p in resp.json()['results']], [ids[4]])
+
+    def test_nested_rows_and_bulk_updates_change_the_etag(self):
+        self.create_patients(2)
+        patient = Patient.objects.first()
+
+        def revalidate(etag):
+            resp = self.client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag)
+            return resp.status_code, resp['ETag']
+
+        etag = self.client.get('/api/patients/')['ETag']
+        self.assertEqual(revalidate(etag), (304, etag))
+        # rows only nested in the payload: a deleted contact, an edited note
+        PatientEmergencyContact.objects.filter(patient=patient).delete()
+        status, etag = revalidate(etag)
+        self.assertEqual(status, 200)
+        note = patient.core_med_info.first()
+        note.note = 'Latex'
+        note.save()
+        status, etag = revalidate(etag)
+        self.assertEqual(status, 200)
+
+        # bulk_update() bypasses auto_now; BulkModelMixin sets updated_at itself
+        self.client.patch('/api/patients/bulk/', data=[{'id': patient.id, 'weight': 70}], format='json')
+        status, etag = revalidate(etag)
+        self.assertEqual(status, 200)
+        self.assertEqual(revalidate(etag), (304, etag))
+
+class ImportHmsDataTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.level = DoctorLevel.objects.create(title='Senior')
+        self.status = DoctorActiveStatus.objects.create(status_name='Active')
+        self.dept = Department.objects.create(department_name='General')
+        med_type = TypeMedicineFunction.objects.create(name='Generic')
+        med_admin = TypeMedicineAdministration.objects.create(name='Oral')
+        self.medicine = Medicine.objects.create(medicine_name='Paracetamol', medicine_unit='tablets', medicine_type=med_type, medicine_administration_method=med_admin)
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text)
+        return f'{path.stem}={path}'
+
+    def import_data(self, *sources, **options):
+        out = StringIO()
+        call_command('import_hms_data', *sources, stdout=out, **options)
+        return out.getvalue()
+
+    def test_imports_csv_and_ndjson_and_rebuilds_derived_tables(self):
+        doctors = self.write('doctors.csv', (
+            'id,department_id,dob,first_name,last_name,gender,national_id,expertise,doctor_level_id,active_status_id\n'
+            f'71,{self.dept.id},1980-01-01,Minh,Tran,Male,D71,General,{self.level.id},{self.status.id}\n'
+        ))
+        patients = self.write('patients.ndjson', ''.join(json.dumps({
+            'id': 500 + i, 'first_name': f'Import{i}', 'last_name': 'Legacy', 'dob': '1990-01-01', 'gender': 'Female',
+            'biological_sex': 'F', 'phone': f'+84 90 111 222{i}', 'first_visit_date': '2024-01-01', 'last_visit_date': '2024-01-01',
+        }) + '\n' for i in range(3)))
+        # the appointment export's columns import as they are
+        appointments = self.write('appointments.csv', (
+            'id,patient_id,doctor_id,visit_date,diagnosis,category,note\n'
+            '9001,500,71,2024-03-01T09:00:00+07:00,Flu,,\n'
+            '9002,501,71,2024-03-01 10:00,Flu,,Walk-in\n'
+        ))
+        stock = self.write('stock.csv', (
+            'medicine,add_remove,amount,appointment,note\n'
+            f'{self.medicine.id},True,10,,Opening stock\n'
+            f'{self.medicine.id},False,3,9001,Prescription\n'
+        ))
+        # given out of order: doctors and patients load before the rows that reference them
+        out = self.import_data(stock, appointments, patients, doctors, batch_size=2)
+        self.assertIn('appointments: imported 2 row(s)', out)
+        self.assertIn('rows/s', out)
+
+        self.assertEqual(Appointment.objects.get(pk=9002).note, 'Walk-in')
+        self.assertEqual(Patient.objects.get(pk=502).phone_normalized, '0901112222')
+        self.assertTrue(PatientIdentifier.objects.filter(patient_id=501, kind='phone').exists())
+        self.assertEqual(list(DailyAppointmentStat.objects.values_list('doctor_id', 'appointment_count')), [(71, 2)])
+        self.assertEqual(MedicineStockBalance.objects.get(medicine=self.medicine).current_stock, 7)
+        # sequences continue after the imported ids
+        self.assertGreater(Patient.objects.create(first_name='New', last_name='Patient', dob='1990-01-01', gender='Male', biological_sex='M', first_visit_date='2024-01-01', last_visit_date='2024-01-01').pk, 502)
+
+    def test_resumes_from_checkpoint_after_a_failed_batch(self):
+        Patient.objects.create(id=500, first_name='A', last_name='B', dob='1990-01-01', gender='Female', biological_sex='F', first_visit_date='2024-01-01', last_visit_date='2024-01-01')
+        Doctor.objects.create(id=71, department=self.dept, dob='1980-01-01', first_name='Minh', gender='Male', national_id='D71', expertise='General', doctor_level=self.level, active_status=self.status)
+        rows = [f'500,71,2024-03-0{day} 09:00' for day in range(1, 6)]
+        rows[2] = '500,71,someday'
+        appointments = self.write('appointments.csv', 'patient,doctor,visit_date\n' + '\n'.join(rows) + '\n')
+        checkpoint = self.dir / 'import.json'
+
+        with self.assertRaisesMessage(CommandError, 'row 3: visit_date'):
+            self.import_data(appointments, batch_size=2, checkpoint=checkpoint)
+        self.assertEqual(Appointment.objects.count(), 2)
+        self.assertEqual(json.loads(checkpoint.read_text())['appointments']['rows'], 2)
+
+        rows[2] = '500,71,2024-03-03 09:00'
+        self.write('appointments.csv', 'patient,doctor,visit_date\n' + '\n'.join(rows) + '\n')
+        out = self.import_data(appointments, batch_size=2, checkpoint=checkpoint)
+        self.assertIn('resuming after 2 row(s)', out)
+        self.assertEqual(
+            sorted(Appointment.objects.values_list('visit_date__day', flat=True)), [1, 2, 3, 4, 5]
+        )
+
+    def test_defer_indexes_recreates_them(self):
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite cannot alter tables inside the test transaction')
+        patients = self.write('patients.csv', (
+            'first_name,last_name,dob,gender,biological_sex,first_visit_date,last_visit_date\n'
+            'Import,Legacy,1990-01-01,Female,F,2024-01-01,2024-01-01\n'
+        ))
+        self.import_data(patients, defer_indexes=True)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Patient._meta.db_table)
+        self.assertTrue({index.name for index in Patient._meta.indexes} <= set(constraints))
+
+
+class PatientSearchPlanTest(QueryPlanMixin, TestCase):
+    table = Patient._meta.db_table
+
+    @classmethod
+    def setUpTestData(cls):
+        Patient.objects.bulk_create([
+            Patient(first_name=f'P{i}', last_name='Plan', phone_normalized=f'09{i:08d}', email=f'p{i}@email.vn', dob='1990-05-05', gender='Female', biological_sex='F', first_visit_date='2023-01-01', last_visit_date='2023-01-01')
+            for i in range(300)
+        ])
+
+    def test_phone_lookups(self):
+        for term in ('0900000042', '090 000 004'):
+            match, exact, prefix = search_tiers(term)
+            self.assertIndexed(Patient.objects.filter(exact))
+            self.assertIndexed(Patient.objects.filter(prefix).order_by('phone_normalized'), ordered=True)
+            # PostgreSQL adds an incremental sort for the id tie-break within equal phones
+            self.assertIndexed(Patient.objects.filter(prefix).order_by('phone_normalized', 'id'))
+
+    def test_name_and_email_lookups(self):
+        # case-insensitive LIKE 'x%' only walks a B-tree under MySQL's case-insensitive collations
+        if connection.vendor != 'mysql':
+            self.skipTest('istartswith is not index-backed on this backend')
+        for term in ('plan', 'p4 plan', 'p42@email'):
+            match, exact, prefix = search_tiers(term)
+            self.assertIndexed(Patient.objects.filter(prefix))
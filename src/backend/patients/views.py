@@ -1,17 +1,81 @@
 from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
+from django.db.models import Prefetch
 from django.db.models.deletion import ProtectedError
-from .models import Patient, PatientCoreMedicalInformation
-from .serializers import PatientSerializer
+from django.http import Http404
+from rest_framework.exceptions import NotFound, ValidationError
+from appointments.models import Appointment
+from config.asyncviews import AsyncReadView
+from config.bulk import BulkModelMixin, bulk_create_with_keys
+from config.conditional import ConditionalGetMixin
+from config.export import ExportMixin
+from config.filters import parse_id
+from config.pagination import PageOrCursorPagination
+from pharmacy.models import MedicineStockHistory
+from .identifiers import lookup_hashes, sync_phone_identifiers
+from .models import Patient, PatientCoreMedicalInformation, PatientIdentifier
+from .search import PatientSearchFilter, normalize_phone, search_patients
+from .serializers import PatientSearchResultSerializer, PatientSerializer, PatientTimelineVisitSerializer
 
 
-class PatientViewSet(viewsets.ModelViewSet):
-    queryset = Patient.objects.all().order_by('-last_visit_date')
+ALLERGY = 1
+MEDICAL_CONDITION = 3
+
+
+def core_medical_notes(patient, allergies, chronic_conditions):
+    """Unsaved PatientCoreMedicalInformation rows for comma-separated allergies and conditions"""
+    notes = []
+    for information_type, text in ((ALLERGY, allergies), (MEDICAL_CONDITION, chronic_conditions)):
+        for note in (text or '').split(','):
+            if note.strip():
+                notes.append(PatientCoreMedicalInformation(
+                    patient=patient, information_type=information_type, note=note.strip()
+                ))
+    return notes
+
+
+def timeline_visits(patient_id):
+    """A patient's visits, newest first, with doctor, department and dispensed medicine loaded"""
+    return (
+        Appointment.objects.filter(patient_id=patient_id)
+        .select_related('doctor__department')
+        .prefetch_related(Prefetch(
+            'stock_history',
+            queryset=MedicineStockHistory.objects.filter(add_remove=False).select_related('medicine'),
+            to_attr='prescriptions',
+        ))
+        .order_by('-visit_date')
+    )
+
+
+async def patient_exists(pk):
+    try:
+        return await Patient.objects.filter(pk=pk).aexists()
+    except (TypeError, ValueError):
+        return False
+
+
+class PatientViewSet(ConditionalGetMixin, BulkModelMixin, ExportMixin, viewsets.ModelViewSet):
+    # Load everything PatientSerializer nests up front so a page costs a fixed number of queries
+    queryset = (
+        Patient.objects.select_related('patientpersonalinformation')
+        .prefetch_related('core_med_info', 'emergency_contacts')
+        .order_by('-last_visit_date')
+    )
     serializer_class = PatientSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['first_name', 'last_name', 'phone', 'email']
+    conditional_related = ('patientpersonalinformation', 'core_med_info', 'emergency_contacts')
+    cursor_ordering = '-id'
+    identifier_lookup_limit = 10  # patients sharing one phone number, e.g. a family
+    filter_backends = [PatientSearchFilter, filters.OrderingFilter]
     ordering_fields = ['last_visit_date', 'first_name', 'last_name']
+    export_name = 'patients'
+    export_fields = (
+        'id', 'first_name', 'middle_name', 'last_name', 'dob', 'gender', 'biological_sex', 'phone', 'email',
+        'first_visit_date', 'last_visit_date', 'insurance_id', 'insurance_provider', 'blood_type',
+    )
 
     def destroy(self, request, *args, **kwargs):
         """Delete patient with custom error message"""
@@ -23,6 +87,45 @@ class PatientViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked patient lookup by phone, email or name for reception (`?q=`, `?limit=`)"""
+        try:
+            limit = min(parse_id(request.query_params.get('limit', 20)), 50)
+        except (TypeError, ValueError):
+            raise ValidationError({'limit': ['Must be a positive integer.']})
+        patients = search_patients(Patient.objects.all(), request.query_params.get('q'), limit)
+        return Response({'results': PatientSearchResultSerializer(patients, many=True).data})
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """Returning patients by phone, national ID, passport or driver's license number.
+
+        One indexed query on the hashed identifiers picks the patients (most recent visit
+        first); their full profiles are then loaded with the list's prefetches.
+        """
+        hashes = lookup_hashes(request.query_params.get('identifier'))
+        if not hashes:
+            raise ValidationError({'identifier': ['This parameter is required.']})
+        matches = PatientIdentifier.objects.filter(value_hash__in=hashes).values('patient_id')
+        patients = self.get_queryset().filter(pk__in=matches)[:self.identifier_lookup_limit]
+        return Response({'results': self.get_serializer(patients, many=True).data})
+
+    @action(detail=True, methods=['get'], cursor_ordering=('-visit_date', '-id'))
+    def timeline(self, request, pk=None):
+        """A patient's visits, newest first, each with its prescriptions"""
+        try:
+            exists = Patient.objects.filter(pk=pk).exists()
+        except (TypeError, ValueError):
+            exists = False
+        if not exists:
+            raise Http404
+        visits = timeline_visits(pk)
+        page = self.paginate_queryset(visits)
+        if page is not None:
+            return self.get_paginated_response(PatientTimelineVisitSerializer(page, many=True).data)
+        return Response(PatientTimelineVisitSerializer(visits, many=True).data)
+
     def create(self, request, *args, **kwargs):
         """Create patient and associated medical information"""
         # Extract allergies and chronic_conditions from request
@@ -34,25 +137,48 @@ class PatientViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         patient = serializer.save()
 
-        # Create allergies records
-        if allergies:
-            allergy_list = [a.strip() for a in allergies.split(',') if a.strip()]
-            for allergy in allergy_list:
-                PatientCoreMedicalInformation.objects.create(
-                    patient=patient,
-                    information_type=1,  # Allergies
-                    note=allergy
-                )
-
-        # Create chronic conditions records
-        if chronic_conditions:
-            condition_list = [c.strip() for c in chronic_conditions.split(',') if c.strip()]
-            for condition in condition_list:
-                PatientCoreMedicalInformation.objects.create(
-                    patient=patient,
-                    information_type=3,  # Medical Condition
-                    note=condition
-                )
+        PatientCoreMedicalInformation.objects.bulk_create(
+            core_medical_notes(patient, allergies, chronic_conditions)
+        )
 
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def perform_bulk_create(self, instances, serializer):
+        """Insert patients with their allergy/condition notes (same fields as create) and phone identifiers"""
+        for patient in instances:
+            patient.phone_normalized = normalize_phone(patient.phone)
+        # the notes and identifiers need the keys MySQL does not report
+        bulk_create_with_keys(Patient, instances, self.bulk_batch_size)
+        sync_phone_identifiers(instances)
+        PatientCoreMedicalInformation.objects.bulk_create([
+            note
+            for patient, item in zip(instances, serializer.initial_data)
+            for note in core_medical_notes(patient, item.get('allergies'), item.get('chronic_conditions'))
+        ], batch_size=self.bulk_batch_size)
+
+    def perform_bulk_update(self, changes):
+        for patient, attrs in changes:
+            if 'phone' in attrs:
+                attrs['phone_normalized'] = normalize_phone(attrs['phone'])
+        super().perform_bulk_update(changes)
+        sync_phone_identifiers([patient for patient, attrs in changes if 'phone' in attrs])
+
+
+class AsyncPatientTimeline(AsyncReadView):
+    """`GET /api/patients/<pk>/timeline/` for the ASGI profile, its count and page queried together"""
+    fallback = staticmethod(PatientViewSet.as_view(
+        {'get': 'timeline'}, basename='patient', detail=True, **PatientViewSet.timeline.kwargs
+    ))
+
+    def handles(self, request):
+        # keyset pages stay on the DRF action
+        return not (
+            request.GET.get(PageOrCursorPagination.mode_query_param) == PageOrCursorPagination.cursor_mode
+            or CursorPagination.cursor_query_param in request.GET
+        )
+
+    async def get(self, request, pk):
+        if not await patient_exists(pk):
+            raise NotFound()
+        return self.render(await self.paginate(request, timeline_visits(pk), PatientTimelineVisitSerializer))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Medicine, MedicineStockHistory
+from .models import Medicine, MedicineStockHistory, MedicineStockBalance
 
 
 @admin.register(Medicine)
@@ -10,3 +10,8 @@ class MedicineAdmin(admin.ModelAdmin):
 @admin.register(MedicineStockHistory)
 class MedicineStockHistoryAdmin(admin.ModelAdmin):
     list_display = ('id', 'medicine', 'add_remove', 'amount', 'appointment_id')
+
+
+@admin.register(MedicineStockBalance)
+class MedicineStockBalanceAdmin(admin.ModelAdmin):
+    list_display = ('medicine', 'current_stock')
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class PharmacyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pharmacy"
+
+    def ready(self):
+        from config.reference import REFERENCE_DATA
+        from . import signals  # noqa: F401
+        from .models import TypeCoreMedInfo, TypeMedicineAdministration, TypeMedicineFunction
+
+        REFERENCE_DATA.register(TypeMedicineFunction, TypeMedicineAdministration, TypeCoreMedInfo)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from pharmacy.stock import rebuild_stock_balances
+
+
+class Command(BaseCommand):
+    help = 'Recompute MedicineStockBalance from the MedicineStockHistory ledger and fix any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medicine', type=int, action='append', dest='medicine_ids',
+                            help='Only reconcile this medicine id (repeatable).')
+
+    def handle(self, *args, **options):
+        checked, corrected = rebuild_stock_balances(options['medicine_ids'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} medicine balance(s), corrected {corrected}.'
+        ))
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_balances(apps, schema_editor):
+    MedicineStockHistory = apps.get_model("pharmacy", "MedicineStockHistory")
+    MedicineStockBalance = apps.get_model("pharmacy", "MedicineStockBalance")
+    totals = (
+        MedicineStockHistory.objects.order_by()
+        .values("medicine_id")
+        .annotate(
+            total=models.Sum(
+                models.Case(
+                    models.When(add_remove=True, then=models.F("amount")),
+                    models.When(add_remove=False, then=models.F("amount") * -1),
+                    output_field=models.IntegerField(),
+                )
+            )
+        )
+    )
+    MedicineStockBalance.objects.bulk_create(
+        [
+            MedicineStockBalance(
+                medicine_id=row["medicine_id"], current_stock=row["total"] or 0
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pharmacy", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MedicineStockBalance",
+            fields=[
+                (
+                    "medicine",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stock_balance",
+                        serialize=False,
+                        to="pharmacy.medicine",
+                    ),
+                ),
+                ("current_stock", models.IntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Medicine Stock Balance",
+                "verbose_name_plural": "Medicine Stock Balances",
+                "db_table": "MedicineStockBalance",
+                "indexes": [
+                    models.Index(
+                        fields=["current_stock"], name="MedicineSto_current_974870_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pharmacy", "0002_medicinestockbalance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="medicine",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="medicinestockbalance",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="medicinestockhistory",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 
 class TypeCoreMedInfo(models.Model):
@@ -37,6 +37,7 @@ class Medicine(models.Model):
     medicine_type = models.ForeignKey(TypeMedicineFunction, on_delete=models.PROTECT, blank=True, null=True)
     medicine_administration_method = models.ForeignKey(TypeMedicineAdministration, on_delete=models.PROTECT, blank=True, null=True)
     medicine_unit = models.CharField(max_length=20)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'Medicine'
@@ -60,9 +61,67 @@ class MedicineStockHistory(models.Model):
         related_name='stock_history'
     )
     note = models.CharField(max_length=255, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'MedicineStockHistory'
         ordering = ['-id']  # Newest first (latest stock first)
         verbose_name = 'Medicine Stock History'
         verbose_name_plural = 'Medicine Stock History'
+
+    @property
+    def signed_amount(self):
+        """Stock delta of this movement (positive for add, negative for remove)"""
+        return self.amount if self.add_remove else -self.amount
+
+    def save(self, *args, **kwargs):
+        """Save the ledger row and adjust MedicineStockBalance in the same transaction.
+
+        The affected balance rows are locked (SELECT ... FOR UPDATE) before writing, so a
+        removal is checked against a balance that no concurrent writer can change until commit.
+        """
+        from .stock import InsufficientStock, apply_stock_delta, lock_stock_balances
+
+        with transaction.atomic():
+            deltas = {self.medicine_id: self.signed_amount}
+            if self.pk is not None:
+                previous = (
+                    MedicineStockHistory.objects.filter(pk=self.pk)
+                    .values('medicine_id', 'add_remove', 'amount')
+                    .first()
+                )
+                if previous is not None:
+                    old_delta = previous['amount'] if previous['add_remove'] else -previous['amount']
+                    deltas[previous['medicine_id']] = deltas.get(previous['medicine_id'], 0) - old_delta
+            deltas = {medicine_id: delta for medicine_id, delta in deltas.items() if delta}
+
+            balances = lock_stock_balances(deltas)
+            for medicine_id, delta in deltas.items():
+                if delta < 0 and balances[medicine_id] + delta < 0:
+                    raise InsufficientStock(medicine_id, balances[medicine_id], -delta)
+
+            super().save(*args, **kwargs)
+            for medicine_id, delta in deltas.items():
+                apply_stock_delta(medicine_id, delta)
+
+
+class MedicineStockBalance(models.Model):
+    """Running stock total per medicine, kept in step with MedicineStockHistory"""
+    medicine = models.OneToOneField(
+        Medicine,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stock_balance'
+    )
+    current_stock = models.IntegerField(default=0)
+    # set explicitly by the QuerySet.update() calls in pharmacy.stock, which skip auto_now
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'MedicineStockBalance'
+        indexes = [models.Index(fields=['current_stock'])]
+        verbose_name = 'Medicine Stock Balance'
+        verbose_name_plural = 'Medicine Stock Balances'
+
+    def __str__(self):
+        return f"{self.medicine_id}: {self.current_stock}"
@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from appointments.models import Appointment
+from config.reference import ReferencePrimaryKeyRelatedField
 from .models import Medicine, MedicineStockHistory, TypeMedicineFunction, TypeMedicineAdministration
+from .stock import InsufficientStock
 
 
 class TypeMedicineFunctionSerializer(serializers.ModelSerializer):
@@ -15,12 +18,38 @@ class TypeMedicineAdministrationSerializer(serializers.ModelSerializer):
 
 
 class MedicineSerializer(serializers.ModelSerializer):
+    # medicine_type and medicine_administration_method are validated against the cached lookup tables
+    serializer_related_field = ReferencePrimaryKeyRelatedField
+    # Read from the maintained balance row instead of summing the ledger
+    current_stock = serializers.SerializerMethodField()
+
     class Meta:
         model = Medicine
         fields = '__all__'
 
+    def get_current_stock(self, obj):
+        """Return current stock level (0 if the medicine has no stock movements yet)"""
+        balance = getattr(obj, 'stock_balance', None)
+        return balance.current_stock if balance is not None else 0
+
+
+class StockMovementSerializerMixin:
+    """Report removals that would overdraw stock as validation errors"""
+
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except InsufficientStock as exc:
+            raise serializers.ValidationError({'amount': [str(exc)]})
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except InsufficientStock as exc:
+            raise serializers.ValidationError({'amount': [str(exc)]})
 
-class MedicineStockHistorySerializer(serializers.ModelSerializer):
+
+class MedicineStockHistorySerializer(StockMovementSerializerMixin, serializers.ModelSerializer):
     # Return medicine as ID for frontend stock calculation
     medicine = serializers.IntegerField(source='medicine.id', read_only=True)
     medicine_name = serializers.CharField(source='medicine.medicine_name', read_only=True)
@@ -38,4 +67,34 @@ class MedicineStockHistorySerializer(serializers.ModelSerializer):
         fields = [
             'id', 'medicine', 'medicine_name', 'medicine_id',
             'add_remove', 'amount', 'appointment', 'note'
-        ]
\ No newline at end of file
+        ]
+
+
+class PrescriptionSerializer(StockMovementSerializerMixin, serializers.ModelSerializer):
+    """A stock removal dispensed against an appointment"""
+    medicine = serializers.PrimaryKeyRelatedField(queryset=Medicine.objects.all())
+    medicine_name = serializers.CharField(source='medicine.medicine_name', read_only=True)
+    appointment_id = serializers.PrimaryKeyRelatedField(
+        queryset=Appointment.objects.all(),
+        source='appointment',
+        required=True
+    )
+    amount = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = MedicineStockHistory
+        fields = ['id', 'medicine', 'medicine_name', 'appointment_id', 'amount', 'note']
+
+    def create(self, validated_data):
+        return super().create(self.prescription_data(validated_data))
+
+    def build_instance(self, validated_data):
+        """Unsaved removal for BulkListSerializer"""
+        return MedicineStockHistory(**self.prescription_data(validated_data))
+
+    @staticmethod
+    def prescription_data(validated_data):
+        validated_data['add_remove'] = False
+        if not validated_data.get('note'):
+            validated_data['note'] = 'Prescription'
+        return validated_data
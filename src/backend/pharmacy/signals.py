@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from .models import MedicineStockHistory
+
+# Sent inside the transaction after record_stock_movements bulk-inserts ledger rows, which
+# skips the model save signals; `movements` are the inserted rows.
+stock_movements_recorded = Signal()
+
+
+@receiver(post_delete, sender=MedicineStockHistory)
+def reverse_deleted_stock_movement(sender, instance, **kwargs):
+    """Take a deleted ledger row back out of the medicine's balance.
+
+    Runs inside the deletion transaction. A missing balance row is left alone: it is either
+    being cascaded away with its medicine or will be recreated by rebuild_stock_balances.
+    """
+    from .stock import apply_stock_delta
+
+    apply_stock_delta(instance.medicine_id, -instance.signed_amount)
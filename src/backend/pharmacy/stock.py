@@ -0,0 +1,167 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Sum, Case, When, IntegerField, F
+from django.utils import timezone
+
+from .models import MedicineStockHistory, MedicineStockBalance
+from .signals import stock_movements_recorded
+
+
+def ledger_stock_sum():
+    """Aggregate expression summing a MedicineStockHistory queryset into a stock level"""
+    return Sum(
+        Case(
+            When(add_remove=True, then=F('amount')),
+            When(add_remove=False, then=F('amount') * -1),
+            output_field=IntegerField(),
+        )
+    )
+
+
+class InsufficientStock(Exception):
+    """Raised when a stock removal would take a medicine below zero"""
+
+    def __init__(self, medicine_id, available, requested):
+        self.medicine_id = medicine_id
+        self.available = available
+        self.requested = requested
+        super().__init__(
+            f'Insufficient medicine stock: {available} available, {requested} requested.'
+        )
+
+
+class InsufficientStockBatch(Exception):
+    """Raised when removals in a batch would overdraw; errors maps position to InsufficientStock"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} removal(s) exceed the available stock.')
+
+
+def lock_stock_balances(medicine_ids):
+    """Lock the balance rows of the given medicines and return {medicine_id: current_stock}.
+
+    Rows are locked in id order so concurrent multi-medicine writers cannot deadlock.
+    A medicine without a balance row yet (e.g. loaded by the SQL scripts) gets one seeded
+    from its ledger first. Must be called inside a transaction.
+    """
+    medicine_ids = sorted(set(medicine_ids))
+    if not medicine_ids:
+        return {}
+
+    def select_locked(ids):
+        return dict(
+            MedicineStockBalance.objects.select_for_update()
+            .filter(medicine_id__in=ids)
+            .order_by('medicine_id')
+            .values_list('medicine_id', 'current_stock')
+        )
+
+    balances = select_locked(medicine_ids)
+    missing = [medicine_id for medicine_id in medicine_ids if medicine_id not in balances]
+    for medicine_id in missing:
+        total = MedicineStockHistory.objects.filter(medicine_id=medicine_id).aggregate(
+            total=ledger_stock_sum()
+        )['total'] or 0
+        MedicineStockBalance.objects.get_or_create(
+            medicine_id=medicine_id, defaults={'current_stock': total}
+        )
+    if missing:
+        balances.update(select_locked(missing))
+    return balances
+
+
+def apply_stock_delta(medicine_id, delta):
+    """Add delta to the stored balance of a medicine.
+
+    Must run inside the transaction that wrote the ledger row so the two never diverge.
+    A missing balance row is left alone; rebuild_stock_balances recreates it.
+    """
+    if delta:
+        MedicineStockBalance.objects.filter(medicine_id=medicine_id).update(
+            current_stock=F('current_stock') + delta, updated_at=timezone.now()
+        )
+
+
+def record_stock_movement(medicine_id, add_remove, amount, appointment=None, note=None):
+    """Write one ledger row; removals raise InsufficientStock instead of overdrawing"""
+    return MedicineStockHistory.objects.create(
+        medicine_id=medicine_id,
+        add_remove=add_remove,
+        amount=amount,
+        appointment=appointment,
+        note=note,
+    )
+
+
+def record_stock_movements(movements, batch_size=500):
+    """Insert unsaved ledger rows with one bulk insert and move their balances.
+
+    Removals are checked in order against the running balance of their medicine, so a batch
+    may restock and then dispense. Every removal that would overdraw is reported at once in
+    InsufficientStockBatch and nothing is written. Must be called inside a transaction.
+    """
+    balances = lock_stock_balances(movement.medicine_id for movement in movements)
+    added = Counter()
+    removed = Counter()
+    errors = {}
+    for position, movement in enumerate(movements):
+        available = balances[movement.medicine_id] + added[movement.medicine_id] - removed[movement.medicine_id]
+        if movement.add_remove:
+            added[movement.medicine_id] += movement.amount
+        elif movement.amount > available:
+            errors[position] = InsufficientStock(movement.medicine_id, available, movement.amount)
+        else:
+            removed[movement.medicine_id] += movement.amount
+    if errors:
+        raise InsufficientStockBatch(errors)
+
+    # MySQL's trg_PreventNegativeMedicineStock checks each removal against the stored balance,
+    # so restocks are applied before the insert and removals after it
+    for medicine_id, amount in added.items():
+        apply_stock_delta(medicine_id, amount)
+    MedicineStockHistory.objects.bulk_create(movements, batch_size=batch_size)
+    for medicine_id, amount in removed.items():
+        apply_stock_delta(medicine_id, -amount)
+    stock_movements_recorded.send(sender=MedicineStockHistory, movements=movements)
+    return movements
+
+
+def rebuild_stock_balances(medicine_ids=None):
+    """Recompute balances from the ledger and fix any that drifted.
+
+    Returns a tuple (checked, corrected).
+    """
+    ledger = MedicineStockHistory.objects.all()
+    balances = MedicineStockBalance.objects.all()
+    if medicine_ids is not None:
+        ledger = ledger.filter(medicine_id__in=medicine_ids)
+        balances = balances.filter(medicine_id__in=medicine_ids)
+
+    totals = {
+        row['medicine_id']: row['total'] or 0
+        for row in ledger.order_by().values('medicine_id').annotate(total=ledger_stock_sum())
+    }
+
+    corrected = 0
+    with transaction.atomic():
+        stored = dict(balances.select_for_update().values_list('medicine_id', 'current_stock'))
+
+        to_create = [
+            MedicineStockBalance(medicine_id=medicine_id, current_stock=total)
+            for medicine_id, total in totals.items()
+            if medicine_id not in stored
+        ]
+        MedicineStockBalance.objects.bulk_create(to_create, batch_size=1000)
+        corrected += len(to_create)
+
+        for medicine_id, current_stock in stored.items():
+            expected = totals.get(medicine_id, 0)
+            if current_stock != expected:
+                MedicineStockBalance.objects.filter(medicine_id=medicine_id).update(
+                    current_stock=expected, updated_at=timezone.now()
+                )
+                corrected += 1
+
+    return len(set(totals) | set(stored)), corrected
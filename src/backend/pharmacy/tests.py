@@ -1,9 +1,18 @@
-from django.test import TestCase
+import json
+import threading
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from doctors.models import DoctorLevel, DoctorActiveStatus, Department, Doctor
 from patients.models import Patient
-from pharmacy.models import Medicine, MedicineStockHistory, TypeMedicineFunction, TypeMedicineAdministration
+from appointments.models import Appointment
+from config.pagination import PageOrCursorPagination
+from pharmacy.models import Medicine, MedicineStockHistory, MedicineStockBalance, TypeMedicineFunction, TypeMedicineAdministration
+from pharmacy.stock import InsufficientStock, ledger_stock_sum, record_stock_movement
 from django.db import models
 
 class PrescriptionTestCase(TestCase):
@@ -56,3 +65,242 @@ class PrescriptionTestCase(TestCase):
         self.assertEqual(res.status_code, 201)
         current_stock = MedicineStockHistory.objects.filter(medicine=self.m).aggregate(total=models.Sum(models.Case(models.When(add_remove=True, then='amount'), models.When(add_remove=False, then=models.F('amount') * -1), output_field=models.IntegerField())))['total']
         self.assertEqual(current_stock, 15)
+
+
+    def test_bulk_stock_movements_and_prescriptions(self):
+        appt = Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date='2023-12-21T09:00:00Z')
+        # restock then dispense in one batch: the running balance allows it
+        res = self.client.post('/api/medicine-stock/bulk/', data=[
+            {'medicine_id': self.m.id, 'add_remove': True, 'amount': 5},
+            {'medicine': self.m.id, 'add_remove': False, 'amount': 15, 'appointment': appt.id},
+        ], format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(MedicineStockBalance.objects.get(medicine=self.m).current_stock, 0)
+
+        res = self.client.post('/api/medicine-stock/bulk/', data=[
+            {'medicine_id': self.m.id, 'add_remove': True, 'amount': 4},
+            {'medicine_id': self.m.id, 'add_remove': False, 'amount': 3, 'appointment': appt.id},
+            {'medicine_id': self.m.id, 'add_remove': False, 'amount': 2, 'appointment': appt.id},
+        ], format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()['errors'], [{'index': 2, 'errors': {'amount': ['Insufficient medicine stock: 1 available, 2 requested.']}}])
+        self.assertEqual(MedicineStockHistory.objects.count(), 3)
+        self.assertEqual(MedicineStockBalance.objects.get(medicine=self.m).current_stock, 0)
+
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=10)
+        res = self.client.post('/api/prescriptions/bulk/', data=[
+            {'appointment_id': appt.id, 'medicine': self.m.id, 'amount': 2},
+            {'appointment_id': appt.id, 'medicine': self.m.id, 'amount': 3, 'note': 'Night'},
+        ], format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            list(MedicineStockHistory.objects.filter(add_remove=False, amount__lt=15).order_by('id').values_list('amount', 'note')),
+            [(2, 'Prescription'), (3, 'Night')],
+        )
+        self.assertEqual(MedicineStockBalance.objects.get(medicine=self.m).current_stock, 5)
+        self.assertEqual(self.client.patch('/api/prescriptions/bulk/', data=[], format='json').status_code, 405)
+
+    def test_export_stock_ledger_as_ndjson(self):
+        appt = Appointment.objects.create(patient=self.patient, doctor=self.doc, visit_date='2023-12-21T09:00:00Z')
+        row = record_stock_movement(self.m.id, False, 3, appointment=appt, note='Prescription')
+        res = self.client.get(f'/api/medicine-stock/export/?format=ndjson&patient={self.patient.id}')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [{
+            'id': row.id, 'medicine_id': self.m.id, 'medicine_medicine_name': 'Paracetamol',
+            'add_remove': False, 'amount': 3, 'appointment_id': appt.id, 'note': 'Prescription',
+        }])
+
+class StockBalanceTestCase(TestCase):
+    def setUp(self):
+        TypeMedicineFunction.objects.get_or_create(id=1, defaults={'name': 'Generic'})
+        TypeMedicineAdministration.objects.get_or_create(id=1, defaults={'name': 'Oral'})
+        self.m = Medicine.objects.create(medicine_name='Ibuprofen', medicine_unit='tablets', medicine_type_id=1, medicine_administration_method_id=1)
+        self.other = Medicine.objects.create(medicine_name='Amoxicillin', medicine_unit='capsules', medicine_type_id=1, medicine_administration_method_id=1)
+
+    def balance(self, medicine):
+        return MedicineStockBalance.objects.get(medicine=medicine).current_stock
+
+    def test_balance_follows_ledger_writes(self):
+        entry = MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=10)
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=False, amount=4)
+        self.assertEqual(self.balance(self.m), 6)
+
+        # edit amount, then move the entry to another medicine
+        entry.amount = 12
+        entry.save()
+        self.assertEqual(self.balance(self.m), 8)
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=5)
+        entry.medicine = self.other
+        entry.save()
+        self.assertEqual(self.balance(self.m), 1)
+        self.assertEqual(self.balance(self.other), 12)
+
+        entry.delete()
+        self.assertEqual(self.balance(self.other), 0)
+        MedicineStockHistory.objects.filter(medicine=self.m).delete()
+        self.assertEqual(self.balance(self.m), 0)
+
+    def test_removal_cannot_overdraw(self):
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=3)
+        with self.assertRaises(InsufficientStock):
+            MedicineStockHistory.objects.create(medicine=self.m, add_remove=False, amount=4)
+        self.assertEqual(self.balance(self.m), 3)
+        self.assertEqual(MedicineStockHistory.objects.filter(medicine=self.m).count(), 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=7)
+        MedicineStockBalance.objects.filter(medicine=self.m).update(current_stock=99)
+        MedicineStockHistory.objects.bulk_create([MedicineStockHistory(medicine=self.other, add_remove=True, amount=3)])
+
+        out = StringIO()
+        call_command('rebuild_stock_balances', stdout=out)
+        self.assertIn('corrected 2', out.getvalue())
+        self.assertEqual(self.balance(self.m), 7)
+        self.assertEqual(self.balance(self.other), 3)
+
+    def test_medicine_list_exposes_current_stock(self):
+        User = get_user_model()
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='stockuser', password='pass'))
+        MedicineStockHistory.objects.create(medicine=self.m, add_remove=True, amount=5)
+
+        resp = client.get('/api/medicines/')
+        self.assertEqual(resp.status_code, 200)
+        stock = {m['id']: m['current_stock'] for m in resp.json()['results']}
+        self.assertEqual(stock[self.m.id], 5)
+        self.assertEqual(stock[self.other.id], 0)
+
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(username='inventory', password='pass'))
+        TypeMedicineFunction.objects.get_or_create(id=1, defaults={'name': 'Generic'})
+        self.m = Medicine.objects.create(medicine_name='Ibuprofen', medicine_unit='tablets', medicine_type_id=1)
+        self.other = Medicine.objects.create(medicine_name='Amoxicillin', medicine_unit='capsules', medicine_type_id=1)
+        record_stock_movement(self.m.id, True, 10)
+
+    def revalidate(self, url, response, status=304, **headers):
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+        self.assertEqual(resp.status_code, status)
+        return resp
+
+    def test_unchanged_lists_answer_304_from_the_validators_alone(self):
+        for url in ('/api/medicines/', '/api/medicine-stock/', '/api/medicine-stock/?medicine=%d' % self.m.id):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Cache-Control'], 'private, no-cache')
+            # the COUNT(*), the page's ids and their related validators
+            with self.assertNumQueries(3):
+                not_modified = self.revalidate(url, resp)
+            self.assertEqual((not_modified['ETag'], not_modified.content), (resp['ETag'], b''))
+
+        # each page, filter and format has its own ETag
+        tags = {self.client.get(url)['ETag'] for url in (
+            '/api/medicines/', '/api/medicines/?ordering=medicine_name', '/api/medicine-stock/?medicine=%d' % self.other.id,
+        )}
+        self.assertEqual(len(tags), 3)
+
+    def test_writes_change_the_etag_of_every_list_showing_them(self):
+        medicines = self.client.get('/api/medicines/')
+        stock = self.client.get('/api/medicine-stock/')
+
+        # a movement changes the ledger and, through the balance row, the medicine's current_stock
+        self.client.post('/api/medicine-stock/', {'medicine_id': self.other.id, 'add_remove': True, 'amount': 3}, format='json')
+        medicines = self.revalidate('/api/medicines/', medicines, status=200)
+        stock = self.revalidate('/api/medicine-stock/', stock, status=200)
+        self.assertEqual({m['id']: m['current_stock'] for m in medicines.json()['results']}[self.other.id], 3)
+
+        # renaming a medicine changes the stock rows that show its name
+        self.client.patch(f'/api/medicines/{self.m.id}/', {'medicine_name': 'Advil'}, format='json')
+        stock = self.revalidate('/api/medicine-stock/', stock, status=200)
+        medicines = self.revalidate('/api/medicines/', medicines, status=200)
+
+        self.client.delete(f'/api/medicines/{self.other.id}/')
+        self.revalidate('/api/medicines/', medicines, status=200)
+        self.revalidate('/api/medicine-stock/', stock, status=200)
+
+    @mock.patch.object(PageOrCursorPagination, 'page_size', 1)
+    def test_validators_cover_the_served_page_only(self):
+        # medicines are listed by name: Amoxicillin on page 1, Ibuprofen on page 2
+        first, last = self.client.get('/api/medicines/'), self.client.get('/api/medicines/?page=last')
+        self.assertEqual(last.json()['results'][0]['id'], self.m.id)
+        self.revalidate('/api/medicines/?page=last', last)
+        self.assertEqual(self.client.get('/api/medicines/?page=3').status_code, 404)
+
+        record_stock_movement(self.m.id, True, 5)
+        self.revalidate('/api/medicines/', first)
+        self.assertEqual(self.revalidate('/api/medicines/?page=last', last, status=200).json()['results'][0]['current_stock'], 15)
+
+    def test_detail_carries_last_modified(self):
+        url = f'/api/medicines/{self.m.id}/'
+        resp = self.client.get(url)
+        self.assertIn('Last-Modified', resp)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=resp['Last-Modified']).status_code, 304)
+        self.revalidate(url, resp)
+
+        record_stock_movement(self.m.id, False, 2, appointment=None)
+        self.assertEqual(self.revalidate(url, resp, status=200).json()['current_stock'], 8)
+        self.assertEqual(self.client.get('/api/medicines/999999/').status_code, 404)
+        self.assertEqual(self.client.get('/api/medicines/abc/').status_code, 404)
+
+    def test_cursor_pages_are_not_conditional(self):
+        resp = self.client.get('/api/medicine-stock/?pagination=cursor')
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('ETag', resp)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentDispenseTestCase(TransactionTestCase):
+    """Many threads dispensing one medicine must never overdraw it"""
+    threads = 24
+    dose = 5
+    initial_stock = 60
+
+    def setUp(self):
+        lvl = DoctorLevel.objects.create(title='Senior')
+        status_active = DoctorActiveStatus.objects.create(status_name='Active')
+        dept = Department.objects.create(department_name='General')
+        doc = Doctor.objects.create(department=dept, dob='1980-01-01', first_name='John', last_name='Doe', gender='Male', national_id='D125', expertise='General', doctor_level=lvl, active_status=status_active)
+        patient = Patient.objects.create(first_name='Alice', last_name='Smith', dob='1990-05-05', gender='Female', biological_sex='F', first_visit_date='2023-01-01', last_visit_date='2023-01-01')
+        self.appointment = Appointment.objects.create(patient=patient, doctor=doc, visit_date='2023-12-21T09:00:00Z')
+        TypeMedicineFunction.objects.get_or_create(id=1, defaults={'name': 'Generic'})
+        TypeMedicineAdministration.objects.get_or_create(id=1, defaults={'name': 'Oral'})
+        self.m = Medicine.objects.create(medicine_name='Paracetamol', medicine_unit='tablets', medicine_type_id=1, medicine_administration_method_id=1)
+        record_stock_movement(self.m.id, True, self.initial_stock)
+
+    def test_concurrent_dispenses_do_not_overdraw(self):
+        barrier = threading.Barrier(self.threads)
+        results = []
+        lock = threading.Lock()
+
+        def dispense():
+            try:
+                barrier.wait()
+                try:
+                    record_stock_movement(self.m.id, False, self.dose, appointment=self.appointment, note='Prescription')
+                    outcome = 'ok'
+                except InsufficientStock:
+                    outcome = 'rejected'
+                with lock:
+                    results.append(outcome)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=dispense) for _ in range(self.threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        expected_ok = self.initial_stock // self.dose
+        self.assertEqual(results.count('ok'), expected_ok)
+        self.assertEqual(results.count('rejected'), self.threads - expected_ok)
+
+        balance = MedicineStockBalance.objects.get(medicine=self.m).current_stock
+        ledger = MedicineStockHistory.objects.filter(medicine=self.m).aggregate(total=ledger_stock_sum())['total']
+        self.assertEqual(balance, 0)
+        self.assertEqual(ledger, balance)
@@ -1,21 +1,51 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, mixins, permissions, status
 from rest_framework.response import Response
-# from django.db import transaction
-# from django.db import models
 from django.db.models.deletion import ProtectedError
+from config.bulk import BulkItemErrors, BulkModelMixin
+from config.conditional import ConditionalGetMixin
+from config.export import ExportMixin
+from config.filters import QueryParamFilterBackend, parse_id, parse_moment
+from config.reference import ReferenceListMixin
 from .models import Medicine, MedicineStockHistory, TypeMedicineFunction, TypeMedicineAdministration
+from .stock import InsufficientStockBatch, record_stock_movements
 from .serializers import (
     MedicineSerializer,
     MedicineStockHistorySerializer,
+    PrescriptionSerializer,
     TypeMedicineFunctionSerializer,
     TypeMedicineAdministrationSerializer
 )
 
 
-class MedicineViewSet(viewsets.ModelViewSet):
-    queryset = Medicine.objects.all()
+# Stock movements filter on their own medicine/appointment keys or on the linked appointment
+STOCK_HISTORY_FILTER_PARAMS = {
+    'medicine': ('medicine_id', parse_id),
+    'appointment': ('appointment_id', parse_id),
+    'patient': ('appointment__patient_id', parse_id),
+    'doctor': ('appointment__doctor_id', parse_id),
+    'visit_date_after': ('appointment__visit_date__gte', parse_moment),
+    'visit_date_before': ('appointment__visit_date__lt', parse_moment),
+}
+
+
+class StockMovementBulkMixin(BulkModelMixin):
+    """`POST .../bulk/` appends ledger rows; the ledger is not edited in bulk"""
+    bulk_methods = ('post',)
+
+    def perform_bulk_create(self, instances, serializer):
+        try:
+            record_stock_movements(instances, batch_size=self.bulk_batch_size)
+        except InsufficientStockBatch as exc:
+            raise BulkItemErrors({
+                position: {'amount': [str(error)]} for position, error in exc.errors.items()
+            })
+
+
+class MedicineViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Medicine.objects.select_related('stock_balance').all()
     serializer_class = MedicineSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ('stock_balance',)
 
     def destroy(self, request, *args, **kwargs):
         """Delete medicine with custom error message"""
@@ -28,19 +58,64 @@ class MedicineViewSet(viewsets.ModelViewSet):
             )
 
 
-class MedicineStockHistoryViewSet(viewsets.ModelViewSet):
+class MedicineStockHistoryViewSet(ConditionalGetMixin, StockMovementBulkMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = MedicineStockHistory.objects.select_related('medicine').all()
     serializer_class = MedicineStockHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ('medicine',)
+    cursor_ordering = '-id'
+    filter_backends = [QueryParamFilterBackend]
+    filter_params = STOCK_HISTORY_FILTER_PARAMS
+    export_name = 'medicine-stock'
+    export_fields = ('id', 'medicine_id', 'medicine__medicine_name', 'add_remove', 'amount', 'appointment_id', 'note')
+
+    @staticmethod
+    def with_medicine_id(data):
+        # Accept either 'medicine' or 'medicine_id' from client
+        data = data.copy()
+        if 'medicine' in data and 'medicine_id' not in data:
+            data['medicine_id'] = data.get('medicine')
+        return data
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=self.with_medicine_id(request.data))
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def bulk_create(self, data):
+        if isinstance(data, list):
+            data = [self.with_medicine_id(item) if isinstance(item, dict) else item for item in data]
+        return super().bulk_create(data)
+
+
+class PrescriptionViewSet(ConditionalGetMixin,
+                          StockMovementBulkMixin,
+                          mixins.CreateModelMixin,
+                          mixins.ListModelMixin,
+                          mixins.RetrieveModelMixin,
+                          viewsets.GenericViewSet):
+    """Medicine dispensed against appointments (stock removals linked to an appointment)"""
+    queryset = MedicineStockHistory.objects.select_related('medicine').filter(
+        add_remove=False,
+        appointment__isnull=False
+    )
+    serializer_class = PrescriptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ('medicine',)
+    cursor_ordering = '-id'
+    filter_backends = [QueryParamFilterBackend]
+    filter_params = STOCK_HISTORY_FILTER_PARAMS
 
 
-class TypeMedicineFunctionViewSet(viewsets.ReadOnlyModelViewSet):
+class TypeMedicineFunctionViewSet(ReferenceListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = TypeMedicineFunction.objects.all()
     serializer_class = TypeMedicineFunctionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class TypeMedicineAdministrationViewSet(viewsets.ReadOnlyModelViewSet):
+class TypeMedicineAdministrationViewSet(ReferenceListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = TypeMedicineAdministration.objects.all()
     serializer_class = TypeMedicineAdministrationSerializer
     permission_classes = [permissions.IsAuthenticated]
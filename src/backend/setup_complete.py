@@ -6,31 +6,25 @@ Usage: python setup_complete.py
 """
 import os
 import sys
-import pymysql
 from decouple import config
 
+from config.dbpool import mysql_connect_kwargs, mysql_pool
+from config.sqlscript import split_sql_statements
+
 def setup_database():
     """Step 1: Create database and import SQL schemas"""
     print("="*70)
     print("HOSPITAL MANAGEMENT SYSTEM - COMPLETE SETUP")
     print("="*70)
 
-    # Get connection details from .env
-    db_user = config('DB_USER', default='root')
-    db_password = config('DB_PASSWORD', default='')
-    db_host = config('DB_HOST', default='localhost')
-    db_port = config('DB_PORT', default=3306, cast=int)
+    # Get connection details from .env; the database does not exist yet
+    connect_kwargs = mysql_connect_kwargs(database=False)
     db_name = config('DB_NAME', default='HospitalDB')
+    pool = mysql_pool(connect_kwargs)
 
-    print(f"\n[1/4] Connecting to MySQL server at {db_host}:{db_port}...")
+    print(f"\n[1/4] Connecting to MySQL server at {connect_kwargs['host']}:{connect_kwargs['port']}...")
     try:
-        connection = pymysql.connect(
-            host=db_host,
-            user=db_user,
-            password=db_password,
-            port=db_port,
-            charset='utf8mb4'
-        )
+        connection = pool.acquire()
         print("      ✓ Connected successfully")
     except Exception as e:
         print(f"      ✗ Connection failed: {e}")
@@ -55,14 +49,16 @@ def setup_database():
     project_root = os.path.dirname(backend_dir)
     sql_dir = os.path.join(project_root, 'src', 'sql')
 
-    # SQL files in order
+    # SQL files in order. Triggers (03) are created after the sample data is loaded: like any
+    # bulk load, the rows bypass the per-row bookkeeping and the derived tables are rebuilt in
+    # setup_django(); the stock trigger would otherwise see empty balances and reject removals.
     sql_files = [
         '01_schema_creation.sql',
         '02_insert_lookup_data.sql',
+        '05_insert_sample_data.sql',
+        '06_insert_current_week_data.sql',
         '03_procedures_triggers_views.sql',
         '04_views_metrics.sql',
-        '05_insert_sample_data.sql',
-        '06_insert_current_week_data.sql'
     ]
 
     # Execute each SQL file
@@ -79,24 +75,24 @@ def setup_database():
             with open(file_path, 'r', encoding='utf-8') as f:
                 sql_content = f.read()
 
-            # Split by delimiter and execute each statement
-            statements = sql_content.split(';')
-            for statement in statements:
-                statement = statement.strip()
-                if statement and 'DELIMITER' not in statement:
-                    try:
-                        cursor.execute(statement)
-                    except Exception:
-                        pass  # Ignore warnings
+            # DELIMITER-aware, so procedure and trigger bodies are sent whole
+            failures = []
+            for statement in split_sql_statements(sql_content):
+                try:
+                    cursor.execute(statement)
+                except Exception as e:
+                    failures.append((statement.splitlines()[0], e))
 
             connection.commit()
-            print("✓")
+            print("✓" if not failures else f"⚠ ({len(failures)} statement(s) failed)")
+            for first_line, e in failures:
+                print(f"        {first_line[:60]}: {str(e)[:80]}")
         except Exception as e:
             print(f"✗ ({str(e)[:50]})")
             connection.rollback()
 
     cursor.close()
-    connection.close()
+    pool.release(connection)
 
     print(f"      ✓ SQL import completed")
     return True
@@ -111,7 +107,7 @@ def setup_django():
     import django
     django.setup()
 
-    from django.core.management import call_command
+    from django.core.management import call_command, CommandError
 
     try:
         # Step 1: Create ALL migrations first (before checking tables)
@@ -134,6 +130,7 @@ def setup_django():
         call_command('migrate', 'patients', '--fake', verbosity=0)
         call_command('migrate', 'pharmacy', '--fake', verbosity=0)
         call_command('migrate', 'appointments', '--fake', verbosity=0)
+        call_command('migrate', 'metrics', '--fake', verbosity=0)
         print("✓")
 
         # Step 4: Migrate custom User model and auth system
@@ -145,6 +142,25 @@ def setup_django():
         call_command('migrate', 'token_blacklist', verbosity=0)
         print("✓")
 
+        # Step 5: Seed derived tables from the SQL-loaded sample data
+        print("      → Building medicine stock balances...", end=" ")
+        with open(os.devnull, 'w') as devnull:
+            call_command('rebuild_stock_balances', stdout=devnull)
+        print("✓")
+        print("      → Building patient lookup identifiers...", end=" ")
+        with open(os.devnull, 'w') as devnull:
+            call_command('rebuild_patient_identifiers', stdout=devnull)
+        print("✓")
+        print("      → Building appointment rollups...", end=" ")
+        try:
+            with open(os.devnull, 'w') as devnull:
+                call_command('rebuild_appointment_rollups', stdout=devnull)
+            print("✓")
+        except CommandError as e:
+            # dashboards stay empty until the time zone tables are loaded and the rollups rebuilt
+            print("⚠")
+            print(f"      Warning: {e} (mysql_tzinfo_to_sql, then manage.py rebuild_appointment_rollups)")
+
         print("      ✓ Django setup completed")
         return True
 
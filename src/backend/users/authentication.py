@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.instrumentation import AUTH_TIMINGS
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication recording how long each attempt takes, by outcome"""
+
+    def authenticate(self, request):
+        start = time.perf_counter()
+        outcome = 'failure'
+        try:
+            result = super().authenticate(request)
+            outcome = 'anonymous' if result is None else 'success'
+            return result
+        finally:
+            AUTH_TIMINGS.observe((outcome,), (time.perf_counter() - start) * 1000)
+
+
+class UserStateCache:
+    """Process-local LRU of (is_active, role, password hash) per user id.
+
+    Entries expire after JWT_USER_CACHE_TTL seconds, so deactivation and role changes made
+    elsewhere take effect within that time; saves in this process evict immediately.
+    At most JWT_USER_CACHE_SIZE users are kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return state
+
+    def put(self, user_id, state):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + settings.JWT_USER_CACHE_TTL, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return state
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+USER_STATES = UserStateCache()
+
+
+class HospitalTokenUser(TokenUser):
+    """Request user built from access token claims, with the role of the cached user state"""
+
+    def __init__(self, token, role):
+        super().__init__(token)
+        self.role = role
+
+    @property
+    def email(self):
+        return self.token.get('email', '')
+
+    @property
+    def is_admin(self):
+        return self.role == 'ADMIN'
+
+    @property
+    def is_doctor(self):
+        return self.role == 'DOCTOR'
+
+    @property
+    def is_receptionist(self):
+        return self.role == 'RECEPTIONIST'
+
+
+class StatelessJWTAuthentication(TimedJWTAuthentication):
+    """JWT authentication that does not load users.User on every request.
+
+    The user comes from the token's claims; whether the account is active, its current role
+    and (with CHECK_REVOKE_TOKEN) its password hash are read at most once per
+    JWT_USER_CACHE_TTL seconds per user and worker, through USER_STATES.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        state = USER_STATES.get(user_id)
+        if state is None:
+            row = (
+                get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list('is_active', 'role', 'password').first()
+            )
+            if row is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            is_active, role, password = row
+            password_hash = get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else None
+            state = USER_STATES.put(user_id, (is_active, role, password_hash))
+
+        is_active, role, password_hash = state
+        if not is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return HospitalTokenUser(validated_token, role)
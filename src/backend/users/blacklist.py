@@ -0,0 +1,110 @@
+import time
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import TokenPruneStat
+
+BLACKLISTED_KEY = 'jwt:blacklisted:{}'
+# the one TokenPruneStat row
+STATS_ROW = 1
+
+
+def remember_blacklisted(jti, exp):
+    """Record a blacklisted id in the shared cache until the token would have expired anyway"""
+    cache.set(BLACKLISTED_KEY.format(jti), True, timeout=max(1, int(exp - time.time())))
+
+
+def known_blacklisted(jti):
+    # only positive answers are cached: a miss proves nothing, another worker may just have blacklisted it
+    return cache.get(BLACKLISTED_KEY.format(jti)) is not None
+
+
+def rotation_blacklists():
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+class RotatingRefreshToken(RefreshToken):
+    """RefreshToken whose rotation claims the token with a single blacklist insert.
+
+    With rotation and blacklisting on, the separate "is it blacklisted?" query is replaced by
+    claim(): the unique index on the blacklist decides, so of two concurrent refreshes with the
+    same token only one succeeds. Tokens already known to be blacklisted are rejected from the
+    cache without a query.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if known_blacklisted(jti):
+            raise TokenError(_('Token is blacklisted'))
+        if not rotation_blacklists():
+            super().check_blacklist()
+
+    def claim(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        exp = self.payload['exp']
+        outstanding, _created = OutstandingToken.objects.get_or_create(
+            jti=jti, defaults={'token': str(self), 'expires_at': datetime_from_epoch(exp)},
+        )
+        try:
+            with transaction.atomic():
+                BlacklistedToken.objects.create(token=outstanding)
+        except IntegrityError:
+            raise TokenError(_('Token is blacklisted'))
+        finally:
+            remember_blacklisted(jti, exp)
+
+
+def token_table_sizes():
+    """Exact row counts; scans the tables, so for maintenance commands rather than requests"""
+    now = timezone.now()
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'blacklisted': BlacklistedToken.objects.count(),
+        'expired': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+    }
+
+
+def prune_expired_tokens(batch_size=5000, pause=0.0, now=None):
+    """Delete expired outstanding tokens and their blacklist rows, one short transaction per batch.
+
+    Returns (outstanding, blacklisted) rows deleted.
+    """
+    now = now or timezone.now()
+    outstanding = blacklisted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('expires_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return outstanding, blacklisted
+        with transaction.atomic():
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding += OutstandingToken.objects.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def blacklist_stats():
+    """Table sizes recorded by the last prune_token_blacklist run, or None"""
+    row = TokenPruneStat.objects.filter(pk=STATS_ROW).values(
+        'outstanding', 'blacklisted', 'expired', 'pruned', 'recorded_at'
+    ).first()
+    if row is None:
+        return None
+    row['at'] = row.pop('recorded_at').timestamp()
+    return row
+
+
+def record_blacklist_stats(sizes, pruned):
+    TokenPruneStat.objects.update_or_create(
+        pk=STATS_ROW, defaults={**sizes, 'pruned': pruned, 'recorded_at': timezone.now()},
+    )
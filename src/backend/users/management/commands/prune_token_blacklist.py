@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from users.blacklist import prune_expired_tokens, record_blacklist_stats, token_table_sizes
+
+
+class Command(BaseCommand):
+    help = ('Delete expired outstanding refresh tokens and their blacklist entries in batches. '
+            'Run it from cron, e.g. nightly; expired tokens are rejected by their signature anyway.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between batches, to spread the load on a busy server.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the table sizes.')
+
+    def handle(self, *args, **options):
+        before = token_table_sizes()
+        self.stdout.write(
+            f'{OutstandingToken._meta.db_table}: {before["outstanding"]} row(s), {before["expired"]} expired; '
+            f'{BlacklistedToken._meta.db_table}: {before["blacklisted"]} row(s)'
+        )
+        if options['dry_run']:
+            return
+
+        outstanding, blacklisted = prune_expired_tokens(batch_size=options['batch_size'], pause=options['pause'])
+        after = token_table_sizes()
+        record_blacklist_stats(after, outstanding)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding} expired outstanding and {blacklisted} blacklisted token(s); '
+            f'{after["outstanding"]} and {after["blacklisted"]} remain.'
+        ))
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+# prune_token_blacklist selects by expiry; the token_blacklist app only indexes jti
+INDEX = models.Index(fields=['expires_at'], name='token_outstanding_expires_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('token_blacklist', 'OutstandingToken'), INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('token_blacklist', 'OutstandingToken'), INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
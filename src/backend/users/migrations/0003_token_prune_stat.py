@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_outstandingtoken_expires_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenPruneStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("outstanding", models.PositiveBigIntegerField()),
+                ("blacklisted", models.PositiveBigIntegerField()),
+                ("expired", models.PositiveBigIntegerField()),
+                ("pruned", models.PositiveBigIntegerField()),
+                ("recorded_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name": "Token prune stat",
+                "db_table": "TokenPruneStat",
+            },
+        ),
+    ]
@@ -49,3 +49,21 @@ class User(AbstractUser):
     @property
     def is_receptionist(self):
         return self.role == 'RECEPTIONIST'
+
+
+class TokenPruneStat(models.Model):
+    """Token table sizes after the last prune_token_blacklist run, in one row.
+
+    Kept in the database because the command runs in its own process (cron), while /metrics
+    is served by the web workers; their default cache is per process.
+    """
+
+    outstanding = models.PositiveBigIntegerField()
+    blacklisted = models.PositiveBigIntegerField()
+    expired = models.PositiveBigIntegerField()
+    pruned = models.PositiveBigIntegerField()
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'TokenPruneStat'
+        verbose_name = 'Token prune stat'
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import USER_STATES
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def forget_user_state(sender, instance, **kwargs):
+    # other workers pick the change up when their cached entry expires
+    USER_STATES.evict(instance.pk)
@@ -1,3 +1,114 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .authentication import USER_STATES, StatelessJWTAuthentication, UserStateCache
+from .blacklist import RotatingRefreshToken, blacklist_stats
+from .serializers import CustomTokenObtainPairSerializer
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        USER_STATES.clear()
+        self.user = get_user_model().objects.create_user(
+            username='nurse', email='nurse@hospital.com', password='pass-12345', role='DOCTOR'
+        )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.request = APIRequestFactory().get('/api/patients/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def authenticate(self):
+        user, _ = StatelessJWTAuthentication().authenticate(self.request)
+        return user
+
+    def test_user_comes_from_claims_and_cached_state(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), user)
+        self.assertEqual((user.id, user.username, user.email), (self.user.id, 'nurse', 'nurse@hospital.com'))
+        self.assertTrue(user.is_authenticated)
+        self.assertTrue(user.is_doctor)
+        self.assertFalse(user.is_admin or user.is_receptionist)
+
+    def test_role_changes_and_deactivation_apply_to_issued_tokens(self):
+        self.authenticate()
+        self.user.role = 'ADMIN'
+        self.user.save()
+        self.assertTrue(self.authenticate().is_admin)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(JWT_USER_CACHE_SIZE=2, JWT_USER_CACHE_TTL=30)
+    def test_cache_is_bounded_and_expires(self):
+        cache = UserStateCache()
+        for user_id in (1, 2, 1, 3):
+            cache.put(user_id, (True, 'DOCTOR', None))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(2))  # least recently used
+        self.assertIsNotNone(cache.get(1))
+
+        with override_settings(JWT_USER_CACHE_TTL=0):
+            cache.put(4, (True, 'DOCTOR', None))
+        self.assertIsNone(cache.get(4))
+
+
+class TokenBlacklistTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(username='clerk', password='pass-12345', role='RECEPTIONIST')
+        self.client = APIClient()
+        self.refresh = self.client.post(
+            '/api/auth/token/', {'username': 'clerk', 'password': 'pass-12345'}, format='json'
+        ).json()['refresh']
+
+    def rotate(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, format='json')
+
+    def test_rotation_blacklists_once_and_rejects_reuse_from_cache(self):
+        resp = self.rotate(self.refresh)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.json()['refresh'], self.refresh)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.rotate(self.refresh).status_code, 401)
+        self.assertEqual(self.rotate(resp.json()['refresh']).status_code, 200)
+
+    def test_concurrent_claims_are_decided_by_the_blacklist_index(self):
+        RotatingRefreshToken(self.refresh).claim()
+        cache.clear()  # as seen by another worker before the shared cache is updated
+        token = RotatingRefreshToken(self.refresh)
+        with self.assertRaises(TokenError):
+            token.claim()
+
+    def test_prune_deletes_expired_tokens_in_batches(self):
+        expired = timezone.now() - timedelta(days=1)
+        for i in range(3):
+            outstanding = OutstandingToken.objects.create(jti=f'old-{i}', token='x', expires_at=expired)
+            BlacklistedToken.objects.create(token=outstanding)
+        RotatingRefreshToken(self.refresh).claim()
+
+        out = StringIO()
+        call_command('prune_token_blacklist', '--batch-size=2', stdout=out)
+        self.assertIn('Deleted 3 expired outstanding and 3 blacklisted token(s)', out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        # stored in the database: the web workers do not share the command's cache
+        cache.clear()
+        stats = blacklist_stats()
+        self.assertEqual((stats['outstanding'], stats['blacklisted'], stats['pruned']), (1, 1, 3))
@@ -1,8 +1,8 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import UserRegistrationSerializer, CustomTokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .serializers import UserRegistrationSerializer, CustomTokenObtainPairSerializer, RotatingTokenRefreshSerializer
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -10,6 +10,11 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    """Token refresh that rotates with one blacklist insert instead of a lookup and an insert"""
+    serializer_class = RotatingTokenRefreshSerializer
+
+
 class UserRegistrationView(generics.CreateAPIView):
     """API endpoint for user registration"""
     permission_classes = [AllowAny]
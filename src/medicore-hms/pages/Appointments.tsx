@@ -79,7 +79,7 @@ const Appointments: React.FC<AppointmentsProps> = ({ role }) => {
 
   const handleSearchPatient = async () => {
     if (!phoneSearch || phoneSearch.length < 8) {
-      return showWarning('Enter valid phone number (at least 8 digits)');
+      return showWarning('Enter a valid phone number or ID (at least 8 characters)');
     }
 
     try {
@@ -327,7 +327,7 @@ const Appointments: React.FC<AppointmentsProps> = ({ role }) => {
                 <div className="flex gap-2">
                   <input
                     type="text"
-                    placeholder="Enter phone number..."
+                    placeholder="Enter phone number or national ID..."
                     value={phoneSearch}
                     onChange={(e) => setPhoneSearch(e.target.value)}
                     onKeyDown={(e) => {
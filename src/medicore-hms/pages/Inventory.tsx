@@ -39,14 +39,6 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
           medNameMap[m.id] = m.medicine_name;
         });
 
-        // Aggregate stock per medicine id
-        const stockMap: Record<number, number> = {};
-        stock.forEach((s: any) => {
-          const id = s.medicine;
-          const delta = s.add_remove ? s.amount : -s.amount;
-          stockMap[id] = (stockMap[id] || 0) + delta;
-        });
-
         // Enrich stock history with medicine names
         const enrichedHistory = stock.map((s: any) => ({
           ...s,
@@ -62,7 +54,7 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
           id: m.id,
           name: m.medicine_name,
           category: m.producer || 'Medication',
-          stock: stockMap[m.id] || 0,
+          stock: m.current_stock ?? 0,
           unit: m.medicine_unit || '',
           minLevel: 10,
           lastUpdated: '—',
@@ -113,21 +105,14 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
     try {
       const api = await import('../src/api');
       await api.createMedicine(medicineForm);
-      // refresh medicines
-      const [medsResp, stockResp] = await Promise.all([api.fetchMedicines(), api.fetchMedicineStock()]);
+      // refresh medicines (stock levels come with each medicine)
+      const medsResp = await api.fetchMedicines();
       const meds = medsResp.results || medsResp;
-      const stock = stockResp.results || stockResp;
-      const stockMap: Record<number, number> = {};
-      stock.forEach((s: any) => {
-        const id = s.medicine;
-        const delta = s.add_remove ? s.amount : -s.amount;
-        stockMap[id] = (stockMap[id] || 0) + delta;
-      });
       const normalized = meds.map((m: any) => ({
         id: m.id,
         name: m.medicine_name,
         category: m.producer || 'Medication',
-        stock: stockMap[m.id] || 0,
+        stock: m.current_stock ?? 0,
         unit: m.medicine_unit || '',
         minLevel: 10,
         lastUpdated: '—',
@@ -189,21 +174,14 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
       await api.updateMedicine(editingMedicine.id, medicineForm);
 
       // Refresh list
-      const [medsResp, stockResp] = await Promise.all([api.fetchMedicines(), api.fetchMedicineStock()]);
+      const medsResp = await api.fetchMedicines();
       const meds = medsResp.results || medsResp;
-      const stock = stockResp.results || stockResp;
-      const stockMap: Record<number, number> = {};
-      stock.forEach((s: any) => {
-        const id = s.medicine;
-        const delta = s.add_remove ? s.amount : -s.amount;
-        stockMap[id] = (stockMap[id] || 0) + delta;
-      });
 
       const normalized = meds.map((m: any) => ({
         id: m.id,
         name: m.medicine_name,
         category: m.producer || 'Medication',
-        stock: stockMap[m.id] || 0,
+        stock: m.current_stock ?? 0,
         unit: m.medicine_unit || '',
         minLevel: 10,
         lastUpdated: '—',
@@ -302,13 +280,6 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
         medNameMap[m.id] = m.medicine_name;
       });
 
-      const stockMap: Record<number, number> = {};
-      stock.forEach((s: any) => {
-        const id = s.medicine;
-        const delta = s.add_remove ? s.amount : -s.amount;
-        stockMap[id] = (stockMap[id] || 0) + delta;
-      });
-
       // Enrich stock history with medicine names
       const enrichedHistory = stock.map((s: any) => ({
         ...s,
@@ -324,7 +295,7 @@ const Inventory: React.FC<{ role?: UserRole }> = ({ role }) => {
         id: m.id,
         name: m.medicine_name,
         category: m.producer || 'Medication',
-        stock: stockMap[m.id] || 0,
+        stock: m.current_stock ?? 0,
         unit: m.medicine_unit || '',
         minLevel: 10,
         lastUpdated: '—',
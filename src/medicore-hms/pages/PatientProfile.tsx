@@ -76,14 +76,7 @@ const PatientProfile: React.FC<{ role?: UserRole }> = ({ role }) => {
         note: 'Prescription'
       });
 
-      // Fetch updated stock history and filter prescriptions
-      const stockResp = await api.fetchMedicineStock();
-      const allStock = stockResp.results || stockResp;
-      const prescriptions = allStock.filter((s: any) =>
-        s.appointment === appt.id &&
-        (s.note === 'Prescription' || s.note === 'Prescription deduction')
-      );
-      setPrescriptions(prescriptions);
+      await loadTimeline(api, id as string);
 
       setShowPrescModal(false);
       setPrescForm({medicine:'', amount:1});
@@ -94,6 +87,17 @@ const PatientProfile: React.FC<{ role?: UserRole }> = ({ role }) => {
       setPrescLoading(false);
     }
   }
+  // Visits (newest first) and the prescriptions dispensed at each, in one request
+  const loadTimeline = async (api: any, patientId: string | number, isMounted = () => true) => {
+    const timeline = await api.fetchPatientTimeline(patientId);
+    if (!isMounted()) return;
+    const visits = timeline.results || timeline;
+    setAppointments(visits);
+    setPrescriptions(visits.flatMap((v: any) =>
+      (v.prescriptions || []).map((p: any) => ({ ...p, visit_date: v.visit_date, doctor: v.doctor }))
+    ));
+  };
+
   React.useEffect(() => {
     let mounted = true;
     setLoading(true);
@@ -101,23 +105,9 @@ const PatientProfile: React.FC<{ role?: UserRole }> = ({ role }) => {
       try {
         if (id) {
           const p = await api.fetchPatient(id);
-          const appts = await api.fetchAppointments();
-          const stockResp = await api.fetchMedicineStock();
-
           if (!mounted) return;
           setPatient(p);
-
-          const apptList = (appts.results || appts).filter((a: any) => String(a.patient) === String(id));
-          setAppointments(apptList);
-
-          // Filter prescriptions from stock history
-          const allStock = stockResp.results || stockResp;
-          const appointmentIds = apptList.map((a: any) => a.id);
-          const presList = allStock.filter((s: any) =>
-            appointmentIds.includes(s.appointment) &&
-            (s.note === 'Prescription' || s.note === 'Prescription deduction')
-          );
-          setPrescriptions(presList);
+          await loadTimeline(api, id, () => mounted);
         }
       } catch (err) {
         // ignore
@@ -355,8 +345,8 @@ const PatientProfile: React.FC<{ role?: UserRole }> = ({ role }) => {
                           <Pill className="w-4 h-4" /> {p.medicine_name || 'Medicine'}
                         </td>
                         <td className="px-4 py-3">{p.amount || '—'}</td>
-                        <td className="px-4 py-3">{'—'}</td>
-                        <td className="px-4 py-3 text-slate-500">{'—'}</td>
+                        <td className="px-4 py-3">{p.doctor?.first_name ? `Dr. ${p.doctor.first_name}` : '—'}</td>
+                        <td className="px-4 py-3 text-slate-500">{p.visit_date || '—'}</td>
                       </tr>
                     )) : (
                       <tr>
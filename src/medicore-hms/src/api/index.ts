@@ -89,8 +89,13 @@ export async function fetchPatient(patientId: string | number) {
   return request(`/patients/${patientId}/`);
 }
 
-export async function searchPatientByPhone(phone: string) {
-  return request(`/patients/?search=${encodeURIComponent(phone)}`);
+export async function fetchPatientTimeline(patientId: string | number) {
+  return request(`/patients/${patientId}/timeline/`);
+}
+
+// Returning-patient lookup by phone, national ID, passport or driver's license number
+export async function searchPatientByPhone(identifier: string) {
+  return request(`/patients/lookup/?identifier=${encodeURIComponent(identifier)}`);
 }
 
 export async function createPatient(payload: any) {
@@ -105,8 +110,18 @@ export async function deletePatient(patientId: string | number) {
   return request(`/patients/${patientId}/`, { method: 'DELETE' });
 }
 
-export async function fetchAppointments() {
-  return request('/appointments/');
+// Server-side filters: patient, doctor, medicine, appointment, visit_date_after, visit_date_before
+function queryString(filters?: Record<string, string | number | undefined>) {
+  const params = new URLSearchParams();
+  Object.entries(filters || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== '') params.append(key, String(value));
+  });
+  const q = params.toString();
+  return q ? `?${q}` : '';
+}
+
+export async function fetchAppointments(filters?: Record<string, string | number | undefined>) {
+  return request(`/appointments/${queryString(filters)}`);
 }
 
 export async function createAppointment(payload: any) {
@@ -177,16 +192,16 @@ export async function fetchMedicineAdminMethods() {
   return request('/medicine-admin-methods/');
 }
 
-export async function fetchMedicineStock() {
-  return request('/medicine-stock/');
+export async function fetchMedicineStock(filters?: Record<string, string | number | undefined>) {
+  return request(`/medicine-stock/${queryString(filters)}`);
 }
 
 export async function createMedicineStock(payload: any) {
   return request('/medicine-stock/', { method: 'POST', body: JSON.stringify(payload) });
 }
 
-export async function fetchPrescriptions() {
-  return request('/prescriptions/');
+export async function fetchPrescriptions(filters?: Record<string, string | number | undefined>) {
+  return request(`/prescriptions/${queryString(filters)}`);
 }
 
 export async function createPrescription(payload: any) {
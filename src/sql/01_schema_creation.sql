@@ -69,6 +69,7 @@ CREATE TABLE Doctor (
     expertise VARCHAR(100) NOT NULL,
     doctor_level_id INT NOT NULL,
     active_status_id INT NOT NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
     INDEX idx_doctor_license (medical_license_id),
     FOREIGN KEY (department_id) REFERENCES Department(id) ON DELETE RESTRICT,
     FOREIGN KEY (doctor_level_id) REFERENCES Type_DoctorLevel(id) ON DELETE RESTRICT,
@@ -92,6 +93,7 @@ CREATE TABLE Patient (
     gender VARCHAR(20) NOT NULL,
     biological_sex VARCHAR(20) NOT NULL,
     phone VARCHAR(20) NULL,
+    phone_normalized VARCHAR(20) NULL,  -- digits only, set by trg_PatientNormalizePhone*
     email VARCHAR(100) NULL,
     first_visit_date DATE NOT NULL,
     last_visit_date DATE NOT NULL,
@@ -102,7 +104,11 @@ CREATE TABLE Patient (
     weight INT NULL,
     dnr_status TINYINT(1) NOT NULL DEFAULT 0,
     organ_donor_status TINYINT(1) NOT NULL DEFAULT 0,
-    INDEX idx_patient_lastname (last_name)
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
+    INDEX idx_patient_lastname (last_name),
+    INDEX Patient_first_n_c80ffa_idx (first_name),
+    INDEX Patient_phone_n_a62c4a_idx (phone_normalized),
+    INDEX Patient_email_566e21_idx (email)
 ) ENGINE=InnoDB;
 
 -- PatientPersonalInformation (patients.PatientPersonalInformation)
@@ -116,6 +122,7 @@ CREATE TABLE PatientPersonalInformation (
     city VARCHAR(100) NULL,
     state VARCHAR(100) NULL,
     country VARCHAR(100) NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
     FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
@@ -125,6 +132,7 @@ CREATE TABLE PatientCoreMedicalInformation (
     patient_id INT NOT NULL,
     information_type INT NOT NULL,
     note VARCHAR(255) NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
     FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE CASCADE,
     FOREIGN KEY (information_type) REFERENCES Type_CoreMedInfo(id)
 ) ENGINE=InnoDB;
@@ -137,6 +145,19 @@ CREATE TABLE PatientEmergencyContact (
     contact_information VARCHAR(255) NOT NULL,
     relationship VARCHAR(50) NOT NULL,
     last_updated DATE NOT NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
+    FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- PatientIdentifier (patients.PatientIdentifier)
+-- SHA-256 of each normalized phone / document number, for returning-patient lookups
+CREATE TABLE PatientIdentifier (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    patient_id INT NOT NULL,
+    kind VARCHAR(20) NOT NULL,
+    value_hash CHAR(64) NOT NULL,
+    CONSTRAINT uniq_patient_identifier_kind UNIQUE (patient_id, kind),
+    INDEX PatientIden_value_h_3101d2_idx (value_hash),
     FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
@@ -148,6 +169,7 @@ CREATE TABLE Medicine (
     medicine_type_id INT NULL,
     medicine_administration_method_id INT NULL,
     medicine_unit VARCHAR(20) NOT NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
     FOREIGN KEY (medicine_type_id) REFERENCES Type_MedicineFunction(id) ON DELETE RESTRICT,
     FOREIGN KEY (medicine_administration_method_id) REFERENCES Type_MedicineAdministration(id) ON DELETE RESTRICT
 ) ENGINE=InnoDB;
@@ -161,8 +183,12 @@ CREATE TABLE Appointments (
     diagnosis VARCHAR(255) NULL,
     category VARCHAR(50) NULL,
     note VARCHAR(255) NULL,
-    INDEX idx_appt_patient (patient_id),
-    INDEX idx_appt_doctor (doctor_id),
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
+    -- index names match appointments.Appointment.Meta.indexes (migration 0002)
+    INDEX Appointment_visit_d_d2fe8d_idx (visit_date),
+    INDEX Appointment_patient_50bb5c_idx (patient_id, visit_date),
+    INDEX Appointment_doctor__18d186_idx (doctor_id, visit_date),
+    INDEX Appointment_diagnos_9c8737_idx (diagnosis),
     FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE RESTRICT,
     FOREIGN KEY (doctor_id) REFERENCES Doctor(id) ON DELETE RESTRICT
 ) ENGINE=InnoDB;
@@ -175,10 +201,52 @@ CREATE TABLE MedicineStockHistory (
     amount INT NOT NULL,
     appointment_id INT,
     note VARCHAR(255) NULL,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
     FOREIGN KEY (medicine_id) REFERENCES Medicine(id) ON DELETE CASCADE,
     FOREIGN KEY (appointment_id) REFERENCES Appointments(id) ON DELETE SET NULL
 ) ENGINE=InnoDB;
 
+-- MedicineStockBalance (pharmacy.MedicineStockBalance)
+-- Running stock per medicine, updated in the same transaction as each MedicineStockHistory write
+CREATE TABLE MedicineStockBalance (
+    medicine_id INT PRIMARY KEY,
+    current_stock INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),  -- UTC; set by Django, and by the triggers of 03_* for other writers
+    INDEX idx_stock_balance_current (current_stock),
+    FOREIGN KEY (medicine_id) REFERENCES Medicine(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- DailyAppointmentStat (metrics.DailyAppointmentStat)
+-- Appointments per doctor per local day, maintained on every appointment write
+CREATE TABLE DailyAppointmentStat (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    day DATE NOT NULL,
+    doctor_id INT NOT NULL,
+    appointment_count INT UNSIGNED NOT NULL DEFAULT 0,
+    CONSTRAINT uniq_daily_appointment_stat UNIQUE (day, doctor_id),
+    FOREIGN KEY (doctor_id) REFERENCES Doctor(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- DailyDiagnosisStat (metrics.DailyDiagnosisStat)
+CREATE TABLE DailyDiagnosisStat (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    day DATE NOT NULL,
+    diagnosis VARCHAR(255) NOT NULL,
+    appointment_count INT UNSIGNED NOT NULL DEFAULT 0,
+    CONSTRAINT uniq_daily_diagnosis_stat UNIQUE (day, diagnosis)
+) ENGINE=InnoDB;
+
+-- DailyPatientVisit (metrics.DailyPatientVisit)
+-- One row per patient per day; COUNT(*) per day gives distinct patients
+CREATE TABLE DailyPatientVisit (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    day DATE NOT NULL,
+    patient_id INT NOT NULL,
+    appointment_count INT UNSIGNED NOT NULL DEFAULT 0,
+    CONSTRAINT uniq_daily_patient_visit UNIQUE (day, patient_id),
+    FOREIGN KEY (patient_id) REFERENCES Patient(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
 -- ALTER TABLE MedicineStockHistory
 -- ADD CONSTRAINT CHK_AppointmentID CHECK (appointment_id IS NOT NULL OR add_remove = 1);
 
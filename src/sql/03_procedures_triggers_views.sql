@@ -42,17 +42,16 @@ JOIN Type_DoctorActiveStatus status ON d.active_status_id = status.id
 WHERE status.status_name IN ('On-Demand', 'Active');
 
 -- View: Medicine Stock Levels
--- Shows current stock level for each medicine
+-- Shows current stock level for each medicine (read from the maintained balance table)
 CREATE OR REPLACE VIEW View_MedicineStock AS
 SELECT
     m.id AS medicine_id,
     m.medicine_name,
     m.producer,
     m.medicine_unit,
-    COALESCE(SUM(CASE WHEN msh.add_remove = 1 THEN msh.amount ELSE -msh.amount END), 0) AS current_stock
+    COALESCE(msb.current_stock, 0) AS current_stock
 FROM Medicine m
-LEFT JOIN MedicineStockHistory msh ON m.id = msh.medicine_id
-GROUP BY m.id, m.medicine_name, m.producer, m.medicine_unit;
+LEFT JOIN MedicineStockBalance msb ON m.id = msb.medicine_id;
 
 -- ==========================================
 -- 2. STORED PROCEDURES
@@ -60,6 +59,82 @@ GROUP BY m.id, m.medicine_name, m.producer, m.medicine_unit;
 
 DELIMITER //
 
+-- Functions: Normalize Patient Identifiers
+-- Mirror patients.search.normalize_phone and patients.identifiers.normalize_document.
+CREATE FUNCTION fn_NormalizePhone(p_phone VARCHAR(20))
+RETURNS VARCHAR(20)
+DETERMINISTIC NO SQL
+BEGIN
+    DECLARE v_digits VARCHAR(20);
+    SET v_digits = REGEXP_REPLACE(COALESCE(p_phone, ''), '[^0-9]', '');
+    IF LEFT(v_digits, 2) = '00' THEN
+        SET v_digits = SUBSTRING(v_digits, 3);
+    END IF;
+    IF LEFT(v_digits, 2) = '84' AND CHAR_LENGTH(v_digits) = 11 THEN
+        SET v_digits = CONCAT('0', SUBSTRING(v_digits, 3));
+    END IF;
+    RETURN NULLIF(v_digits, '');
+END //
+
+CREATE FUNCTION fn_NormalizeDocument(p_value VARCHAR(50))
+RETURNS VARCHAR(50)
+DETERMINISTIC NO SQL
+BEGIN
+    RETURN NULLIF(UPPER(REGEXP_REPLACE(COALESCE(p_value, ''), '[^0-9A-Za-z]', '')), '');
+END //
+
+-- Procedure: Sync Patient Identifier
+-- Stores the SHA-256 of one normalized identifier of a patient; NULL removes that kind.
+CREATE PROCEDURE sp_SyncPatientIdentifier(
+    IN p_patient_id INT,
+    IN p_kind VARCHAR(20),
+    IN p_normalized VARCHAR(50)
+)
+BEGIN
+    IF p_normalized IS NULL THEN
+        DELETE FROM PatientIdentifier WHERE patient_id = p_patient_id AND kind = p_kind;
+    ELSE
+        INSERT INTO PatientIdentifier (patient_id, kind, value_hash)
+        VALUES (p_patient_id, p_kind, SHA2(p_normalized, 256))
+        ON DUPLICATE KEY UPDATE value_hash = VALUES(value_hash);
+    END IF;
+END //
+
+-- Procedure: Apply Appointment Rollup
+-- Adds (p_delta = 1) or removes (p_delta = -1) one appointment from the daily metrics rollups.
+-- Days are local to Asia/Ho_Chi_Minh (UTC+07:00, Django's TIME_ZONE); visit_date is stored in UTC.
+-- Call it in the same transaction as the Appointments write.
+CREATE PROCEDURE sp_ApplyAppointmentRollup(
+    IN p_visit_date DATETIME,
+    IN p_doctor_id INT,
+    IN p_patient_id INT,
+    IN p_diagnosis VARCHAR(255),
+    IN p_delta INT
+)
+BEGIN
+    DECLARE v_day DATE DEFAULT DATE(CONVERT_TZ(p_visit_date, '+00:00', '+07:00'));
+
+    INSERT INTO DailyAppointmentStat (day, doctor_id, appointment_count)
+    VALUES (v_day, p_doctor_id, GREATEST(p_delta, 0))
+    ON DUPLICATE KEY UPDATE appointment_count = appointment_count + p_delta;
+    DELETE FROM DailyAppointmentStat
+    WHERE day = v_day AND doctor_id = p_doctor_id AND appointment_count = 0;
+
+    INSERT INTO DailyPatientVisit (day, patient_id, appointment_count)
+    VALUES (v_day, p_patient_id, GREATEST(p_delta, 0))
+    ON DUPLICATE KEY UPDATE appointment_count = appointment_count + p_delta;
+    DELETE FROM DailyPatientVisit
+    WHERE day = v_day AND patient_id = p_patient_id AND appointment_count = 0;
+
+    IF p_diagnosis IS NOT NULL AND p_diagnosis <> '' THEN
+        INSERT INTO DailyDiagnosisStat (day, diagnosis, appointment_count)
+        VALUES (v_day, p_diagnosis, GREATEST(p_delta, 0))
+        ON DUPLICATE KEY UPDATE appointment_count = appointment_count + p_delta;
+        DELETE FROM DailyDiagnosisStat
+        WHERE day = v_day AND diagnosis = p_diagnosis AND appointment_count = 0;
+    END IF;
+END //
+
 -- Procedure: Create Appointment
 -- Validates that doctor is available before creating appointment
 CREATE PROCEDURE sp_CreateAppointment(
@@ -71,6 +146,12 @@ CREATE PROCEDURE sp_CreateAppointment(
 BEGIN
     DECLARE v_status_name VARCHAR(50);
 
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
     -- Check if doctor exists and get status
     SELECT status_name INTO v_status_name
     FROM Doctor d
@@ -85,8 +166,11 @@ BEGIN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Error: Doctor is not available.';
     ELSE
+        START TRANSACTION;
         INSERT INTO Appointments (patient_id, doctor_id, visit_date, note)
         VALUES (p_patient_id, p_doctor_id, p_visit_date, p_note);
+        CALL sp_ApplyAppointmentRollup(p_visit_date, p_doctor_id, p_patient_id, NULL, 1);
+        COMMIT;
     END IF;
 END //
 
@@ -104,7 +188,7 @@ BEGIN
 END //
 
 -- Procedure: Add Medicine Stock
--- Adds stock for a medicine (restocking)
+-- Adds stock for a medicine (restocking); trg_MedicineStockHistoryApplyInsert adds it to the balance
 CREATE PROCEDURE sp_AddMedicineStock(
     IN p_medicine_id INT,
     IN p_amount INT,
@@ -115,6 +199,42 @@ BEGIN
     VALUES (p_medicine_id, 1, p_amount, p_note);
 END //
 
+-- Procedure: Dispense Medicine
+-- Removes stock for an appointment. Locks the medicine's balance row, checks it and writes
+-- the ledger row in one transaction; trg_MedicineStockHistoryApplyInsert decrements the balance.
+CREATE PROCEDURE sp_DispenseMedicine(
+    IN p_medicine_id INT,
+    IN p_amount INT,
+    IN p_appointment_id INT,
+    IN p_note VARCHAR(255)
+)
+BEGIN
+    DECLARE v_current_stock INT DEFAULT 0;
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    SELECT current_stock INTO v_current_stock
+    FROM MedicineStockBalance
+    WHERE medicine_id = p_medicine_id
+    FOR UPDATE;
+
+    IF v_current_stock < p_amount THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Insufficient medicine stock.';
+    END IF;
+
+    INSERT INTO MedicineStockHistory (medicine_id, add_remove, amount, appointment_id, note)
+    VALUES (p_medicine_id, 0, p_amount, p_appointment_id, p_note);
+
+    COMMIT;
+END //
+
 -- ==========================================
 -- UPDATE PROCEDURES
 -- ==========================================
@@ -201,16 +321,38 @@ CREATE PROCEDURE sp_UpdateAppointment(
     IN p_note VARCHAR(255)
 )
 BEGIN
+    DECLARE v_old_visit_date DATETIME;
+    DECLARE v_doctor_id INT;
+    DECLARE v_patient_id INT;
+    DECLARE v_old_diagnosis VARCHAR(255);
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
     IF NOT EXISTS (SELECT 1 FROM Appointments WHERE id = p_appointment_id) THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Error: Appointment does not exist.';
     ELSE
+        START TRANSACTION;
+        SELECT visit_date, doctor_id, patient_id, diagnosis
+        INTO v_old_visit_date, v_doctor_id, v_patient_id, v_old_diagnosis
+        FROM Appointments
+        WHERE id = p_appointment_id
+        FOR UPDATE;
+
         UPDATE Appointments
         SET visit_date = p_visit_date,
             diagnosis = p_diagnosis,
             treatment = p_treatment,
             note = p_note
         WHERE id = p_appointment_id;
+
+        CALL sp_ApplyAppointmentRollup(v_old_visit_date, v_doctor_id, v_patient_id, v_old_diagnosis, -1);
+        CALL sp_ApplyAppointmentRollup(p_visit_date, v_doctor_id, v_patient_id, p_diagnosis, 1);
+        COMMIT;
     END IF;
 END //
 
@@ -295,13 +437,35 @@ CREATE PROCEDURE sp_DeleteAppointment(
     IN p_appointment_id INT
 )
 BEGIN
+    DECLARE v_visit_date DATETIME;
+    DECLARE v_doctor_id INT;
+    DECLARE v_patient_id INT;
+    DECLARE v_diagnosis VARCHAR(255);
+
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
     IF NOT EXISTS (SELECT 1 FROM Appointments WHERE id = p_appointment_id) THEN
         SIGNAL SQLSTATE '45000'
         SET MESSAGE_TEXT = 'Error: Appointment does not exist.';
     ELSE
+        START TRANSACTION;
+        SELECT visit_date, doctor_id, patient_id, diagnosis
+        INTO v_visit_date, v_doctor_id, v_patient_id, v_diagnosis
+        FROM Appointments
+        WHERE id = p_appointment_id
+        FOR UPDATE;
+
         DELETE FROM PrescriptionHistory WHERE appointment_id = p_appointment_id;
+        -- trg_MedicineStockHistoryReverseDelete returns the dispensed stock to the balances
         DELETE FROM MedicineStockHistory WHERE appointment_id = p_appointment_id;
         DELETE FROM Appointments WHERE id = p_appointment_id;
+
+        CALL sp_ApplyAppointmentRollup(v_visit_date, v_doctor_id, v_patient_id, v_diagnosis, -1);
+        COMMIT;
     END IF;
 END //
 
@@ -342,26 +506,143 @@ DELIMITER //
 -- Automatically reduces stock when a prescription is created
 
 -- Trigger: Prevent Negative Medicine Stock
--- Validates sufficient stock exists before allowing removal
+-- Validates sufficient stock exists before allowing removal.
+-- Reads the running balance (one row) instead of summing the ledger, and locks it so two
+-- concurrent removals cannot both pass the check. trg_MedicineStockHistoryApplyInsert (or,
+-- in Django sessions, pharmacy.stock) decrements the same locked row after the insert, in
+-- the same transaction.
 CREATE TRIGGER trg_PreventNegativeMedicineStock
 BEFORE INSERT ON MedicineStockHistory
 FOR EACH ROW
 BEGIN
-    DECLARE current_stock INT;
-
-    -- Calculate current stock for this medicine
-    SELECT COALESCE(SUM(CASE WHEN add_remove = 1 THEN amount ELSE -amount END), 0)
-    INTO current_stock
-    FROM MedicineStockHistory
-    WHERE medicine_id = NEW.medicine_id;
+    DECLARE current_stock INT DEFAULT 0;
 
     -- If this is a removal (add_remove = 0), check if sufficient stock exists
-    IF NEW.add_remove = 0 AND current_stock < NEW.amount THEN
-        SIGNAL SQLSTATE '45000'
-        SET MESSAGE_TEXT = 'Error: Insufficient medicine stock.';
+    IF NEW.add_remove = 0 THEN
+        SELECT msb.current_stock
+        INTO current_stock
+        FROM MedicineStockBalance msb
+        WHERE msb.medicine_id = NEW.medicine_id
+        FOR UPDATE;
+
+        IF current_stock < NEW.amount THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Insufficient medicine stock.';
+        END IF;
+    END IF;
+END //
+
+-- Triggers: Medicine Stock Balance
+-- Keep MedicineStockBalance in step with every ledger write made in SQL (the procedures,
+-- the scripts, raw INSERT/UPDATE/DELETE), in the writing statement's transaction.
+-- Django sessions set @hms_app_maintains_stock (DATABASES init_command) because
+-- pharmacy.stock and pharmacy.signals already move the balance there; the triggers skip them.
+-- A medicine without a balance row gets one seeded from its ledger, as lock_stock_balances does.
+CREATE TRIGGER trg_MedicineStockHistoryApplyInsert
+AFTER INSERT ON MedicineStockHistory
+FOR EACH ROW
+BEGIN
+    IF @hms_app_maintains_stock IS NULL THEN
+        IF EXISTS (SELECT 1 FROM MedicineStockBalance WHERE medicine_id = NEW.medicine_id) THEN
+            UPDATE MedicineStockBalance
+            SET current_stock = current_stock + IF(NEW.add_remove = 1, NEW.amount, -NEW.amount)
+            WHERE medicine_id = NEW.medicine_id;
+        ELSE
+            -- a concurrent writer seeding the same row first leaves only this row to add
+            INSERT INTO MedicineStockBalance (medicine_id, current_stock)
+            SELECT NEW.medicine_id, COALESCE(SUM(IF(add_remove = 1, amount, -amount)), 0)
+            FROM MedicineStockHistory
+            WHERE medicine_id = NEW.medicine_id
+            ON DUPLICATE KEY UPDATE current_stock = current_stock + IF(NEW.add_remove = 1, NEW.amount, -NEW.amount);
+        END IF;
     END IF;
 END //
 
+CREATE TRIGGER trg_MedicineStockHistoryApplyUpdate
+AFTER UPDATE ON MedicineStockHistory
+FOR EACH ROW
+BEGIN
+    IF @hms_app_maintains_stock IS NULL THEN
+        UPDATE MedicineStockBalance
+        SET current_stock = current_stock - IF(OLD.add_remove = 1, OLD.amount, -OLD.amount)
+        WHERE medicine_id = OLD.medicine_id;
+
+        UPDATE MedicineStockBalance
+        SET current_stock = current_stock + IF(NEW.add_remove = 1, NEW.amount, -NEW.amount)
+        WHERE medicine_id = NEW.medicine_id;
+    END IF;
+END //
+
+CREATE TRIGGER trg_MedicineStockHistoryReverseDelete
+AFTER DELETE ON MedicineStockHistory
+FOR EACH ROW
+BEGIN
+    IF @hms_app_maintains_stock IS NULL THEN
+        UPDATE MedicineStockBalance
+        SET current_stock = current_stock - IF(OLD.add_remove = 1, OLD.amount, -OLD.amount)
+        WHERE medicine_id = OLD.medicine_id;
+    END IF;
+END //
+
+-- Triggers: Patient Identifiers
+-- Keep Patient.phone_normalized and the hashed PatientIdentifier lookup rows in step with
+-- phone and document numbers for rows written outside Django.
+CREATE TRIGGER trg_PatientNormalizePhoneInsert
+BEFORE INSERT ON Patient
+FOR EACH ROW
+BEGIN
+    SET NEW.phone_normalized = fn_NormalizePhone(NEW.phone);
+END //
+
+CREATE TRIGGER trg_PatientNormalizePhoneUpdate
+BEFORE UPDATE ON Patient
+FOR EACH ROW
+BEGIN
+    SET NEW.phone_normalized = fn_NormalizePhone(NEW.phone);
+END //
+
+CREATE TRIGGER trg_PatientIdentifierPhoneInsert
+AFTER INSERT ON Patient
+FOR EACH ROW
+BEGIN
+    CALL sp_SyncPatientIdentifier(NEW.id, 'phone', NEW.phone_normalized);
+END //
+
+CREATE TRIGGER trg_PatientIdentifierPhoneUpdate
+AFTER UPDATE ON Patient
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.phone_normalized <=> OLD.phone_normalized) THEN
+        CALL sp_SyncPatientIdentifier(NEW.id, 'phone', NEW.phone_normalized);
+    END IF;
+END //
+
+CREATE TRIGGER trg_PatientIdentifierDocumentsInsert
+AFTER INSERT ON PatientPersonalInformation
+FOR EACH ROW
+BEGIN
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'nat_id', fn_NormalizeDocument(NEW.nat_id));
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'passport_no', fn_NormalizeDocument(NEW.passport_no));
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'drivers_license_no', fn_NormalizeDocument(NEW.drivers_license_no));
+END //
+
+CREATE TRIGGER trg_PatientIdentifierDocumentsUpdate
+AFTER UPDATE ON PatientPersonalInformation
+FOR EACH ROW
+BEGIN
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'nat_id', fn_NormalizeDocument(NEW.nat_id));
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'passport_no', fn_NormalizeDocument(NEW.passport_no));
+    CALL sp_SyncPatientIdentifier(NEW.patient_id, 'drivers_license_no', fn_NormalizeDocument(NEW.drivers_license_no));
+END //
+
+CREATE TRIGGER trg_PatientIdentifierDocumentsDelete
+AFTER DELETE ON PatientPersonalInformation
+FOR EACH ROW
+BEGIN
+    DELETE FROM PatientIdentifier
+    WHERE patient_id = OLD.patient_id AND kind IN ('nat_id', 'passport_no', 'drivers_license_no');
+END //
+
 CREATE TRIGGER trg_MedicineStockHistoryCheck
 BEFORE INSERT ON MedicineStockHistory
 FOR EACH ROW
@@ -370,7 +651,7 @@ BEGIN
         SIGNAL SQLSTATE '45000'
             SET MESSAGE_TEXT = 'appointment_id cannot be NULL when add_remove = 0';
     END IF;
-END$$
+END //
 
 CREATE TRIGGER trg_MedicineStockHistoryCheckUpdate
 BEFORE UPDATE ON MedicineStockHistory
@@ -380,7 +661,101 @@ BEGIN
         SIGNAL SQLSTATE '45000'
             SET MESSAGE_TEXT = 'appointment_id cannot be NULL when add_remove = 0';
     END IF;
-END$$
+END //
+
+-- Triggers: Row Change Times
+-- updated_at feeds the API's ETag/Last-Modified validators (max per list), so every writer
+-- must move it on one clock: set it in UTC, as Django stores datetimes, whatever the
+-- session time zone of the client writing the row.
+CREATE TRIGGER trg_DoctorUpdatedAtInsert
+BEFORE INSERT ON Doctor
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_DoctorUpdatedAtUpdate
+BEFORE UPDATE ON Doctor
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientUpdatedAtInsert
+BEFORE INSERT ON Patient
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientUpdatedAtUpdate
+BEFORE UPDATE ON Patient
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientPersonalInformationUpdatedAtInsert
+BEFORE INSERT ON PatientPersonalInformation
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientPersonalInformationUpdatedAtUpdate
+BEFORE UPDATE ON PatientPersonalInformation
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientCoreMedicalInformationUpdatedAtInsert
+BEFORE INSERT ON PatientCoreMedicalInformation
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientCoreMedicalInformationUpdatedAtUpdate
+BEFORE UPDATE ON PatientCoreMedicalInformation
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientEmergencyContactUpdatedAtInsert
+BEFORE INSERT ON PatientEmergencyContact
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_PatientEmergencyContactUpdatedAtUpdate
+BEFORE UPDATE ON PatientEmergencyContact
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineUpdatedAtInsert
+BEFORE INSERT ON Medicine
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineUpdatedAtUpdate
+BEFORE UPDATE ON Medicine
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_AppointmentsUpdatedAtInsert
+BEFORE INSERT ON Appointments
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_AppointmentsUpdatedAtUpdate
+BEFORE UPDATE ON Appointments
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineStockHistoryUpdatedAtInsert
+BEFORE INSERT ON MedicineStockHistory
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineStockHistoryUpdatedAtUpdate
+BEFORE UPDATE ON MedicineStockHistory
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineStockBalanceUpdatedAtInsert
+BEFORE INSERT ON MedicineStockBalance
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
+
+CREATE TRIGGER trg_MedicineStockBalanceUpdatedAtUpdate
+BEFORE UPDATE ON MedicineStockBalance
+FOR EACH ROW
+SET NEW.updated_at = UTC_TIMESTAMP(6) //
 
 DELIMITER ;
 
@@ -391,5 +766,8 @@ DELIMITER ;
 -- 2. Views use snake_case column names (e.g., patient_id, doctor_id)
 -- 3. Procedures validate data before insertion
 -- 4. Triggers automatically maintain data integrity
--- 5. Stock trigger prevents negative inventory
+-- 5. Stock trigger prevents negative inventory (O(1) check against MedicineStockBalance)
 -- 6. Available doctors view uses status_name instead of hardcoded IDs
+-- 7. Patient triggers maintain phone_normalized and the hashed PatientIdentifier rows used by patient search and lookup
+-- 8. updated_at triggers keep the API's conditional GET validators right for rows written outside Django
+-- 9. Ledger triggers keep MedicineStockBalance in step with every MedicineStockHistory insert, update and delete made outside Django
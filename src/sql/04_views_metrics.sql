@@ -13,14 +13,14 @@ USE HospitalDB;
 CREATE OR REPLACE VIEW view_hospital_overview AS
 SELECT
     (
-        SELECT COUNT(DISTINCT patient_id)
-        FROM Appointments
-        WHERE DATE(visit_date) = CURDATE()
+        SELECT COUNT(*)
+        FROM DailyPatientVisit
+        WHERE day = CURDATE()
     ) AS total_patients_today,
     (
-        SELECT COUNT(*)
-        FROM Appointments
-        WHERE visit_date >= CURDATE()
+        SELECT COALESCE(SUM(appointment_count), 0)
+        FROM DailyAppointmentStat
+        WHERE day >= CURDATE()
     ) AS pending_appointments,
     (
         SELECT COUNT(*)
@@ -30,33 +30,28 @@ SELECT
     ) AS doctors_on_duty,
     (
         SELECT COUNT(*)
-        FROM (
-            SELECT medicine_id
-            FROM MedicineStockHistory
-            GROUP BY medicine_id
-            HAVING SUM(CASE WHEN add_remove = 1 THEN amount ELSE -amount END) <= 10
-        ) AS low_stock
+        FROM MedicineStockBalance
+        WHERE current_stock <= 10
     ) AS low_stock_alerts;
 
 -- View: Weekly Patient Counts
--- Count of unique patients per day for the last 7 days
+-- Count of unique patients per day for the last 7 days (one DailyPatientVisit row per patient per day)
 CREATE OR REPLACE VIEW view_weekly_patient_counts AS
 SELECT
-    DATE(visit_date) AS date,
-    COUNT(DISTINCT patient_id) AS patients
-FROM Appointments
-WHERE DATE(visit_date) BETWEEN DATE_SUB(CURDATE(), INTERVAL 6 DAY) AND CURDATE()
-GROUP BY DATE(visit_date)
-ORDER BY DATE(visit_date);
+    day AS date,
+    COUNT(*) AS patients
+FROM DailyPatientVisit
+WHERE day BETWEEN DATE_SUB(CURDATE(), INTERVAL 6 DAY) AND CURDATE()
+GROUP BY day
+ORDER BY day;
 
 -- View: Top Conditions
--- Most common diagnoses based on appointment records
+-- Most common diagnoses, summed from the daily diagnosis rollup
 CREATE OR REPLACE VIEW view_top_conditions AS
 SELECT
     diagnosis AS `condition`,
-    COUNT(*) AS cnt
-FROM Appointments
-WHERE diagnosis IS NOT NULL AND diagnosis <> ''
+    SUM(appointment_count) AS cnt
+FROM DailyDiagnosisStat
 GROUP BY diagnosis
 ORDER BY cnt DESC
 LIMIT 10;
@@ -69,11 +64,10 @@ SELECT
     m.medicine_name,
     m.producer,
     m.medicine_unit,
-    COALESCE(SUM(CASE WHEN msh.add_remove = 1 THEN msh.amount ELSE -msh.amount END), 0) AS current_stock
+    COALESCE(msb.current_stock, 0) AS current_stock
 FROM Medicine m
-LEFT JOIN MedicineStockHistory msh ON m.id = msh.medicine_id
-GROUP BY m.id, m.medicine_name, m.producer, m.medicine_unit
-HAVING current_stock <= 10
+LEFT JOIN MedicineStockBalance msb ON m.id = msb.medicine_id
+WHERE COALESCE(msb.current_stock, 0) <= 10
 ORDER BY current_stock ASC;
 
 -- View: Doctor Workload
@@ -83,11 +77,11 @@ SELECT
     d.id AS doctor_id,
     CONCAT(d.first_name, ' ', IFNULL(d.last_name, '')) AS doctor_name,
     dept.department_name,
-    COUNT(a.id) AS total_appointments,
-    COUNT(CASE WHEN DATE(a.visit_date) >= CURDATE() THEN 1 END) AS upcoming_appointments
+    COALESCE(SUM(das.appointment_count), 0) AS total_appointments,
+    COALESCE(SUM(CASE WHEN das.day >= CURDATE() THEN das.appointment_count END), 0) AS upcoming_appointments
 FROM Doctor d
 LEFT JOIN Department dept ON d.department_id = dept.id
-LEFT JOIN Appointments a ON d.id = a.doctor_id
+LEFT JOIN DailyAppointmentStat das ON d.id = das.doctor_id
 GROUP BY d.id, d.first_name, d.last_name, dept.department_name
 ORDER BY total_appointments DESC;
 
@@ -99,11 +93,11 @@ SELECT
     dept.department_name,
     COUNT(DISTINCT d.id) AS total_doctors,
     COUNT(DISTINCT CASE WHEN s.status_name IN ('On-Demand', 'Active') THEN d.id END) AS available_doctors,
-    COUNT(a.id) AS total_appointments
+    COALESCE(SUM(das.appointment_count), 0) AS total_appointments
 FROM Department dept
 LEFT JOIN Doctor d ON dept.id = d.department_id
 LEFT JOIN Type_DoctorActiveStatus s ON d.active_status_id = s.id
-LEFT JOIN Appointments a ON d.id = a.doctor_id
+LEFT JOIN DailyAppointmentStat das ON d.id = das.doctor_id
 GROUP BY dept.id, dept.department_name
 ORDER BY total_appointments DESC;
 
@@ -156,3 +150,6 @@ ORDER BY total_visits DESC;
 -- 3. Views designed for dashboard and reporting functionality
 -- 4. All foreign key relationships use Django's _id convention
 -- 5. Status checks use status_name instead of hardcoded IDs for reliability
+-- 6. Appointment counts come from the daily rollup tables (DailyAppointmentStat,
+--    DailyDiagnosisStat, DailyPatientVisit), so cost follows the number of days, not appointments.
+--    Rebuild them with `python manage.py rebuild_appointment_rollups` after bulk loads.
@@ -339,6 +339,13 @@ INSERT INTO MedicineStockHistory (medicine_id, add_remove, amount, appointment_i
 (49, 1, 800, NULL, 'Initial stock - Clopidogrel'),
 (50, 1, 600, NULL, 'Initial stock - Levothyroxine');
 
+-- Sync running balances (MedicineStockBalance) with the ledger rows inserted above
+INSERT INTO MedicineStockBalance (medicine_id, current_stock)
+SELECT medicine_id, SUM(CASE WHEN add_remove = 1 THEN amount ELSE -amount END)
+FROM MedicineStockHistory
+GROUP BY medicine_id
+ON DUPLICATE KEY UPDATE current_stock = VALUES(current_stock);
+
 -- ==========================================
 -- 8. APPOINTMENTS (100 appointments over last 3 months)
 -- ==========================================
@@ -486,6 +493,13 @@ INSERT INTO MedicineStockHistory (medicine_id, add_remove, amount, appointment_i
 (17, 0, 10, 29, 'Dispensed for appointment #29'),
 (40, 0, 30, 30, 'Dispensed for appointment #30');
 
+-- Sync running balances (MedicineStockBalance) with the ledger rows inserted above
+INSERT INTO MedicineStockBalance (medicine_id, current_stock)
+SELECT medicine_id, SUM(CASE WHEN add_remove = 1 THEN amount ELSE -amount END)
+FROM MedicineStockHistory
+GROUP BY medicine_id
+ON DUPLICATE KEY UPDATE current_stock = VALUES(current_stock);
+
 -- ==========================================
 -- 10. PATIENT CORE MEDICAL INFORMATION
 -- ==========================================
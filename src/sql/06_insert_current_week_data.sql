@@ -97,6 +97,13 @@ INSERT INTO MedicineStockHistory (appointment_id, medicine_id, add_remove, amoun
 (@last_appt_id - 11, 21, 0, 30),  -- Amlodipine
 (@last_appt_id - 12, 32, 0, 30);  -- Vitamin C
 
+-- Sync running balances (MedicineStockBalance) with the ledger rows inserted above
+INSERT INTO MedicineStockBalance (medicine_id, current_stock)
+SELECT medicine_id, SUM(CASE WHEN add_remove = 1 THEN amount ELSE -amount END)
+FROM MedicineStockHistory
+GROUP BY medicine_id
+ON DUPLICATE KEY UPDATE current_stock = VALUES(current_stock);
+
 -- ==========================================
 -- SUMMARY
 -- ==========================================